@@ -0,0 +1,388 @@
+# overview_of_dataset.py
+# Veri seti genel istatistikleri – tek geçişte, parça parça (streaming).
+#
+# reviews (+ products kategorisi), sonra absa_aspects bir kez taranır; bellek
+# kullanımı satır sayısından bağımsızdır:
+#   - kategori başına rating dağılımı            (sayaç)
+#   - yorum uzunluğu quantile'ları               (t-digest)
+#   - farklı yorum metni / aspect sayısı         (HyperLogLog)
+#   - aspect kategorisi × sentiment eş-oluşumu   (sınırlı sayaç, taşan "_diğer")
+# Çıktı: overview.json, overview.md ve makaledeki aspect_dist tarzı grafikler.
+#
+#   python overview_of_dataset.py --db reviews_V2.db --out stats_out
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+DB_PATH = os.getenv("ABSA_DB_PATH", r"C:\Projects\NLP\ASBA\Scrapper\reviews_V2.db")
+CHUNK_SIZE = 20000
+MAX_ASPECT_CATEGORIES = 5000   # eş-oluşum tablosunda tutulacak en fazla kategori
+TOP_N = 20
+
+
+# ---------------------------------------------------------------------
+# Taslak (sketch) veri yapıları
+# ---------------------------------------------------------------------
+class TDigest:
+    """
+    Birleştirmeli (merging) t-digest. compression=100 ile ~%1 quantile hatası,
+    en fazla ~2*compression centroid.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means, self.weights = [], []
+        self._buf = []
+        self.count = 0
+        self.min, self.max = math.inf, -math.inf
+
+    def add(self, x, w=1):
+        self._buf.append((x, w))
+        self.count += w
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self._buf) >= 20 * self.compression:
+            self._compress()
+
+    def _k(self, q):
+        # k1 ölçek fonksiyonu: uçlarda küçük, ortada büyük centroid
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        if not self._buf:
+            return
+        pts = sorted(list(zip(self.means, self.weights)) + self._buf)
+        self._buf = []
+        total = sum(w for _, w in pts)
+        means, weights = [], []
+        cur_m, cur_w = pts[0]
+        q0 = 0.0
+        k_lo = self._k(0.0)
+        for m, w in pts[1:]:
+            q = q0 + (cur_w + w) / total
+            if self._k(q) - k_lo <= 1:
+                cur_m = (cur_m * cur_w + m * w) / (cur_w + w)
+                cur_w += w
+            else:
+                means.append(cur_m)
+                weights.append(cur_w)
+                q0 += cur_w / total
+                k_lo = self._k(q0)
+                cur_m, cur_w = m, w
+        means.append(cur_m)
+        weights.append(cur_w)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q):
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.count
+        cum = 0.0
+        for i, (m, w) in enumerate(zip(self.means, self.weights)):
+            if cum + w / 2 >= target:
+                if i == 0:
+                    lo_m, lo_c = self.min, 0.0
+                else:
+                    lo_m = self.means[i - 1]
+                    lo_c = cum - self.weights[i - 1] / 2
+                hi_c = cum + w / 2
+                frac = (target - lo_c) / (hi_c - lo_c) if hi_c > lo_c else 0.0
+                return lo_m + (m - lo_m) * frac
+            cum += w
+        return self.max
+
+    def centroids(self):
+        self._compress()
+        return list(zip(self.means, self.weights))
+
+
+class HyperLogLog:
+    """p=14 → 16384 register, ~%0.8 standart hata, 16 KB."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.reg = bytearray(self.m)
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    def add(self, value: str):
+        h = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        idx = h >> (64 - self.p)
+        rest = (h << self.p) & ((1 << 64) - 1)
+        rank = (64 - self.p + 1) if rest == 0 else (65 - rest.bit_length())
+        if rank > self.reg[idx]:
+            self.reg[idx] = rank
+
+    def count(self) -> int:
+        est = self.alpha * self.m * self.m / sum(2.0 ** -r for r in self.reg)
+        zeros = self.reg.count(0)
+        if est <= 2.5 * self.m and zeros:
+            est = self.m * math.log(self.m / zeros)   # küçük küme düzeltmesi
+        return int(round(est))
+
+
+# ---------------------------------------------------------------------
+# Yardımcılar
+# ---------------------------------------------------------------------
+@lru_cache(maxsize=8192)
+def split_categories(cat_str):
+    """products.categories → (main_category, leaf_category). subsets.parse_categories ile aynı kural."""
+    if cat_str is None:
+        return None, None
+    parts = [c.strip() for c in str(cat_str).lstrip(",").split(",")]
+    parts = [c for c in parts if c]
+    if not parts:
+        return None, None
+    return parts[0], parts[-1]
+
+
+def _columns(conn, table):
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _table_exists(conn, name):
+    # shard facade'ında tablolar TEMP VIEW olarak görünür
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=? "
+                        "UNION ALL SELECT 1 FROM sqlite_temp_master WHERE type='view' AND name=?",
+                        (name, name)).fetchone() is not None
+
+
+def _stream(conn, sql, params=()):
+    cur = conn.execute(sql, params)
+    while True:
+        rows = cur.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        yield rows
+
+
+# ---------------------------------------------------------------------
+# Tek geçiş
+# ---------------------------------------------------------------------
+def compute_overview(conn):
+    t0 = time.perf_counter()
+    has_rating = "rating" in _columns(conn, "reviews")
+    has_cats = "categories" in _columns(conn, "products")
+
+    n_reviews = 0
+    rating_all = Counter()
+    rating_by_main = defaultdict(Counter)
+    rating_by_leaf = defaultdict(Counter)
+    length_all = TDigest()
+    length_by_main = defaultdict(TDigest)
+    hll_text = HyperLogLog()
+    hll_products = HyperLogLog()
+
+    sql = f"""
+        SELECT r.product_id, {"r.rating" if has_rating else "NULL"}, r.review_text,
+               {"p.categories" if has_cats else "NULL"}
+        FROM reviews r
+        LEFT JOIN products p ON p.id = r.product_id
+    """
+    for rows in _stream(conn, sql):
+        for product_id, rating, text, cats in rows:
+            n_reviews += 1
+            text = text or ""
+            main, leaf = split_categories(cats)
+            rating_all[rating] += 1
+            rating_by_main[main][rating] += 1
+            rating_by_leaf[leaf][rating] += 1
+            length_all.add(len(text))
+            length_by_main[main].add(len(text))
+            hll_text.add(text.strip())
+            hll_products.add(str(product_id))
+
+    n_aspects = 0
+    hll_aspects = HyperLogLog()
+    co = defaultdict(Counter)          # aspect category → sentiment sayacı
+    sentiment_all = Counter()
+    aspects_per_review = Counter()     # aspect sayısı → yorum sayısı
+    if _table_exists(conn, "absa_aspects"):
+        last_rid, k = None, 0
+        for rows in _stream(conn, "SELECT review_id, aspect, category, sentiment FROM absa_aspects ORDER BY review_id"):
+            for rid, aspect, category, sentiment in rows:
+                n_aspects += 1
+                hll_aspects.add((aspect or "").strip().lower())
+                cat = (category or "").strip().lower()
+                if cat not in co and len(co) >= MAX_ASPECT_CATEGORIES:
+                    cat = "_diğer"
+                co[cat][sentiment] += 1
+                sentiment_all[sentiment] += 1
+                if rid != last_rid:
+                    if last_rid is not None:
+                        aspects_per_review[k] += 1
+                    last_rid, k = rid, 0
+                k += 1
+        if last_rid is not None:
+            aspects_per_review[k] += 1
+
+    qs = (0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+    def _q(td):
+        return {f"p{int(q * 100)}": (round(td.quantile(q), 1) if td.count else None) for q in qs}
+
+    def _rd(c):
+        return {str(k): v for k, v in sorted(c.items(), key=lambda kv: (kv[0] is None, kv[0] or 0))}
+
+    top_cats = sorted(co.items(), key=lambda kv: -sum(kv[1].values()))
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "reviews": n_reviews,
+        "distinct_products_approx": hll_products.count(),
+        "distinct_review_texts_approx": hll_text.count(),
+        "rating_distribution": _rd(rating_all),
+        "rating_by_main_category": {str(k): _rd(v) for k, v in
+                                    sorted(rating_by_main.items(), key=lambda kv: -sum(kv[1].values()))},
+        "rating_by_leaf_category_top": {str(k): _rd(v) for k, v in
+                                        sorted(rating_by_leaf.items(), key=lambda kv: -sum(kv[1].values()))[:TOP_N]},
+        "review_length_chars": _q(length_all),
+        "review_length_by_main_category": {str(k): _q(v) for k, v in length_by_main.items()},
+        "aspects": n_aspects,
+        "distinct_aspects_approx": hll_aspects.count() if n_aspects else 0,
+        "aspect_categories_tracked": len(co),
+        "sentiment_distribution": dict(sentiment_all),
+        "aspects_per_review": {str(k): v for k, v in sorted(aspects_per_review.items())},
+        "aspect_category_x_sentiment_top": {c: dict(s) for c, s in top_cats[:TOP_N]},
+        "elapsed_s": None,
+    }
+    report["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    # grafikler için ham t-digest
+    report["_length_digest"] = length_all
+    return report
+
+
+# ---------------------------------------------------------------------
+# Çıktılar
+# ---------------------------------------------------------------------
+def write_markdown(report, path):
+    lines = ["# Veri seti özeti", "",
+             f"- Yorum sayısı: **{report['reviews']}**",
+             f"- Farklı ürün (yaklaşık): {report['distinct_products_approx']}",
+             f"- Farklı yorum metni (yaklaşık): {report['distinct_review_texts_approx']}",
+             f"- Aspect satırı: {report['aspects']}  (farklı aspect ≈ {report['distinct_aspects_approx']})",
+             "", "## Rating dağılımı", "", "| rating | adet |", "|---|---|"]
+    lines += [f"| {k} | {v} |" for k, v in report["rating_distribution"].items()]
+    lines += ["", "## Yorum uzunluğu (karakter)", "", "| quantile | değer |", "|---|---|"]
+    lines += [f"| {k} | {v} |" for k, v in report["review_length_chars"].items()]
+    lines += ["", "## Ana kategori × rating", "", "| kategori | " + " | ".join(map(str, range(1, 6))) + " |",
+              "|---" * 6 + "|"]
+    for cat, dist in report["rating_by_main_category"].items():
+        lines.append(f"| {cat} | " + " | ".join(str(dist.get(str(r), 0)) for r in range(1, 6)) + " |")
+    if report["aspects"]:
+        sents = ("positive", "negative", "neutral", "mixed")
+        lines += ["", "## Aspect kategorisi × sentiment (ilk %d)" % TOP_N, "",
+                  "| kategori | " + " | ".join(sents) + " |", "|---" * 5 + "|"]
+        for cat, dist in report["aspect_category_x_sentiment_top"].items():
+            lines.append(f"| {cat} | " + " | ".join(str(dist.get(s, 0)) for s in sents) + " |")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_plots(report, out_dir):
+    """aspect_dist.png, rating_by_category.png, review_length.png (matplotlib varsa)."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib yok, grafikler atlandı.")
+        return []
+    written = []
+    sents = ("positive", "negative", "neutral", "mixed")
+    colors = {"positive": "#4caf50", "negative": "#e53935", "neutral": "#9e9e9e", "mixed": "#ffb300"}
+
+    top = report["aspect_category_x_sentiment_top"]
+    if top:
+        cats = list(top)[::-1]
+        fig, ax = plt.subplots(figsize=(8, 0.35 * len(cats) + 1.5))
+        left = [0] * len(cats)
+        for s in sents:
+            vals = [top[c].get(s, 0) for c in cats]
+            ax.barh(cats, vals, left=left, label=s, color=colors[s])
+            left = [a + b for a, b in zip(left, vals)]
+        ax.set_xlabel("aspect sayısı")
+        ax.set_title("Aspect kategorisi dağılımı (sentiment kırılımlı)")
+        ax.legend(loc="lower right")
+        fig.tight_layout()
+        p = os.path.join(out_dir, "aspect_dist.png")
+        fig.savefig(p, dpi=200)
+        plt.close(fig)
+        written.append(p)
+
+    by_main = report["rating_by_main_category"]
+    if by_main:
+        cats = list(by_main)[:TOP_N]
+        fig, ax = plt.subplots(figsize=(9, 4))
+        bottom = [0.0] * len(cats)
+        for r in range(1, 6):
+            vals = []
+            for c in cats:
+                tot = sum(by_main[c].values()) or 1
+                vals.append(by_main[c].get(str(r), 0) / tot)
+            ax.bar(cats, vals, bottom=bottom, label=f"{r}★")
+            bottom = [a + b for a, b in zip(bottom, vals)]
+        ax.set_ylabel("oran")
+        ax.set_title("Ana kategori başına rating dağılımı")
+        ax.legend(ncol=5, fontsize=8)
+        plt.setp(ax.get_xticklabels(), rotation=30, ha="right")
+        fig.tight_layout()
+        p = os.path.join(out_dir, "rating_by_category.png")
+        fig.savefig(p, dpi=200)
+        plt.close(fig)
+        written.append(p)
+
+    td = report.get("_length_digest")
+    if td is not None and td.count:
+        qs = [i / 100 for i in range(1, 100)]
+        fig, ax = plt.subplots(figsize=(6, 4))
+        ax.plot([td.quantile(q) for q in qs], qs)
+        ax.set_xscale("log")
+        ax.set_xlabel("yorum uzunluğu (karakter, log)")
+        ax.set_ylabel("kümülatif oran")
+        ax.set_title("Yorum uzunluğu CDF (t-digest)")
+        fig.tight_layout()
+        p = os.path.join(out_dir, "review_length.png")
+        fig.savefig(p, dpi=200)
+        plt.close(fig)
+        written.append(p)
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Veri seti tek geçişli istatistikleri")
+    ap.add_argument("--db", default=DB_PATH, help="SQLite dosyası ya da shard klasörü")
+    ap.add_argument("--out", default="stats_out")
+    ap.add_argument("--no-plots", action="store_true")
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    # shard klasörü ya da zstd ile sıkıştırılmış DB de olabilir (DataProcessing/sharded_store.connect)
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DataProcessing"))
+    from sharded_store import connect
+    conn = connect(args.db)
+    print("DB bağlantısı açıldı:", args.db)
+    report = compute_overview(conn)
+    conn.close()
+
+    plots = [] if args.no_plots else write_plots(report, args.out)
+    report.pop("_length_digest", None)
+    report["plots"] = plots
+    with open(os.path.join(args.out, "overview.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    write_markdown(report, os.path.join(args.out, "overview.md"))
+    print(f"Rapor yazıldı: {args.out} ({report['reviews']} yorum, {report['elapsed_s']}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# review_fts.py
+# reviews.review_text üzerinde FTS5 tam metin indeksi.
+#
+# SQLite'ın Python API'si özel FTS5 tokenizer yazmaya izin vermediği için
+# Türkçe katlama iki adımda yapılır:
+#   1) metin indekslenmeden önce 'ı' → 'i' (trigger içinde replace(); uzunluk korunur)
+#   2) unicode61 remove_diacritics 2: büyük/küçük harf + ş/ğ/ü/ö/ç/İ → s/g/u/o/c/i
+# Böylece "KARGO", "kargo", "Işık", "ışık", "isik" ve "pil ömrü"/"pil omru" aynı
+# token'lara düşer. Sorgu tarafında aynı katlama fold_tr() ile uygulanır.
+#
+# Tablo external-content (content='reviews'): metin iki kez saklanmaz, bm25
+# sıralama çalışır. Snippet ve offset'ler Python'da orijinal metin üzerinden
+# hesaplanır (fold_tr uzunluğu koruduğu için offset'ler birebir geçerlidir).
+# NOT: reviews_fts('rebuild') kullanmayın – katlanmamış metni indeksler;
+# yeniden kurmak için rebuild_fts() var.
+# reviews zstd_store ile sıkıştırılmışsa (review_text = '', metin review_text_z'de)
+# backfill/rebuild metni zstd_decompress ile çözerek indeksler; arama sonucundaki
+# metin/snippet için bağlantı zstd_store.open_db/attach_decoded ile açılmalı.
+# Sıkıştırılmış DB'de silme/güncelleme trigger'ları FTS'e 'delete' için çözülmüş
+# eski metni verir (install_triggers; compress_table da çağırır). Bu yüzden
+# sıkıştırılmış yorumları silen/güncelleyen bağlantıda zstd_store.register()
+# gerekir; yoksa SQLite "no such function" ile reddeder, indeks bozulmaz.
+# Yeni eklenen satırlar düz metin olduğundan INSERT trigger'ı UDF istemez.
+#
+#   python review_fts.py --db reviews_V2.db init
+#   python review_fts.py --db reviews_V2.db search kargo "pil ömrü" --limit 10
+import argparse
+import os
+import re
+import sqlite3
+import unicodedata
+from typing import List, Optional
+
+from zstd_store import attach_decoded, is_compressed, register
+
+DB_PATH = os.getenv("ABSA_DB_PATH", r"C:\Projects\NLP\ASBA\Scrapper\reviews_V2.db")
+FTS_TABLE = "reviews_fts"
+SNIPPET_CHARS = 60
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fold_char(c: str) -> str:
+    if c in "ıIİ":
+        return "i"
+    base = unicodedata.normalize("NFD", c)[0].lower()
+    return base if len(base) == 1 else c
+
+
+_FOLD_CACHE = {}
+
+
+def fold_tr(s: str) -> str:
+    """Türkçe-duyarlı katlama: küçük harf + aksan/ı-i birleştirme. Uzunluk korunur."""
+    out = []
+    for c in s:
+        f = _FOLD_CACHE.get(c)
+        if f is None:
+            f = _FOLD_CACHE[c] = _fold_char(c)
+        out.append(f)
+    return "".join(out)
+
+
+# ---------------------------------------------------------------------
+# Kurulum
+# ---------------------------------------------------------------------
+def _source_text_sql(conn) -> str:
+    """Backfill/rebuild için metin ifadesi; reviews sıkıştırılmışsa çözülmüş metin."""
+    if is_compressed(conn, "reviews"):
+        register(conn)
+        return "COALESCE(zstd_decompress(review_text_z), review_text)"
+    return "review_text"
+
+
+def install_triggers(conn, compressed: Optional[bool] = None):
+    """
+    Senkron trigger'larını (yeniden) kurar. compressed (varsayılan: reviews'a
+    bakılır) ise silinen/güncellenen satırın metni review_text_z'den çözülür;
+    external-content FTS'te 'delete' eski token'ları birebir istediği için
+    '' ile silmek indekste bayat kayıt bırakırdı. Commit çağırana aittir.
+    """
+    if compressed is None:
+        compressed = is_compressed(conn, "reviews")
+
+    def text(row):
+        if compressed:
+            return f"replace(COALESCE(zstd_decompress({row}.review_text_z), {row}.review_text), 'ı', 'i')"
+        return f"replace({row}.review_text, 'ı', 'i')"
+
+    for t in ("reviews_fts_ad", "reviews_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {t}")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reviews_fts_ai AFTER INSERT ON reviews BEGIN
+          INSERT INTO {FTS_TABLE}(rowid, review_text) VALUES (new.id, replace(new.review_text, 'ı', 'i'));
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER reviews_fts_ad AFTER DELETE ON reviews BEGIN
+          INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, review_text) VALUES ('delete', old.id, {text("old")});
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER reviews_fts_au AFTER UPDATE OF review_text{", review_text_z" if compressed else ""} ON reviews
+        BEGIN
+          INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, review_text) VALUES ('delete', old.id, {text("old")});
+          INSERT INTO {FTS_TABLE}(rowid, review_text) VALUES (new.id, {text("new")});
+        END""")
+
+
+def has_fts(conn) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name=?", (FTS_TABLE,)).fetchone() is not None
+
+
+def init_fts(conn, backfill: bool = True) -> bool:
+    """
+    FTS tablosu + senkron trigger'ları kurar. Tablo yeni oluşturulduysa
+    mevcut yorumlar indekslenir. Dönen: tablo yeni mi oluşturuldu.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name=?", (FTS_TABLE,)).fetchone()
+    with conn:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+                review_text,
+                content='reviews', content_rowid='id',
+                tokenize="unicode61 remove_diacritics 2",
+                prefix='2 3 4'
+            )""")
+        install_triggers(conn)
+        if not exists and backfill:
+            conn.execute(f"""
+                INSERT INTO {FTS_TABLE}(rowid, review_text)
+                SELECT id, replace(t, 'ı', 'i') FROM (SELECT id, {_source_text_sql(conn)} AS t FROM main.reviews)
+                WHERE t IS NOT NULL
+            """)
+    return not exists
+
+
+def rebuild_fts(conn):
+    """İndeksi sıfırdan kurar (katlama kuralı değiştiğinde)."""
+    with conn:
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+        conn.execute(f"""
+            INSERT INTO {FTS_TABLE}(rowid, review_text)
+            SELECT id, replace(t, 'ı', 'i') FROM (SELECT id, {_source_text_sql(conn)} AS t FROM main.reviews)
+            WHERE t IS NOT NULL
+        """)
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def drop_fts(conn):
+    with conn:
+        for t in ("reviews_fts_ai", "reviews_fts_ad", "reviews_fts_au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {t}")
+        conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+# ---------------------------------------------------------------------
+# Sorgu
+# ---------------------------------------------------------------------
+def build_match(terms: List[str], prefix: bool = True, op: str = "AND") -> str:
+    """
+    ["kargo", "pil ömrü"] → '"kargo"* AND "pil omru"*'
+    Çok kelimeli terim phrase olur; prefix=True son kelimeye * ekler
+    (Türkçe ekler için: "kargo"* → kargoda, kargonun, ...).
+    """
+    parts = []
+    for t in terms:
+        toks = _TOKEN_RE.findall(fold_tr(t))
+        if not toks:
+            continue
+        parts.append('"' + " ".join(toks) + '"' + ("*" if prefix else ""))
+    return f" {op} ".join(parts)
+
+
+def _term_spans(text: str, terms: List[str], prefix: bool):
+    """Orijinal metinde eşleşen terimlerin (start, end) offset'leri."""
+    folded = fold_tr(text)
+    spans = []
+    for t in terms:
+        toks = _TOKEN_RE.findall(fold_tr(t))
+        if not toks:
+            continue
+        pat = r"\b" + r"\W+".join(re.escape(x) for x in toks) + (r"\w*" if prefix else r"\b")
+        spans.extend((m.start(), m.end()) for m in re.finditer(pat, folded))
+    return sorted(spans)
+
+
+def _snippet(text: str, spans, width: int = SNIPPET_CHARS) -> str:
+    if not spans:
+        return text[: 2 * width]
+    s, e = spans[0]
+    lo, hi = max(0, s - width), min(len(text), e + width)
+    out = []
+    pos = lo
+    for a, b in spans:
+        if a < lo or b > hi or a < pos:
+            continue
+        out.append(text[pos:a])
+        out.append("[" + text[a:b] + "]")
+        pos = b
+    out.append(text[pos:hi])
+    return ("…" if lo > 0 else "") + "".join(out) + ("…" if hi < len(text) else "")
+
+
+def search(conn, terms, limit: int = 20, prefix: bool = True, op: str = "AND",
+           product_id: Optional[int] = None, with_text: bool = True):
+    """
+    BM25 sıralı arama. Her sonuç:
+      {review_id, product_id, score, spans: [(start, end), ...], snippet, text?}
+    score küçük = daha alakalı (FTS5 bm25 konvansiyonu).
+    """
+    if isinstance(terms, str):
+        terms = [terms]
+    match = build_match(terms, prefix=prefix, op=op)
+    if not match:
+        return []
+    sql = f"""
+        SELECT r.id, r.product_id, bm25({FTS_TABLE}) AS score, r.review_text
+        FROM {FTS_TABLE}
+        JOIN reviews r ON r.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ?
+    """
+    params = [match]
+    if product_id is not None:
+        sql += " AND r.product_id = ?"
+        params.append(product_id)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    out = []
+    for rid, pid, score, text in conn.execute(sql, params):
+        spans = _term_spans(text or "", terms, prefix)
+        rec = {"review_id": rid, "product_id": pid, "score": score, "spans": spans,
+               "snippet": _snippet(text or "", spans)}
+        if with_text:
+            rec["text"] = text
+        out.append(rec)
+    return out
+
+
+def matching_review_ids(conn, terms, prefix: bool = True, op: str = "OR") -> List[int]:
+    """Aspect hedefli örnekleme için: terimlerden herhangi birini içeren yorum id'leri."""
+    if isinstance(terms, str):
+        terms = [terms]
+    match = build_match(terms, prefix=prefix, op=op)
+    if not match:
+        return []
+    return [r[0] for r in conn.execute(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", (match,))]
+
+
+def count_matches(conn, terms, prefix: bool = True, op: str = "AND") -> int:
+    match = build_match([terms] if isinstance(terms, str) else terms, prefix=prefix, op=op)
+    if not match:
+        return 0
+    return conn.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", (match,)).fetchone()[0]
+
+
+if __name__ == "__main__":
+    import json
+    import time
+    ap = argparse.ArgumentParser(description="reviews FTS5 indeksi")
+    ap.add_argument("--db", default=DB_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("init")
+    sub.add_parser("rebuild")
+    sub.add_parser("drop")
+    p = sub.add_parser("search")
+    p.add_argument("terms", nargs="+")
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--or", dest="op", action="store_const", const="OR", default="AND")
+    p.add_argument("--exact", action="store_true", help="prefix eşleşmeyi kapat")
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    t0 = time.perf_counter()
+    if args.cmd == "init":
+        print("oluşturuldu" if init_fts(conn) else "zaten var")
+    elif args.cmd == "rebuild":
+        rebuild_fts(conn)
+    elif args.cmd == "drop":
+        drop_fts(conn)
+    else:
+        attach_decoded(conn, ("reviews",))
+        res = search(conn, args.terms, limit=args.limit, prefix=not args.exact, op=args.op, with_text=False)
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+    print(f"({time.perf_counter() - t0:.3f}s)")
+    conn.close()
@@ -0,0 +1,187 @@
+# review_quality.py
+# LLM etiketlemesinden önce "aspect çıkmayacak" yorumları ayıklayan ucuz ön filtre.
+#
+# Özellikler pandas .str / numpy ile toplu hesaplanır (satır başına Python yok):
+#   n_chars, n_words, alpha_ratio, latin_ratio (harfler içinde Latin/Türkçe oranı),
+#   tr_score / en_score (stopword + Türkçe harf sinyali), repeat_ratio (3+ tekrar
+#   eden karakter dizilerinin payı), spam (satıcı/reklam kalıbı), dup_products
+#   (aynı metnin geçtiği farklı ürün sayısı).
+# Sonuç review_quality tablosuna yazılır; skip_reason NULL ise yorum etiketlenir.
+# absa_labelling.py (label) ve subsets.py skip_reason'ı dolu yorumları atlar.
+#
+#   python review_quality.py --db reviews_V2.db            # yeni yorumları işle + rapor
+#   python review_quality.py --db reviews_V2.db --rebuild  # kurallar değiştiyse
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from zstd_store import open_db
+
+DB_PATH = os.getenv("ABSA_DB_PATH", r"C:\Projects\NLP\ASBA\Scrapper\reviews_V2.db")
+QUALITY_TABLE = "review_quality"
+CHUNK_ROWS = 50000
+
+# Eşikler
+MIN_CHARS = 8
+MIN_WORDS = 2
+MIN_ALPHA_RATIO = 0.5
+MIN_LATIN_RATIO = 0.8
+MAX_REPEAT_RATIO = 0.4
+DUP_MIN_PRODUCTS = 5        # aynı uzun metin bu kadar farklı üründe → şablon
+DUP_MIN_WORDS = 8
+
+# skip_reason değerleri (öncelik sırasıyla)
+SKIP_EMPTY = "empty"
+SKIP_NO_LETTERS = "no_letters"          # emoji / noktalama / rakam
+SKIP_TOO_SHORT = "too_short"
+SKIP_REPEATED = "repeated_chars"        # "süperrrrrr!!!!!!", "aaaaaa"
+SKIP_NON_TURKISH = "non_turkish"        # farklı alfabe ya da İngilizce
+SKIP_SPAM = "spam_template"             # link, telefon, sosyal medya, kupon
+SKIP_DUPLICATE = "duplicate_template"   # birçok üründe birebir aynı uzun metin
+
+# Kısa yorumlarda LLM'in ürettiği "aspect"ler; raporda gerçek aspect sayılmaz
+GENERIC_ASPECTS = ("genel", "ürün", "urun", "genel değerlendirme")
+
+_TR_LETTERS = r"[çğıöşüÇĞİÖŞÜ]"
+_LATIN_LETTERS = r"[A-Za-zçğıöşüÇĞİÖŞÜâîûÂÎÛ]"
+_LETTERS = r"[^\W\d_]"
+_TR_STOP = r"\b(?:ve|bir|bu|çok|cok|ama|için|icin|de|da|ile|gibi|daha|ürün|urun|güzel|guzel|değil|degil|geldi|iyi|aldım|aldim|tavsiye|ederim|kargo)\b"
+_EN_STOP = r"\b(?:the|and|is|it|this|very|good|product|with|for|was|not|but|great|nice|you)\b"
+_SPAM = (r"https?://|www\.|\.com\b|whats?app|instagram|telegram|t\.me/|"
+         r"\b0?5\d{2}[\s.-]?\d{3}[\s.-]?\d{2}[\s.-]?\d{2}\b|"
+         r"indirim kodu|kupon kodu|promosyon kodu|takip ed(?:in|iniz)|mağazamız|magazamiz")
+
+
+def init_quality_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {QUALITY_TABLE} (
+            review_id INTEGER PRIMARY KEY,
+            n_chars INTEGER,
+            n_words INTEGER,
+            alpha_ratio REAL,
+            latin_ratio REAL,
+            tr_score INTEGER,
+            en_score INTEGER,
+            repeat_ratio REAL,
+            spam INTEGER,
+            dup_products INTEGER,
+            skip_reason TEXT,
+            computed_ts INTEGER
+        )""")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{QUALITY_TABLE}_skip ON {QUALITY_TABLE}(skip_reason)")
+    conn.commit()
+
+
+def compute_features(texts: pd.Series) -> pd.DataFrame:
+    """texts → özellik DataFrame'i (index korunur)."""
+    s = texts.fillna("").astype(str).str.strip()
+    low = s.str.lower()
+    n_chars = s.str.len().to_numpy()
+    safe = np.maximum(n_chars, 1)
+    letters = s.str.count(_LETTERS).to_numpy()
+    latin = s.str.count(_LATIN_LETTERS).to_numpy()
+    collapsed = s.str.replace(r"(.)\1{2,}", "", regex=True).str.len().to_numpy()
+    return pd.DataFrame({
+        "n_chars": n_chars,
+        "n_words": s.str.count(r"\w+").to_numpy(),
+        "alpha_ratio": letters / safe,
+        "latin_ratio": latin / np.maximum(letters, 1),
+        "tr_score": low.str.count(_TR_STOP).to_numpy() + (s.str.count(_TR_LETTERS).to_numpy() > 0),
+        "en_score": low.str.count(_EN_STOP).to_numpy(),
+        "repeat_ratio": (n_chars - collapsed) / safe,
+        "spam": low.str.contains(_SPAM, regex=True).to_numpy().astype(int),
+    }, index=texts.index)
+
+
+def skip_reasons(f: pd.DataFrame) -> np.ndarray:
+    """Özelliklerden skip_reason (None = etiketlenecek). İlk eşleşen kural kazanır."""
+    conds = [
+        (f["n_chars"] == 0, SKIP_EMPTY),
+        (f["alpha_ratio"] == 0, SKIP_NO_LETTERS),
+        ((f["n_chars"] < MIN_CHARS) | (f["n_words"] < MIN_WORDS), SKIP_TOO_SHORT),
+        (f["repeat_ratio"] > MAX_REPEAT_RATIO, SKIP_REPEATED),
+        ((f["alpha_ratio"] < MIN_ALPHA_RATIO) & (f["n_words"] < 4), SKIP_TOO_SHORT),
+        ((f["latin_ratio"] < MIN_LATIN_RATIO) | ((f["en_score"] >= 2) & (f["en_score"] > 2 * f["tr_score"])),
+         SKIP_NON_TURKISH),
+        (f["spam"] == 1, SKIP_SPAM),
+        ((f["dup_products"] >= DUP_MIN_PRODUCTS) & (f["n_words"] >= DUP_MIN_WORDS), SKIP_DUPLICATE),
+    ]
+    return np.select([c.to_numpy() for c, _ in conds], [r for _, r in conds], default=None)
+
+
+def refresh_quality(conn, rebuild=False, chunk_rows=CHUNK_ROWS):
+    """Tabloda olmayan yorumları (rebuild=True ise hepsini) işler. Dönen: işlenen satır."""
+    init_quality_table(conn)
+    if rebuild:
+        with conn:
+            conn.execute(f"DELETE FROM {QUALITY_TABLE}")
+    after = conn.execute(f"SELECT COALESCE(MAX(review_id), 0) FROM {QUALITY_TABLE}").fetchone()[0]
+
+    # aynı metnin kaç farklı üründe geçtiği (review_hash = strip edilmiş metnin sha256'sı)
+    dup = pd.read_sql_query(
+        "SELECT review_hash, COUNT(DISTINCT product_id) AS dup_products FROM reviews "
+        "GROUP BY review_hash HAVING COUNT(DISTINCT product_id) > 1", conn).set_index("review_hash")["dup_products"]
+
+    n = 0
+    now = int(time.time())
+    for df in pd.read_sql_query("SELECT id, review_hash, review_text FROM reviews WHERE id > ? ORDER BY id",
+                                conn, params=(after,), chunksize=chunk_rows):
+        feats = compute_features(df["review_text"])
+        feats["dup_products"] = df["review_hash"].map(dup).fillna(1).astype(int).to_numpy()
+        feats["skip_reason"] = skip_reasons(feats)
+        feats.insert(0, "review_id", df["id"].to_numpy())
+        feats["computed_ts"] = now
+        rows = feats.astype(object).where(feats.notna(), None).itertuples(index=False, name=None)
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {QUALITY_TABLE} VALUES ({','.join('?' * feats.shape[1])})", rows)
+        n += len(df)
+    return n
+
+
+def quality_report(conn):
+    """skip_reason dağılımı ve bekleyen (absa_raw'da olmayan) yorumlarda kazanılan LLM çağrısı."""
+    out = {"reasons": dict(conn.execute(
+        f"SELECT COALESCE(skip_reason, 'ok'), COUNT(*) FROM {QUALITY_TABLE} GROUP BY 1 ORDER BY 2 DESC"))}
+    has_raw = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='absa_raw'").fetchone()
+    pending_join = "LEFT JOIN absa_raw a ON a.review_id = q.review_id WHERE a.review_id IS NULL" if has_raw else "WHERE 1"
+    pending, skipped, chars = conn.execute(f"""
+        SELECT COUNT(*), SUM(q.skip_reason IS NOT NULL),
+               SUM(CASE WHEN q.skip_reason IS NOT NULL THEN q.n_chars ELSE 0 END)
+        FROM {QUALITY_TABLE} q {pending_join}""").fetchone()
+    out["pending_reviews"] = pending
+    out["llm_calls_saved"] = skipped or 0
+    out["llm_calls_saved_pct"] = round(100.0 * (skipped or 0) / pending, 1) if pending else 0.0
+    out["input_chars_saved"] = chars or 0
+    if has_raw:
+        # doğrulama: zaten etiketlenmiş ama filtreye takılan yorumlardan kaçında
+        # genel ("ürün", "genel") dışında bir aspect çıkmış?
+        generic = ",".join("?" * len(GENERIC_ASPECTS))
+        row = conn.execute(f"""
+            SELECT COUNT(*),
+                   SUM(EXISTS(SELECT 1 FROM absa_aspects x WHERE x.review_id = q.review_id)),
+                   SUM(EXISTS(SELECT 1 FROM absa_aspects x WHERE x.review_id = q.review_id
+                              AND lower(x.aspect) NOT IN ({generic})))
+            FROM {QUALITY_TABLE} q JOIN absa_raw a ON a.review_id = q.review_id
+            WHERE q.skip_reason IS NOT NULL""", GENERIC_ASPECTS).fetchone()
+        out["labelled_but_skipped"] = {"reviews": row[0], "with_aspects": row[1] or 0,
+                                       "with_specific_aspects": row[2] or 0}
+    return out
+
+
+if __name__ == "__main__":
+    import json
+    ap = argparse.ArgumentParser(description="Yorum kalite ön filtresi")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--rebuild", action="store_true", help="tabloyu baştan hesapla")
+    args = ap.parse_args()
+
+    conn = open_db(args.db, tables=("reviews",))   # reviews zstd ile sıkıştırılmış olabilir
+    t0 = time.perf_counter()
+    n = refresh_quality(conn, rebuild=args.rebuild)
+    print(f"{n} yorum işlendi ({time.perf_counter() - t0:.2f}s)")
+    print(json.dumps(quality_report(conn), ensure_ascii=False, indent=2))
+    conn.close()
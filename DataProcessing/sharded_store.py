@@ -0,0 +1,366 @@
+# sharded_store.py
+# reviews / absa_* verisini birden fazla SQLite dosyasına bölen depolama katmanı.
+#
+# Tek reviews_V2.db'ye scraper, categorize ve labeller aynı anda yazınca tek
+# yazar kilidi darboğaz olur. Burada:
+#   - <dir>/shard_00.db ... shard_NN.db: her biri tam şema (products, reviews, absa_*)
+#   - her shard'ın kendi yazar thread'i ve bağlantısı var; yazımlar kuyruğa atılır
+#   - id'ler global tekil: shard k, AUTOINCREMENT aralığı (k+1) << 40'tan başlar
+#     (sqlite_sequence ile tohumlanır), böylece shard_of_id(id) hesapla bulunur
+#   - ürünün shard'ı URL'nin hash'i; eski tek dosyadan taşınan (id < 1 << 40)
+#     ürünler de aynı kuralla dağıtılır, onların shard'ı bir kez sorgulanıp önbelleklenir
+#   - okuma: open_facade() shard'ları ATTACH eder ve aynı isimli TEMP UNION ALL
+#     view'ları kurar; subsets.py / overview_of_dataset.py değişmeden sorgular
+#
+#   python sharded_store.py split --src reviews_V2.db --dir shards --n 4
+#   python sharded_store.py info --dir shards
+#
+# Not: SQLite varsayılanı en fazla 10 ATTACH'e izin verir (SQLITE_MAX_ATTACHED).
+import argparse
+import hashlib
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _d in ("Scrappers", "RAG_2_ASBA"):
+    _p = os.path.join(_REPO, _d)
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+from zstd_store import COMPRESSED_COLUMNS, Z_SUFFIX, decoded_select_list, open_db, register
+
+ID_SHIFT = 40
+SHARD_GLOB_PREFIX = "shard_"
+# Facade'da UNION ALL ile birleştirilen tablolar
+FACADE_TABLES = ("products", "reviews", "absa_raw", "absa_aspects")
+# AUTOINCREMENT aralığı tohumlanan tablolar
+SEQUENCED_TABLES = ("products", "reviews", "absa_aspects")
+
+
+def shard_path(shard_dir, k):
+    return os.path.join(shard_dir, f"{SHARD_GLOB_PREFIX}{k:02d}.db")
+
+
+def list_shards(shard_dir):
+    return sorted(os.path.join(shard_dir, f) for f in os.listdir(shard_dir)
+                  if f.startswith(SHARD_GLOB_PREFIX) and f.endswith(".db"))
+
+
+def id_base(k):
+    return (k + 1) << ID_SHIFT
+
+
+def shard_of_id(row_id):
+    """Shard'da üretilmiş id'den shard numarası; taşınmış eski id'ler için None."""
+    if row_id >= (1 << ID_SHIFT):
+        return (row_id >> ID_SHIFT) - 1
+    return None
+
+
+def shard_of_url(url, n_shards):
+    """Ürünün shard'ı: URL'nin kararlı hash'i (yeni ve taşınan ürünler için aynı)."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big") % n_shards
+
+
+# ---------------------------------------------------------------------
+# Shard kurulumu
+# ---------------------------------------------------------------------
+def init_shard(path, k):
+    """
+    Shard dosyasını tam şemayla kurar. products/reviews burada AUTOINCREMENT ile
+    önceden oluşturulur ki reviews_db.init_db'nin CREATE IF NOT EXISTS'i atlansın
+    ve sqlite_sequence tohumu kalıcı olsun.
+    """
+    from reviews_db import init_db
+    from absa_labelling import ensure_tables
+
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE,
+        title TEXT,
+        first_seen_ts INTEGER
+    )""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS reviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        review_hash TEXT NOT NULL,
+        review_text TEXT NOT NULL,
+        rating INTEGER,
+        page_no INTEGER,
+        collected_ts INTEGER,
+        FOREIGN KEY(product_id) REFERENCES products(id),
+        UNIQUE(product_id, review_hash)
+    )""")
+    conn.commit()
+    conn.close()
+
+    conn = init_db(path)
+    ensure_tables(conn)
+    for col in ("categories TEXT",):
+        try:
+            conn.execute(f"ALTER TABLE products ADD COLUMN {col}")
+        except sqlite3.OperationalError:
+            pass
+    base = id_base(k)
+    with conn:
+        for t in SEQUENCED_TABLES:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (t,)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO sqlite_sequence(name, seq) VALUES (?, ?)", (t, base))
+            elif row[0] < base:
+                conn.execute("UPDATE sqlite_sequence SET seq=? WHERE name=?", (base, t))
+    return conn
+
+
+# ---------------------------------------------------------------------
+# Yazma tarafı
+# ---------------------------------------------------------------------
+class _ShardWriter(threading.Thread):
+    """Tek shard'a yazan thread; bağlantı sadece bu thread'de yaşar."""
+
+    def __init__(self, path, k):
+        super().__init__(name=f"shard-writer-{k}", daemon=True)
+        self.path = path
+        self.k = k
+        self.q = queue.Queue()
+        self.ready = threading.Event()
+
+    def run(self):
+        conn = init_shard(self.path, self.k)
+        conn.execute("PRAGMA busy_timeout=30000")
+        self.ready.set()
+        while True:
+            task = self.q.get()
+            if task is None:
+                break
+            fut, fn, args, kw = task
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(conn, *args, **kw))
+            except BaseException as e:
+                fut.set_exception(e)
+        conn.close()
+
+    def submit(self, fn, *args, **kw):
+        fut = Future()
+        self.q.put((fut, fn, args, kw))
+        return fut
+
+
+class ShardedStore:
+    """
+    store = ShardedStore("shards", n_shards=4)
+    pid = store.get_or_create_product_id(url)          # senkron, id döner
+    store.save_reviews(pid, items, page_no)            # asenkron, Future döner
+    store.write(store.shard_of_review(rid), upsert_results, rid, phash, parsed)
+    store.flush(); store.close()
+
+    Her çağrı (conn, *args) imzalı mevcut fonksiyonları (reviews_db.save_reviews,
+    absa_labelling.upsert_results ...) doğru shard'ın yazar thread'inde çalıştırır.
+    """
+
+    def __init__(self, shard_dir, n_shards=None):
+        os.makedirs(shard_dir, exist_ok=True)
+        existing = list_shards(shard_dir)
+        if n_shards is None:
+            n_shards = len(existing) or 4
+        elif existing and len(existing) != n_shards:
+            raise ValueError(f"{shard_dir}: {len(existing)} shard var, n_shards={n_shards} verildi")
+        self.shard_dir = shard_dir
+        self.n_shards = n_shards
+        self.writers = [_ShardWriter(shard_path(shard_dir, k), k) for k in range(n_shards)]
+        for w in self.writers:
+            w.start()
+        for w in self.writers:
+            w.ready.wait()
+        self._legacy_shard = {}
+
+    # ---------- yönlendirme ----------
+    def _lookup(self, table, row_id):
+        key = (table, row_id)
+        k = self._legacy_shard.get(key)
+        if k is None:
+            for k, w in enumerate(self.writers):
+                hit = w.submit(lambda c: c.execute(f"SELECT 1 FROM {table} WHERE id=?", (row_id,)).fetchone()).result()
+                if hit:
+                    break
+            else:
+                raise KeyError(f"{table}.id={row_id} hiçbir shard'da yok")
+            self._legacy_shard[key] = k
+        return k
+
+    def shard_of_product(self, product_id):
+        k = shard_of_id(product_id)
+        return k if k is not None else self._lookup("products", product_id)
+
+    def shard_of_review(self, review_id):
+        """Yeni id'ler aralıktan; taşınmış eski yorumlar için shard'lar bir kez sorgulanır."""
+        k = shard_of_id(review_id)
+        return k if k is not None else self._lookup("reviews", review_id)
+
+    # ---------- yazma ----------
+    def write(self, shard, fn, *args, **kw):
+        return self.writers[shard].submit(fn, *args, **kw)
+
+    def get_or_create_product_id(self, product_url, title=None):
+        from reviews_db import get_or_create_product_id
+        k = shard_of_url(product_url, self.n_shards)
+        return self.write(k, get_or_create_product_id, product_url, title).result()
+
+    def upsert_products(self, cards):
+        """reviews_db.upsert_products'ın shard'lı hali; {url: product_id}."""
+        from reviews_db import upsert_products
+        groups = {}
+        for c in cards:
+            if c.get("url"):
+                groups.setdefault(shard_of_url(c["url"], self.n_shards), []).append(c)
+        futs = [self.write(k, upsert_products, g) for k, g in groups.items()]
+        out = {}
+        for f in futs:
+            out.update(f.result())
+        return out
+
+    def save_reviews(self, product_id, items, page_no):
+        from reviews_db import save_reviews
+        return self.write(self.shard_of_product(product_id), save_reviews, product_id, items, page_no)
+
+    def flush(self):
+        """Kuyruktaki tüm yazımlar bitene kadar bekler."""
+        for f in [w.submit(lambda c: None) for w in self.writers]:
+            f.result()
+
+    def close(self):
+        for w in self.writers:
+            w.q.put(None)
+        for w in self.writers:
+            w.join()
+
+
+# ---------------------------------------------------------------------
+# Okuma tarafı
+# ---------------------------------------------------------------------
+def open_facade(shard_dir, tables=FACADE_TABLES):
+    """
+    Shard'ları ATTACH eden bellek içi bağlantı. Her tablo için aynı isimde
+    TEMP VIEW (UNION ALL) kurulur; view'lara ayrıca 'shard' kolonu eklenir.
+    Sadece okuma içindir.
+    """
+    paths = list_shards(shard_dir)
+    if not paths:
+        raise FileNotFoundError(f"{shard_dir}: shard yok")
+    conn = sqlite3.connect(":memory:")
+    for k, p in enumerate(paths):
+        conn.execute(f"ATTACH DATABASE ? AS s{k}", (p,))
+    codec = None
+    for t in tables:
+        present = [k for k in range(len(paths))
+                   if conn.execute(f"SELECT 1 FROM s{k}.sqlite_master WHERE type='table' AND name=?",
+                                   (t,)).fetchone()]
+        if not present:
+            continue
+        # ortak kolonlar (eski/yeni şema karışık olabilir)
+        common = None
+        for k in present:
+            cols = [r[1] for r in conn.execute(f"PRAGMA s{k}.table_info({t})")]
+            common = cols if common is None else [c for c in common if c in cols]
+        col_sql = ", ".join(common)
+        if t in COMPRESSED_COLUMNS and COMPRESSED_COLUMNS[t] + Z_SUFFIX in common:
+            # zstd ile sıkıştırılmış shard'lar (bkz. zstd_store.py)
+            if codec is None:
+                codec = register(conn, schemas=[f"s{k}" for k in range(len(paths))])
+            col_sql = decoded_select_list(common, t)
+        union = " UNION ALL ".join(f"SELECT {col_sql}, {k} AS shard FROM s{k}.{t}" for k in present)
+        conn.execute(f"CREATE TEMP VIEW {t} AS {union}")
+    return conn
+
+
+def connect(db_path):
+    """
+    db_path bir klasörse shard facade'ı, değilse sqlite3 bağlantısı
+    (zstd ile sıkıştırılmışsa çözen view'larla, bkz. zstd_store.open_db).
+    """
+    if os.path.isdir(db_path):
+        return open_facade(db_path)
+    return open_db(db_path)
+
+
+# ---------------------------------------------------------------------
+# Tek dosyadan taşıma
+# ---------------------------------------------------------------------
+def _copy_rows(src, dst, table, where, params, cols):
+    col_sql = ", ".join(cols)
+    rows = src.execute(f"SELECT {col_sql} FROM {table} WHERE {where}", params).fetchall()
+    if rows:
+        dst.executemany(f"INSERT OR IGNORE INTO {table}({col_sql}) VALUES ({','.join('?' * len(cols))})", rows)
+    return len(rows)
+
+
+def split_database(src_path, shard_dir, n_shards=4):
+    """
+    Mevcut tek dosyayı shard'lara böler. id'ler korunur; ürün ve ona ait
+    yorumlar/absa satırları shard_of_url(ürün url'si) shard'ına gider.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    src = sqlite3.connect(src_path)
+    src.execute("CREATE TEMP TABLE shard_map (product_id INTEGER PRIMARY KEY, shard INTEGER)")
+    src.executemany("INSERT INTO temp.shard_map VALUES (?, ?)",
+                    [(pid, shard_of_url(url or "", n_shards)) for pid, url in src.execute("SELECT id, url FROM products")])
+    in_shard = "product_id IN (SELECT product_id FROM temp.shard_map WHERE shard = ?)"
+    counts = {}
+    for k in range(n_shards):
+        dst = init_shard(shard_path(shard_dir, k), k)
+        with dst:
+            for table, where in (
+                ("products", "id IN (SELECT product_id FROM temp.shard_map WHERE shard = ?)"),
+                ("reviews", in_shard),
+                ("absa_raw", f"review_id IN (SELECT id FROM reviews WHERE {in_shard})"),
+                ("absa_aspects", f"review_id IN (SELECT id FROM reviews WHERE {in_shard})"),
+            ):
+                if not src.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+                    continue
+                src_cols = [r[1] for r in src.execute(f"PRAGMA table_info({table})")]
+                dst_cols = {r[1] for r in dst.execute(f"PRAGMA table_info({table})")}
+                cols = [c for c in src_cols if c in dst_cols]
+                counts[(k, table)] = _copy_rows(src, dst, table, where, (k,), cols)
+        # taşınan absa satırları için rollup'ları yeniden kur
+        from absa_rollups import rebuild_rollups
+        rebuild_rollups(dst)
+        dst.close()
+    src.close()
+    return counts
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Shard'lı SQLite depolama")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("split")
+    p.add_argument("--src", required=True)
+    p.add_argument("--dir", required=True)
+    p.add_argument("--n", type=int, default=4)
+    p = sub.add_parser("info")
+    p.add_argument("--dir", required=True)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "split":
+        for (k, table), n in sorted(split_database(args.src, args.dir, args.n).items()):
+            print(f"shard {k:02d} {table:14s} {n}")
+    else:
+        conn = open_facade(args.dir)
+        for t in FACADE_TABLES:
+            try:
+                rows = conn.execute(f"SELECT shard, COUNT(*) FROM {t} GROUP BY shard").fetchall()
+            except sqlite3.OperationalError:
+                continue
+            print(t, dict(rows))
+        conn.close()
+    print(f"({time.perf_counter() - t0:.3f}s)")
@@ -1,13 +1,24 @@
+import hashlib
+import json
+import os
 import sqlite3
+import time
+import numpy as np
 import pandas as pd
 
+from sharded_store import connect, list_shards
+from text_vectors import coverage_stats, hashed_tfidf, kcenter_select
+
 # ---------------------------------------------------------------------
 # Ayarlar
 # ---------------------------------------------------------------------
-DB_PATH = r"C:\Projects\NLP\ASBA\Scrapper\reviews_V2.db"  # kendi yoluna göre değiştir
+DB_PATH = os.getenv("ABSA_DB_PATH", r"C:\Projects\NLP\ASBA\Scrapper\reviews_V2.db")  # kendi yoluna göre değiştir
 
 
 RANDOM_STATE=40
+# "random": strata içinde rastgele; "coverage": strata içinde greedy k-center
+# (hashed TF-IDF üzerinde) → birbirine benzeyen kısa yorumlar yerine farklı içerik
+SAMPLER = os.getenv("SUBSET_SAMPLER", "random")
 # ---------------------------------------------------------------------
 # Yardımcı fonksiyonlar
 # ---------------------------------------------------------------------
@@ -45,12 +56,16 @@ def build_diverse_balanced_sample(
     cat_col="leaf_category",
     max_products_per_cat=50,
     rating_col="rating",
-    random_state=RANDOM_STATE
+    random_state=RANDOM_STATE,
+    sampler="random",
+    text_col="review_text"
 ):
     """
     1) Mümkün olduğunca farklı kategorilerden ürün seçer
     2) Bu ürünlerin yorumlarından her rating sınıfından
        yaklaşık eşit sayıda örnek alarak target_total kadar örnek üretir.
+    sampler="coverage" ise sınıf içi seçim rastgele değil, metin vektörleri
+    üzerinde greedy k-center ile yapılır (kotalar aynı kalır).
     """
 
     # 1) Ürün seçimi (kategori çeşitliliği için)
@@ -78,6 +93,10 @@ def build_diverse_balanced_sample(
     per_class_target = target_total // len(unique_ratings)
     print(f"Rating sınıfları: {unique_ratings}, her sınıf için hedef ~{per_class_target}")
 
+    if sampler == "coverage":
+        return _coverage_sample(df_pool, target_total, per_class_target, cat_col, rating_col,
+                                text_col, random_state)
+
     # Mevcut balanced_by_rating fonksiyonunu kullanıyoruz
     df_bal = balanced_by_rating(
         df_pool,
@@ -108,6 +127,57 @@ def build_diverse_balanced_sample(
     return df_final
 
 
+def _split_quota(sizes, total):
+    """total'ı grup boyutlarına orantılı (en büyük kalan yöntemiyle) böler; boyutu aşmaz."""
+    sizes = np.asarray(sizes, dtype=float)
+    if total >= sizes.sum():
+        return sizes.astype(int)
+    raw = sizes * total / sizes.sum()
+    quota = np.floor(raw).astype(int)
+    rest = total - quota.sum()
+    quota[np.argsort(-(raw - quota), kind="stable")[:rest]] += 1
+    return quota
+
+
+def _coverage_sample(df_pool, target_total, per_class_target, cat_col, rating_col, text_col, random_state):
+    """
+    Rating kotası (sınıf başına per_class_target) ve sınıf içinde kategori payı
+    (havuzdaki orana göre) korunur; her (rating, kategori) hücresinde yorumlar
+    greedy k-center ile seçilir. Eksik kalan kısım, seçilenlere en uzak
+    yorumlarla tamamlanır.
+    """
+    df_pool = df_pool.reset_index(drop=True)
+    t0 = time.perf_counter()
+    X = hashed_tfidf(df_pool[text_col].fillna("").astype(str).tolist())
+    print(f"Coverage: {len(df_pool)} yorum vektörleştirildi ({time.perf_counter() - t0:.1f}s)")
+
+    ratings = df_pool[rating_col].to_numpy()
+    cats = df_pool[cat_col].fillna("").to_numpy()
+    chosen = []
+    for r in sorted(df_pool[rating_col].dropna().unique()):
+        in_class = np.flatnonzero(ratings == r)
+        cell_cats, cell_of = np.unique(cats[in_class], return_inverse=True)
+        quota = _split_quota(np.bincount(cell_of), min(per_class_target, len(in_class)))
+        print(f"Rating {r}: {len(in_class)} satır, {quota.sum()} adet ({len(cell_cats)} kategoriye bölündü).")
+        for c, q in enumerate(quota):
+            if q:
+                rows = in_class[cell_of == c]
+                chosen.append(rows[kcenter_select(X[rows], q)])
+    chosen = np.concatenate(chosen) if chosen else np.empty(0, dtype=np.int64)
+
+    if len(chosen) < target_total:
+        remaining = target_total - len(chosen)
+        print(f"Kota sonrası {len(chosen)} satır var, {remaining} adet en uzak yorumlarla tamamlanacak.")
+        chosen = np.concatenate([chosen, kcenter_select(X, remaining, selected=chosen)])
+    elif len(chosen) > target_total:
+        chosen = np.random.default_rng(random_state).choice(chosen, size=target_total, replace=False)
+
+    print("Coverage:", coverage_stats(X, chosen, seed=random_state))
+    df_final = df_pool.iloc[chosen].sample(frac=1.0, random_state=random_state)
+    print("Son diverse + coverage sample boyutu:", len(df_final))
+    return df_final
+
+
 def prepare_for_sql(df: pd.DataFrame) -> pd.DataFrame:
     """
     SQLite'e yazmadan önce DataFrame'i temizler:
@@ -220,45 +290,116 @@ def subset_by_category(
 
 
 # ---------------------------------------------------------------------
-# Ana akış
+# Subset manifest'i (önbellek)
 # ---------------------------------------------------------------------
-def main():
-    # -------------------------------------------------------------
-    # 1) Veritabanına bağlan
-    # -------------------------------------------------------------
-    conn = sqlite3.connect(DB_PATH)
-    print("DB bağlantısı açıldı:", DB_PATH)
-
-    # -------------------------------------------------------------
-    # 2) Products tablosunu oku
-    # -------------------------------------------------------------
+# Her subset, parametrelerinin hash'i + veri watermark'ı ile kaydedilir:
+#   - anahtar ve watermark aynı           → tablo olduğu gibi kullanılır (DB okunmaz)
+#   - anahtar aynı, sadece yeni yorum var  → subset hedefin altındaysa yeni yorumlardan
+#                                            tamamlanır, doluysa sabit kalır (etiketli
+#                                            subset'ler değişmesin)
+#   - parametre ya da eski veri değiştiyse → baştan kurulur
+# Subset tabloları ve manifest `out` bağlantısına yazılır (varsayılan: okunan DB).
+# Shard klasöründe okuma bağlantısı bellek içi facade olduğu için main() bunları
+# shard 0'a ya da --out ile verilen dosyaya yazar.
+SUBSET_MANIFEST_TABLE = "subset_manifest"
+
+
+def init_subset_manifest(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUBSET_MANIFEST_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            param_key TEXT,
+            params_json TEXT,
+            max_review_id INTEGER,
+            max_collected_ts INTEGER,
+            base_rows INTEGER,        -- max_review_id'ye kadar olan yorum sayısı
+            context_sig TEXT,         -- kategori / kalite filtresi durumu
+            n_rows INTEGER,
+            built_ts INTEGER,
+            mode TEXT
+        )""")
+    conn.commit()
+
+
+def subset_param_key(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type IN ('table','view') AND name=? "
+                        "UNION ALL SELECT 1 FROM sqlite_temp_master WHERE type='view' AND name=?",
+                        (name, name)).fetchone() is not None
+
+
+def data_watermark(conn) -> dict:
+    """Subset girdisinin sürümü: yorum id/zaman sınırı + ürün kategorisi ve kalite filtresi özeti."""
+    max_id, max_ts, n = conn.execute(
+        "SELECT COALESCE(MAX(id), 0), COALESCE(MAX(collected_ts), 0), COUNT(*) FROM reviews").fetchone()
+    ctx = list(conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(length(categories)), 0) FROM products WHERE categories IS NOT NULL").fetchone())
+    if _has_table(conn, "review_quality"):
+        ctx += list(conn.execute("SELECT COUNT(*), COALESCE(MAX(computed_ts), 0) FROM review_quality "
+                                 "WHERE skip_reason IS NOT NULL").fetchone())
+    return {"max_review_id": max_id, "max_collected_ts": max_ts, "rows": n,
+            "context_sig": hashlib.sha1(json.dumps(ctx).encode("utf-8")).hexdigest()[:16]}
+
+
+def plan_subset(conn, table_name, params, wm, force=False, out=None):
+    """'reuse' | 'extend' | 'rebuild' ve (varsa) manifest satırı döndürür."""
+    out = conn if out is None else out
+    init_subset_manifest(out)
+    row = out.execute(f"SELECT param_key, max_review_id, max_collected_ts, base_rows, context_sig, n_rows "
+                      f"FROM {SUBSET_MANIFEST_TABLE} WHERE table_name=?", (table_name,)).fetchone()
+    if force or row is None or not _has_table(out, table_name) or row[0] != subset_param_key(params):
+        return "rebuild", row
+    if row[4] != wm["context_sig"]:
+        return "rebuild", row
+    if (row[1], row[2]) == (wm["max_review_id"], wm["max_collected_ts"]):
+        return "reuse", row
+    # sadece eklenmiş mi? eski sınırın altındaki yorum sayısı değişmemiş olmalı
+    old_rows = conn.execute("SELECT COUNT(*) FROM reviews WHERE id <= ?", (row[1],)).fetchone()[0]
+    if old_rows == row[3] and wm["max_review_id"] > row[1]:
+        return "extend", row
+    return "rebuild", row
+
+
+def record_subset(conn, table_name, params, wm, n_rows, mode, out=None):
+    out = conn if out is None else out
+    base_rows = conn.execute("SELECT COUNT(*) FROM reviews WHERE id <= ?", (wm["max_review_id"],)).fetchone()[0]
+    with out:
+        out.execute(f"INSERT OR REPLACE INTO {SUBSET_MANIFEST_TABLE} VALUES (?,?,?,?,?,?,?,?,?,?)",
+                     (table_name, subset_param_key(params), json.dumps(params, sort_keys=True),
+                      wm["max_review_id"], wm["max_collected_ts"], base_rows, wm["context_sig"],
+                      n_rows, int(time.time()), mode))
+
+
+def load_merged(conn, min_review_id=0, verbose=True):
+    """reviews (id > min_review_id) + products + kategori kolonları; kalite filtresi uygulanmış."""
     df_products = pd.read_sql_query("""
         SELECT id, url, title, first_seen_ts, review_count, categories
         FROM products
     """, conn)
 
-    print("Products satır sayısı:", len(df_products))
-    print("Products kolonları:", list(df_products.columns))
-
     # categories -> cat_list, main_category, leaf_category
     df_products["cat_list"] = df_products["categories"].apply(parse_categories)
     df_products["main_category"]   = df_products["cat_list"].apply(lambda x: get_or_none(x, 0))
     df_products["second_category"] = df_products["cat_list"].apply(lambda x: get_or_none(x, 1))
     df_products["leaf_category"]   = df_products["cat_list"].apply(lambda x: get_or_none(x, -1))
 
-    print("\nÖrnek product kategorileri:")
-    print(df_products[["id", "categories", "cat_list", "main_category", "leaf_category"]].head())
+    if verbose:
+        print("Products satır sayısı:", len(df_products))
+        print("Products kolonları:", list(df_products.columns))
 
-    # Kategori dağılımlarına bakmak istersen:
-    print("\nMain category dağılımı (ilk 20):")
-    print(df_products["main_category"].value_counts().head(20))
+        print("\nÖrnek product kategorileri:")
+        print(df_products[["id", "categories", "cat_list", "main_category", "leaf_category"]].head())
 
-    print("\nLeaf category dağılımı (ilk 20):")
-    print(df_products["leaf_category"].value_counts().head(20))
+        # Kategori dağılımlarına bakmak istersen:
+        print("\nMain category dağılımı (ilk 20):")
+        print(df_products["main_category"].value_counts().head(20))
+
+        print("\nLeaf category dağılımı (ilk 20):")
+        print(df_products["leaf_category"].value_counts().head(20))
 
-    # -------------------------------------------------------------
-    # 3) Reviews tablosunu oku
-    # -------------------------------------------------------------
     # Örneğe göre sütun sırası:
     # id, product_id, review_hash, review_text, rating, page_no, first_seen_ts
     df_reviews = pd.read_sql_query("""
@@ -271,17 +412,26 @@ def main():
             page_no,
             collected_ts
         FROM reviews
-    """, conn)
-
-    print("\nReviews satır sayısı:", len(df_reviews))
-    print("Reviews kolonları:", list(df_reviews.columns))
-
-    print("\nRating dağılımı:")
-    print(df_reviews["rating"].value_counts(dropna=False))
+        WHERE id > ?
+    """, conn, params=(min_review_id,))
+
+    # Kalite ön filtresi (review_quality.py) çalıştırıldıysa çöp yorumları at
+    if _has_table(conn, "review_quality"):
+        skipped = pd.read_sql_query(
+            "SELECT review_id FROM review_quality WHERE skip_reason IS NOT NULL AND review_id > ?",
+            conn, params=(min_review_id,))["review_id"]
+        before = len(df_reviews)
+        df_reviews = df_reviews[~df_reviews["id"].isin(skipped)]
+        if verbose:
+            print(f"\nKalite filtresi: {before - len(df_reviews)} yorum çıkarıldı.")
+
+    if verbose:
+        print("\nReviews satır sayısı:", len(df_reviews))
+        print("Reviews kolonları:", list(df_reviews.columns))
+
+        print("\nRating dağılımı:")
+        print(df_reviews["rating"].value_counts(dropna=False))
 
-    # -------------------------------------------------------------
-    # 4) Reviews + Products merge
-    # -------------------------------------------------------------
     df_merged = df_reviews.merge(
         df_products,
         left_on="product_id",
@@ -289,72 +439,124 @@ def main():
         suffixes=("_rev", "_prod")
     )
 
+    if verbose:
+        print("\nBirleşik (merged) satır sayısı:", len(df_merged))
+        print("Merged kolonları:", list(df_merged.columns))
 
-    print("\nBirleşik (merged) satır sayısı:", len(df_merged))
-    print("Merged kolonları:", list(df_merged.columns))
-
-    print("\nMerged örnek satırlar:")
-    print(df_merged[[
-        "product_id", "review_text", "rating",
-        "main_category", "leaf_category"
-    ]].head())
-
-    # -------------------------------------------------------------
-    # 4.5) 5000 adet: farklı kategorilerden ürün + rating balanced örnek
-    # -------------------------------------------------------------
-    sample_5k = build_diverse_balanced_sample(
-        df_merged,
-        target_total=5000,
-        cat_col="leaf_category",   # istersen "main_category" yapabilirsin
-        max_products_per_cat=50,   # her leaf_category için max 50 ürün
-        rating_col="rating",
-        random_state=RANDOM_STATE
-    )
-
-    prepare_for_sql(sample_5k).to_sql(
-        "subset_5k_diverse_products_balanced_ratings",
-        conn,
-        if_exists="replace",
-        index=False
-    )
-    print("\nsubset_5k_diverse_products_balanced_ratings tablosu oluşturuldu.")    
-
+        print("\nMerged örnek satırlar:")
+        print(df_merged[[
+            "product_id", "review_text", "rating",
+            "main_category", "leaf_category"
+        ]].head())
+    return df_merged
 
 
+def materialize_subset(conn, table_name, params, target_total, build_fn, wm, get_merged, force=False, out=None):
+    """
+    build_fn(df_merged, n) → DataFrame. Manifest'e göre tabloyu yeniden kullanır,
+    tamamlar ya da baştan kurar. get_merged(min_review_id) yeni/tam veriyi yükler.
+    conn okunur; tablo + manifest out'a yazılır (verilmezse conn).
+    """
+    out = conn if out is None else out
+    mode, row = plan_subset(conn, table_name, params, wm, force=force, out=out)
+    if mode == "reuse":
+        print(f"[subset] {table_name}: güncel ({row[5]} satır), yeniden kullanılıyor.")
+        return row[5]
+    if mode == "extend":
+        missing = target_total - row[5]
+        if missing <= 0:
+            print(f"[subset] {table_name}: dolu ({row[5]} satır); yeni yorumlar eklenmedi, watermark ilerletildi.")
+            record_subset(conn, table_name, params, wm, row[5], "kept", out=out)
+            return row[5]
+        df_new = get_merged(row[1])
+        extra = build_fn(df_new, missing) if len(df_new) else df_new
+        if len(extra):
+            prepare_for_sql(extra).to_sql(table_name, out, if_exists="append", index=False)
+        n = row[5] + len(extra)
+        print(f"[subset] {table_name}: {len(extra)} yeni satırla tamamlandı → {n}")
+        record_subset(conn, table_name, params, wm, n, "extend", out=out)
+        return n
+    df = build_fn(get_merged(0), target_total)
+    prepare_for_sql(df).to_sql(table_name, out, if_exists="replace", index=False)
+    print(f"[subset] {table_name}: baştan kuruldu ({len(df)} satır).")
+    record_subset(conn, table_name, params, wm, len(df), "rebuild", out=out)
+    return len(df)
 
 
-    print("\nBirleşik (merged) satır sayısı:", len(df_merged))
-    print("Merged kolonları:", list(df_merged.columns))
+# ---------------------------------------------------------------------
+# Ana akış
+# ---------------------------------------------------------------------
+DEBUG_SIZE = 2000
 
-    print("\nMerged örnek satırlar:")
-    print(df_merged[[
-        "product_id", "review_text", "rating",
-        "main_category", "leaf_category"
-    ]].head())
 
-    # İstersen debug için küçük bir subset:
-    DEBUG_SIZE = 2000
-    df_debug = df_merged.sample(
-        n=min(DEBUG_SIZE, len(df_merged)),
-        random_state=RANDOM_STATE
-    )
-    prepare_for_sql(df_debug).to_sql(
-        "reviews_debug_merged",
-        conn,
-        if_exists="replace",
-        index=False
-    )
-    print(f"\nDebug merged subset 'reviews_debug_merged' tablosuna yazıldı. Boyut: {len(df_debug)}")
+def main(force=False, out_path=None):
+    # -------------------------------------------------------------
+    # 1) Veritabanına bağlan
+    # -------------------------------------------------------------
+    conn = connect(DB_PATH)   # klasörse shard facade'ı (bkz. sharded_store.py)
+    print("DB bağlantısı açıldı:", DB_PATH)
+    # facade bellek içi: subset'ler shard 0'a (ya da --out dosyasına) yazılır
+    if out_path is None and os.path.isdir(DB_PATH):
+        out_path = list_shards(DB_PATH)[0]
+    out = sqlite3.connect(out_path) if out_path else conn
+    if out_path:
+        print("Subset'ler yazılıyor:", out_path)
+    wm = data_watermark(conn)
+    print("Veri watermark'ı:", wm)
+
+    # Tam veri en fazla bir kez okunur (rebuild gerektiren ilk subset'te)
+    cache = {}
+
+    def get_merged(min_review_id):
+        if min_review_id == 0:
+            if "full" not in cache:
+                cache["full"] = load_merged(conn)
+            return cache["full"]
+        return load_merged(conn, min_review_id=min_review_id, verbose=False)
 
     # -------------------------------------------------------------
+    # 2) 5000 adet: farklı kategorilerden ürün + rating balanced örnek
+    # -------------------------------------------------------------
+    params_5k = {"builder": "diverse_balanced", "target_total": 5000, "cat_col": "leaf_category",
+                 "max_products_per_cat": 50, "rating_col": "rating", "random_state": RANDOM_STATE}
+    if SAMPLER != "random":   # eski manifest anahtarları geçerli kalsın
+        params_5k["sampler"] = SAMPLER
+    materialize_subset(
+        conn, "subset_5k_diverse_products_balanced_ratings", params_5k, params_5k["target_total"],
+        lambda df, n: build_diverse_balanced_sample(
+            df,
+            target_total=n,
+            cat_col=params_5k["cat_col"],                         # istersen "main_category" yapabilirsin
+            max_products_per_cat=params_5k["max_products_per_cat"],  # her leaf_category için max 50 ürün
+            rating_col=params_5k["rating_col"],
+            random_state=RANDOM_STATE,
+            sampler=SAMPLER                                       # SUBSET_SAMPLER=coverage
+        ),
+        wm, get_merged, force=force, out=out)
 
+    # -------------------------------------------------------------
+    # 3) Debug için küçük rastgele subset
+    # -------------------------------------------------------------
+    params_debug = {"builder": "random", "size": DEBUG_SIZE, "random_state": RANDOM_STATE}
+    materialize_subset(
+        conn, "reviews_debug_merged", params_debug, DEBUG_SIZE,
+        lambda df, n: df.sample(n=min(n, len(df)), random_state=RANDOM_STATE),
+        wm, get_merged, force=force, out=out)
 
     # -------------------------------------------------------------
     # Bağlantıyı kapat
     # -------------------------------------------------------------
+    if out is not conn:
+        out.close()
     conn.close()
     print("\nDB bağlantısı kapatıldı.")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    ap = argparse.ArgumentParser(description="subset tablolarını kur / güncelle")
+    ap.add_argument("--force", action="store_true", help="manifest'e bakmadan baştan kur")
+    ap.add_argument("--out", default=None,
+                    help="subset + manifest'in yazılacağı DB (varsayılan: ABSA_DB_PATH; shard klasöründe shard 0)")
+    args = ap.parse_args()
+    main(force=args.force, out_path=args.out)
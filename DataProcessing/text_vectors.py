@@ -0,0 +1,149 @@
+# text_vectors.py
+# Yerel, bağımlılıksız metin vektörleri ve kapsama (coverage) seçimi.
+#
+#   X = hashed_tfidf(texts)                  # (N, dim) float32, L2-normalize
+#   idx = kcenter_select(X, k)               # greedy k-center: birbirine en uzak k yorum
+#
+# hashed_tfidf: kelime unigram + bigram'ları crc32 ile dim kovaya, işaretli
+# (feature hashing) düşürür; idf kova bazında hesaplanır. Vektörler blok blok
+# (block_rows satır) yoğun matrise yazılır, bellek N * dim * 4 bayttır
+# (1M yorum, dim=256 → ~1 GB).
+# kcenter_select: her adımda tek bir matris-vektör çarpımı (X @ c) ile her noktanın
+# seçilenlere en yakın mesafesi güncellenir; k adım, O(k * N * dim). Önceden
+# seçilmiş merkezlere başlangıç mesafesi blok blok hesaplanır; blok satır
+# sayısı merkez sayısına göre küçülür (blok × merkez ≤ BLOCK_ELEMS).
+import re
+import zlib
+
+import numpy as np
+
+DEFAULT_DIM = 256
+BLOCK_ROWS = 50000
+BLOCK_ELEMS = 1 << 24       # _min_dist_to ara matrisi en fazla ~64 MB float32
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TR_LOWER = str.maketrans("Iİ", "ıi")
+
+
+def _tokens(text):
+    words = _WORD_RE.findall((text or "").translate(_TR_LOWER).lower())
+    return words + [a + " " + b for a, b in zip(words, words[1:])]
+
+
+def _hash_docs(texts, dim):
+    """Her doküman için (kova, işaretli tf) dizileri; token → kova önbelleklenir."""
+    cache = {}
+    rows = []
+    for t in texts:
+        counts = {}
+        for tok in _tokens(t):
+            hs = cache.get(tok)
+            if hs is None:
+                h = zlib.crc32(tok.encode("utf-8"))
+                hs = cache[tok] = (h % dim, 1.0 if (h >> 31) & 1 else -1.0)
+            counts[hs] = counts.get(hs, 0) + 1
+        if counts:
+            keys = list(counts)
+            idx = np.fromiter((k[0] for k in keys), dtype=np.int64, count=len(keys))
+            sign = np.fromiter((k[1] for k in keys), dtype=np.float32, count=len(keys))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(keys))
+            rows.append((idx, sign * (1.0 + np.log(tf))))
+        else:
+            rows.append((np.empty(0, np.int64), np.empty(0, np.float32)))
+    return rows
+
+
+def hashed_tfidf(texts, dim=DEFAULT_DIM, block_rows=BLOCK_ROWS):
+    """texts → (N, dim) float32, satırlar L2-normalize (boş metin = sıfır vektör)."""
+    texts = list(texts)
+    n = len(texts)
+    X = np.zeros((n, dim), dtype=np.float32)
+    df = np.zeros(dim, dtype=np.float64)
+    hashed = []
+    for lo in range(0, n, block_rows):
+        block = _hash_docs(texts[lo:lo + block_rows], dim)
+        for idx, _ in block:
+            df[np.unique(idx)] += 1
+        hashed.append(block)
+    idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+
+    row = 0
+    for block in hashed:
+        m = len(block)
+        lens = np.fromiter((len(i) for i, _ in block), dtype=np.int64, count=m)
+        if lens.sum():
+            r = np.repeat(np.arange(row, row + m), lens)
+            c = np.concatenate([i for i, _ in block])
+            v = np.concatenate([w for _, w in block])
+            np.add.at(X, (r, c), v * idf[c])
+        row += m
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    np.divide(X, norms, out=X, where=norms > 0)
+    return X
+
+
+def _min_dist_to(X, S, block_elems=BLOCK_ELEMS):
+    """
+    Her satırın S'teki en yakın merkeze kosinüs mesafesi. X @ S.T blok blok
+    hesaplanır; blok satır sayısı len(S)'e göre seçildiğinden ara matris
+    merkez sayısından bağımsız olarak ~block_elems elemandır.
+    """
+    out = np.empty(X.shape[0], dtype=np.float32)
+    block_rows = max(1, min(BLOCK_ROWS, block_elems // max(1, len(S))))
+    for lo in range(0, X.shape[0], block_rows):
+        out[lo:lo + block_rows] = 1.0 - (X[lo:lo + block_rows] @ S.T).max(axis=1)
+    return out
+
+
+def kcenter_select(X, k, selected=None, exclude=None):
+    """
+    Greedy k-center (farthest-first): her adımda seçilenlere en uzak nokta
+    (1 - kosinüs) alınır. selected: daha önce seçilmiş satırlar (mesafe onlara
+    göre başlar); yoksa ortalamaya en uzak nokta ilk merkezdir.
+    exclude: seçilmemesi gereken satırların bool maskesi.
+    Sıfır vektörler (boş/tokensiz metin) en sona kalır.
+    Dönen: yeni seçilen satır indeksleri (seçim sırasıyla).
+    """
+    n = X.shape[0]
+    taken = np.zeros(n, dtype=bool) if exclude is None else exclude.copy()
+    has_sel = selected is not None and len(selected) > 0
+    if has_sel:
+        taken[selected] = True
+        mind = _min_dist_to(X, X[selected])
+    else:
+        mind = np.full(n, np.inf, dtype=np.float32)
+    mind[~X.any(axis=1)] = 0.0
+    mind[taken] = -np.inf
+    k = min(k, int(n - taken.sum()))
+    chosen = []
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if not has_sel:
+        score = np.where(np.isinf(mind) & (mind > 0), -(X @ X.mean(axis=0)), -np.inf)
+        first = int(np.argmax(score)) if np.isfinite(score.max()) else int(np.argmax(mind))
+        chosen.append(first)
+        np.minimum(mind, 1.0 - X @ X[first], out=mind)
+        mind[first] = -np.inf
+    while len(chosen) < k:
+        nxt = int(np.argmax(mind))
+        chosen.append(nxt)
+        np.minimum(mind, 1.0 - X @ X[nxt], out=mind)
+        mind[nxt] = -np.inf
+    return np.asarray(chosen, dtype=np.int64)
+
+
+def coverage_stats(X, sample_idx, probe=2000, seed=0):
+    """
+    Seçimin kapsaması: rastgele probe noktanın seçilen kümeye ortalama/95p
+    kosinüs mesafesi (küçük = daha iyi kapsama) ve seçim içi ortalama benzerlik.
+    """
+    rng = np.random.default_rng(seed)
+    S = X[sample_idx]
+    p = rng.choice(X.shape[0], size=min(probe, X.shape[0]), replace=False)
+    d = 1.0 - (X[p] @ S.T).max(axis=1)
+    q = S[rng.choice(len(S), size=min(probe, len(S)), replace=False)]
+    sims = q @ q.T
+    off = (sims.sum() - np.trace(sims)) / max(1, len(q) * (len(q) - 1))
+    return {"probe_mean_dist": round(float(d.mean()), 4),
+            "probe_p95_dist": round(float(np.percentile(d, 95)), 4),
+            "mean_pairwise_sim": round(float(off), 4)}
@@ -0,0 +1,283 @@
+# zstd_store.py
+# Opsiyonel sıkıştırılmış metin depolama: reviews.review_text ve
+# absa_raw.response_json, tablo başına eğitilmiş zstd sözlüğüyle BLOB kolona
+# (<kolon>_z) taşınır, düz metin kolonu '' yapılır.
+#
+#   zstd_dicts(dict_id PK, name, dict_data, level, created_ts)
+#     name = "reviews.review_text" gibi; yeniden eğitilirse yeni dict_id eklenir,
+#     eski satırlar çözülebilir kalır (zstd frame'i kendi dict_id'sini taşır).
+#
+# Okuma: open_db() bağlantıya zstd_decompress(blob) SQL fonksiyonunu ekler ve
+# sıkıştırılmış tablolar için aynı isimde TEMP VIEW kurar
+# (review_text = COALESCE(zstd_decompress(review_text_z), review_text)); böylece
+# subsets.py / overview_of_dataset.py / labeller sorguları değişmeden çalışır.
+# TEMP VIEW tabloyu gölgelediği için o tabloya yazan bağlantılar tables= ile
+# sadece okudukları tabloları açmalı (labeller: reviews).
+# Yeni eklenen satırlar düz metin kalır; `compress` tekrar çalıştırılınca
+# sadece henüz sıkıştırılmamış satırlar işlenir.
+# compress/decompress sadece depolama biçimini değiştirir: tablonun trigger'ları
+# (review_fts senkronu, kuyruk) aynı transaction içinde kaldırılıp geri kurulur,
+# yoksa reviews_fts_au her yorumu '' olarak yeniden indeksler. FTS indeksi
+# orijinal metnin token'larıyla kalır; reviews sıkıştırılmadan önce FTS'in
+# silme/güncelleme trigger'ları çözülmüş metni kullanacak şekilde yeniden
+# kurulur (review_fts.install_triggers), böylece sonradan silinen/güncellenen
+# sıkıştırılmış yorumlar indeksten doğru token'larla çıkar.
+#
+#   python zstd_store.py compress --db reviews_V2.db [--vacuum]
+#   python zstd_store.py decompress --db reviews_V2.db     # düz metne geri dön
+#   python zstd_store.py info --db reviews_V2.db
+#
+# zstandard paketi opsiyoneldir (pip install zstandard); sadece sıkıştırılmış
+# bir DB açılırken ya da sıkıştırırken gerekir.
+import argparse
+import os
+import sqlite3
+import time
+
+try:  # opsiyonel
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DB_PATH = os.getenv("ABSA_DB_PATH", r"C:\Projects\NLP\ASBA\Scrapper\reviews_V2.db")
+DICT_TABLE = "zstd_dicts"
+# tablo → sıkıştırılan metin kolonu
+COMPRESSED_COLUMNS = {"reviews": "review_text", "absa_raw": "response_json"}
+Z_SUFFIX = "_z"
+DICT_SIZE = 64 * 1024
+TRAIN_SAMPLES = 20000
+LEVEL = 9
+CHUNK_ROWS = 5000
+
+
+def _require():
+    if zstandard is None:
+        raise RuntimeError("zstandard kurulu değil: pip install zstandard")
+
+
+def _columns(conn, table, schema="main"):
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def is_compressed(conn, table, schema="main"):
+    col = COMPRESSED_COLUMNS.get(table)
+    return col is not None and col + Z_SUFFIX in _columns(conn, table, schema)
+
+
+def init_dict_table(conn):
+    conn.execute(f"""CREATE TABLE IF NOT EXISTS {DICT_TABLE} (
+      dict_id INTEGER PRIMARY KEY,
+      name TEXT NOT NULL,
+      dict_data BLOB NOT NULL,
+      level INTEGER NOT NULL,
+      created_ts INTEGER
+    )""")
+
+
+# ---------- codec ----------
+class Codec:
+    """Sözlükleri (dict_id → ZstdCompressionDict) tutar; (de)kompresörleri önbellekler."""
+
+    def __init__(self):
+        _require()
+        self.dicts, self.levels = {}, {}
+        self._cctx, self._dctx = {}, {}
+
+    def load(self, conn, schema="main"):
+        if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?",
+                        (DICT_TABLE,)).fetchone():
+            for dict_id, data, level in conn.execute(f"SELECT dict_id, dict_data, level FROM {schema}.{DICT_TABLE}"):
+                self.dicts[dict_id] = zstandard.ZstdCompressionDict(data)
+                self.levels[dict_id] = level
+        return self
+
+    def compress(self, text, dict_id):
+        if text is None:
+            return None
+        c = self._cctx.get(dict_id)
+        if c is None:
+            c = self._cctx[dict_id] = zstandard.ZstdCompressor(level=self.levels[dict_id],
+                                                               dict_data=self.dicts[dict_id])
+        return c.compress(text.encode("utf-8"))
+
+    def decompress(self, blob):
+        if blob is None:
+            return None
+        dict_id = zstandard.get_frame_parameters(blob).dict_id
+        d = self._dctx.get(dict_id)
+        if d is None:
+            d = self._dctx[dict_id] = zstandard.ZstdDecompressor(dict_data=self.dicts[dict_id] if dict_id else None)
+        return d.decompress(blob).decode("utf-8")
+
+
+def register(conn, schemas=("main",)):
+    """zstd_decompress(blob) SQL fonksiyonunu bağlantıya ekler. Dönen: Codec."""
+    codec = Codec()
+    for s in schemas:
+        codec.load(conn, s)
+    conn.create_function("zstd_decompress", 1, codec.decompress, deterministic=True)
+    return codec
+
+
+def decoded_select_list(cols, table):
+    """Kolon listesi → SELECT ifadesi; sıkıştırılmış kolon çözülür, _z kolonu gizlenir."""
+    col = COMPRESSED_COLUMNS.get(table)
+    out = []
+    for c in cols:
+        if c == col and col + Z_SUFFIX in cols:
+            out.append(f"COALESCE(zstd_decompress({col}{Z_SUFFIX}), {col}) AS {col}")
+        elif not (col and c == col + Z_SUFFIX):
+            out.append(c)
+    return ", ".join(out)
+
+
+def attach_decoded(conn, tables=tuple(COMPRESSED_COLUMNS)):
+    """Sıkıştırılmış tabloları aynı isimli TEMP VIEW ile gölgeler (okuma içindir)."""
+    todo = [t for t in tables if is_compressed(conn, t)]
+    if todo:
+        register(conn)
+        for t in todo:
+            conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {t} AS "
+                         f"SELECT {decoded_select_list(_columns(conn, t), t)} FROM main.{t}")
+    return conn
+
+
+def open_db(db_path, tables=tuple(COMPRESSED_COLUMNS), readonly=False):
+    """sqlite3 bağlantısı; DB sıkıştırılmışsa decompress view'ları kurulu gelir."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) if readonly else sqlite3.connect(db_path)
+    return attach_decoded(conn, tables)
+
+
+# ---------- sıkıştırma ----------
+def _update_without_triggers(conn, table, sql, params):
+    """UPDATE'i tablonun trigger'ları devre dışıyken çalıştırır (drop + geri kur, tek transaction)."""
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name=?",
+                            (table,)).fetchall()
+    with conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.executemany(sql, params)
+        for _, ddl in triggers:
+            conn.execute(ddl)
+
+
+def train_dictionary(conn, table, column, dict_size=DICT_SIZE, samples=TRAIN_SAMPLES, level=LEVEL):
+    """Tablodaki (henüz düz) metinlerden sözlük eğitir ve kaydeder. Dönen: dict_id."""
+    _require()
+    init_dict_table(conn)
+    texts = [r[0].encode("utf-8") for r in conn.execute(
+        f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL AND {column} <> '' "
+        f"ORDER BY random() LIMIT ?", (samples,))]
+    if len(texts) < 10:
+        raise ValueError(f"{table}.{column}: sözlük eğitmek için yeterli metin yok ({len(texts)})")
+    d = zstandard.train_dictionary(dict_size, texts, level=level)
+    with conn:
+        conn.execute(f"INSERT OR REPLACE INTO {DICT_TABLE} VALUES (?, ?, ?, ?, ?)",
+                     (d.dict_id(), f"{table}.{column}", d.as_bytes(), level, int(time.time())))
+    return d.dict_id()
+
+
+def latest_dict_id(conn, table, column):
+    init_dict_table(conn)
+    row = conn.execute(f"SELECT dict_id FROM {DICT_TABLE} WHERE name=? ORDER BY created_ts DESC, rowid DESC LIMIT 1",
+                       (f"{table}.{column}",)).fetchone()
+    return row[0] if row else None
+
+
+def compress_table(conn, table, column, retrain=False, chunk_rows=CHUNK_ROWS):
+    """
+    Henüz sıkıştırılmamış satırları <column>_z'ye yazar, düz metni '' yapar.
+    Dönen: {"rows", "raw_bytes", "z_bytes", "dict_id"}.
+    """
+    _require()
+    zcol = column + Z_SUFFIX
+    if zcol not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {zcol} BLOB")
+    if table == "reviews":
+        from review_fts import has_fts, install_triggers
+        if has_fts(conn):
+            with conn:
+                install_triggers(conn, compressed=True)
+    dict_id = None if retrain else latest_dict_id(conn, table, column)
+    if dict_id is None:
+        dict_id = train_dictionary(conn, table, column)
+    codec = Codec().load(conn)
+    n = raw = z = 0
+    last = 0
+    while True:
+        rows = conn.execute(f"""SELECT rowid, {column} FROM {table}
+                                WHERE rowid > ? AND {zcol} IS NULL AND {column} <> ''
+                                ORDER BY rowid LIMIT ?""", (last, chunk_rows)).fetchall()
+        if not rows:
+            break
+        upd = [(codec.compress(text, dict_id), rid) for rid, text in rows]
+        _update_without_triggers(conn, table, f"UPDATE {table} SET {zcol} = ?, {column} = '' WHERE rowid = ?", upd)
+        n += len(rows)
+        raw += sum(len(t.encode("utf-8")) for _, t in rows)
+        z += sum(len(b) for b, _ in upd)
+        last = rows[-1][0]
+    return {"rows": n, "raw_bytes": raw, "z_bytes": z, "dict_id": dict_id}
+
+
+def decompress_table(conn, table, column, chunk_rows=CHUNK_ROWS):
+    """Sıkıştırmayı geri alır: metni düz kolona döndürür, _z'yi boşaltır. Dönen: satır sayısı."""
+    zcol = column + Z_SUFFIX
+    if zcol not in _columns(conn, table):
+        return 0
+    codec = Codec().load(conn)
+    n = 0
+    while True:
+        rows = conn.execute(f"SELECT rowid, {zcol} FROM {table} WHERE {zcol} IS NOT NULL LIMIT ?",
+                            (chunk_rows,)).fetchall()
+        if not rows:
+            break
+        _update_without_triggers(conn, table, f"UPDATE {table} SET {column} = ?, {zcol} = NULL WHERE rowid = ?",
+                                 [(codec.decompress(b), rid) for rid, b in rows])
+        n += len(rows)
+    return n
+
+
+def storage_info(conn):
+    out = {}
+    for t, col in COMPRESSED_COLUMNS.items():
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (t,)).fetchone():
+            continue
+        zcol = col + Z_SUFFIX
+        has_z = is_compressed(conn, t)
+        row = conn.execute(f"""SELECT COUNT(*), SUM(length(CAST({col} AS BLOB))),
+                                      {f"SUM({zcol} IS NOT NULL), SUM(length({zcol}))" if has_z else "0, 0"}
+                               FROM {t}""").fetchone()
+        out[t] = {"rows": row[0], "plain_bytes": row[1] or 0, "compressed_rows": row[2] or 0,
+                  "compressed_bytes": row[3] or 0}
+    out["file_bytes"] = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+    return out
+
+
+if __name__ == "__main__":
+    import json
+    ap = argparse.ArgumentParser(description="zstd sözlüklü metin sıkıştırma")
+    ap.add_argument("cmd", choices=("compress", "decompress", "info"))
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--tables", default=",".join(COMPRESSED_COLUMNS))
+    ap.add_argument("--retrain", action="store_true", help="yeni sözlük eğit (eskiler saklanır)")
+    ap.add_argument("--vacuum", action="store_true", help="sonunda VACUUM (dosya küçülsün)")
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    for t in args.tables.split(","):
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (t,)).fetchone():
+            continue
+        t0 = time.perf_counter()
+        if args.cmd == "compress":
+            res = compress_table(conn, t, COMPRESSED_COLUMNS[t], retrain=args.retrain)
+            ratio = res["raw_bytes"] / res["z_bytes"] if res["z_bytes"] else 0
+            print(f"{t}: {res['rows']} satır, {res['raw_bytes']} → {res['z_bytes']} bayt "
+                  f"(x{ratio:.2f}, dict {res['dict_id']}, {time.perf_counter() - t0:.1f}s)")
+        elif args.cmd == "decompress":
+            print(f"{t}: {decompress_table(conn, t, COMPRESSED_COLUMNS[t])} satır açıldı")
+    if args.vacuum:
+        conn.execute("VACUUM")
+    print(json.dumps(storage_info(conn), indent=2))
+    conn.close()
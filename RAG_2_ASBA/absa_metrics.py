@@ -0,0 +1,164 @@
+# absa_metrics.py
+# Labelling çağrıları için token / süre / retry telemetrisi.
+#
+# Her yorum için bir satır absa_metrics tablosuna yazılır:
+#   status: ok | cache_hit | llm_error | validation_fail
+# Model tarafı batch'te latency_ms batch başına bir kez (batch_n ile) yazılır,
+# gecikme yüzdelikleri böylece çağrı başınadır; tekrar denenen yorumlar kendi
+# çağrı sürelerini batch_n=1 ile taşır.
+# Çalışma sonunda summary() p50/p95/p99 gecikme, token toplamları ve
+# en yavaş yorumları verir; batch_size / concurrency ayarı için kullanılır.
+import json
+import math
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+STATUS_OK = "ok"
+STATUS_CACHE_HIT = "cache_hit"
+STATUS_LLM_ERROR = "llm_error"
+STATUS_VALIDATION_FAIL = "validation_fail"
+
+# Sabit kovalı gecikme histogramı (ms); üst sınırlar
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, math.inf)
+
+
+def init_metrics(conn):
+    conn.execute("""CREATE TABLE IF NOT EXISTS absa_metrics (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      run_id TEXT NOT NULL,
+      review_id INTEGER,
+      backend TEXT,
+      model_name TEXT,
+      status TEXT NOT NULL,
+      prompt_tokens INTEGER,
+      output_tokens INTEGER,
+      latency_ms REAL,
+      batch_n INTEGER,
+      retries INTEGER DEFAULT 0,
+      output_chars INTEGER,
+      error TEXT,
+      created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_absa_metrics_run ON absa_metrics(run_id, status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_absa_metrics_review ON absa_metrics(review_id)")
+
+
+def percentile(sorted_vals: List[float], q: float) -> Optional[float]:
+    """Sıralı listede doğrusal interpolasyonlu yüzdelik (q: 0..100)."""
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * q / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    if lo == hi:
+        return sorted_vals[int(k)]
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def histogram(values: List[float], buckets=LATENCY_BUCKETS_MS) -> Dict[str, int]:
+    out = {(f"<={b:g}" if b != math.inf else "inf"): 0 for b in buckets}
+    keys = list(out)
+    for v in values:
+        for b, key in zip(buckets, keys):
+            if v <= b:
+                out[key] += 1
+                break
+    return out
+
+
+class MetricsRecorder:
+    """
+    Çağrı ölçümlerini bellekte toplar, flush() ile absa_metrics'e yazar.
+    record() thread-safe; flush() DB bağlantısının sahibi thread'den çağrılmalı.
+    """
+
+    def __init__(self, backend: str = "", model_name: str = "", run_id: Optional[str] = None):
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.backend = backend
+        self.model_name = model_name
+        self.started = time.perf_counter()
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def record(self, review_id, status, prompt_tokens=None, output_tokens=None,
+               latency_ms=None, batch_n=1, retries=0, output_chars=None, error=None):
+        row = (self.run_id, review_id, self.backend, self.model_name, status,
+               prompt_tokens, output_tokens, latency_ms, batch_n, retries, output_chars,
+               (str(error)[:500] if error is not None else None))
+        with self._lock:
+            self._pending.append(row)
+
+    def flush(self, conn):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            conn.executemany("""
+                INSERT INTO absa_metrics
+                  (run_id, review_id, backend, model_name, status, prompt_tokens, output_tokens,
+                   latency_ms, batch_n, retries, output_chars, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+
+    def summary(self, conn) -> dict:
+        self.flush(conn)
+        s = summarize_run(conn, self.run_id)
+        s["wall_s"] = round(time.perf_counter() - self.started, 3)
+        if s["wall_s"] > 0:
+            s["reviews_per_s"] = round(s["counts"].get(STATUS_OK, 0) / s["wall_s"], 2)
+        return s
+
+
+def summarize_run(conn, run_id: str, slowest_n: int = 10) -> dict:
+    """Bir çalışmanın özet istatistikleri (DB'den)."""
+    counts = dict(conn.execute(
+        "SELECT status, COUNT(*) FROM absa_metrics WHERE run_id=? GROUP BY status", (run_id,)
+    ).fetchall())
+    p_tok, o_tok, retries = conn.execute("""
+        SELECT COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(output_tokens), 0), COALESCE(SUM(retries), 0)
+        FROM absa_metrics WHERE run_id=?
+    """, (run_id,)).fetchone()
+    lat = [r[0] for r in conn.execute("""
+        SELECT latency_ms FROM absa_metrics
+        WHERE run_id=? AND latency_ms IS NOT NULL AND status <> ?
+        ORDER BY latency_ms
+    """, (run_id, STATUS_CACHE_HIT))]
+    out_tok = [r[0] for r in conn.execute("""
+        SELECT output_tokens FROM absa_metrics
+        WHERE run_id=? AND output_tokens IS NOT NULL ORDER BY output_tokens
+    """, (run_id,))]
+    slowest = conn.execute("""
+        SELECT review_id, latency_ms, retries, output_tokens, status
+        FROM absa_metrics WHERE run_id=? AND latency_ms IS NOT NULL
+        ORDER BY latency_ms DESC LIMIT ?
+    """, (run_id, slowest_n)).fetchall()
+    n_ok = counts.get(STATUS_OK, 0)
+    return {
+        "run_id": run_id,
+        "counts": counts,
+        "prompt_tokens": p_tok,
+        "output_tokens": o_tok,
+        "tokens_per_review": round((p_tok + o_tok) / n_ok, 1) if n_ok else None,
+        "retries": retries,
+        "latency_ms": {q: percentile(lat, q) for q in (50, 95, 99)},
+        "latency_hist_ms": histogram(lat),
+        "output_tokens_pct": {q: percentile(out_tok, q) for q in (50, 95, 99)},
+        "slowest": [dict(zip(("review_id", "latency_ms", "retries", "output_tokens", "status"), r))
+                    for r in slowest],
+    }
+
+
+def print_summary(s: dict):
+    print("\n===== ABSA run özeti =====")
+    print(json.dumps(s, ensure_ascii=False, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    import sys
+    db = sys.argv[1] if len(sys.argv) > 1 else "reviews_V2.db"
+    from absa_labelling import open_db
+    with open_db(db) as conn:
+        run_id = sys.argv[2] if len(sys.argv) > 2 else conn.execute(
+            "SELECT run_id FROM absa_metrics ORDER BY id DESC LIMIT 1").fetchone()[0]
+        print_summary(summarize_run(conn, run_id))
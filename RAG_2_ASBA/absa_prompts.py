@@ -0,0 +1,47 @@
+# absa_prompts.py
+# Prompt metinleri. Bağımlılık yok; prompt_hash için pydantic/langchain
+# yüklemeden import edilebilir.
+
+SYSTEM_MSG = (
+    "Türkçe ürün yorumlarından aspect ve duygu (sentiment) çıkaran bir yardımcı olarak çalış.\n"
+    "Çıktı kesinlikle geçerli JSON yapısında olmalı (yapısal çıktı). Açıklama ekleme."
+)
+
+USER_TEMPLATE = """Aşağıdaki ürün yorumu için aspect-based sentiment çıkar:
+- Yalnızca yoruma dayan.
+- Birden çok aspect dönebilirsin.
+- "sentiment": positive|negative|neutral|mixed.
+- "category": serbest metin (örn. donanım/ekran, performans, fiyat, kargo).
+- "opinion_terms": metinden aynen ilgili ifade(ler).
+- Mümkünse "start_idx" ve "end_idx" (Unicode index).
+- "confidence": 0..1.
+
+Yorum:
+<<<
+{review_text}
+>>>
+"""
+
+# ---------- kompakt wire şeması (absa_wire.py) ----------
+# Kategori/duygu id'leri; sıra değişirse eski kompakt cevaplar yanlış çözülür,
+# yeni kategori sadece sona eklenmeli.
+SENTIMENTS = ("positive", "negative", "neutral", "mixed")
+CATEGORIES = ("genel", "kalite", "performans", "şarj", "fiyat", "kargo", "paketleme", "tasarım",
+              "boyut", "uyumluluk", "kullanım", "dayanıklılık", "ses", "ekran", "satıcı", "diğer")
+
+COMPACT_USER_TEMPLATE = (
+    "Aşağıdaki ürün yorumu için aspect-based sentiment çıkar. Yorumdaki her kelimenin\n"
+    "önünde sıra numarası var (N:kelime).\n"
+    "- Yalnızca yoruma dayan; birden çok aspect dönebilirsin.\n"
+    "- Çıktı: x listesi; her eleman için\n"
+    "  a: aspect (kısa isim)\n"
+    "  c: kategori id → " + ", ".join(f"{i}={c}" for i, c in enumerate(CATEGORIES)) + "\n"
+    "  s: duygu id → " + ", ".join(f"{i}={s}" for i, s in enumerate(SENTIMENTS)) + "\n"
+    "  w: [ilk, son+1] görüş ifadesinin kelime numaraları (metni tekrar yazma)\n"
+    "  p: güven 0..10\n"
+    "\n"
+    "Yorum:\n"
+    "<<<\n"
+    "{review_text}\n"
+    ">>>\n"
+)
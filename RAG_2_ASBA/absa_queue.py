@@ -0,0 +1,167 @@
+# absa_queue.py
+# reviews'a eklenen her yorum bir AFTER INSERT trigger'ı ile pending_absa
+# kuyruğuna düşer; `absa_labelling.py daemon` bu kuyruğu lease'leyerek
+# tüketir. Etiketsiz yorumları bulmak için reviews üzerinde tam tarama yapılmaz.
+#
+#   pending_absa(review_id PK, enqueued_ts, lease_owner, lease_until, attempts)
+#
+# Lease: lease_batch() kuyruğun başından n kaydı tek UPDATE ... RETURNING ile
+# işaretler (lease_until = şimdi + lease_s). İşlenen kayıt ack() ile silinir;
+# hatalı kayıt release() ile geri bırakılır ve denemeye göre gecikmeli tekrar
+# görünür. Süreç çökerse lease süresi dolunca kayıt başka worker'a geçer.
+# Scraper tarafında değişiklik gerekmez: trigger DB'de olduğu için
+# reviews_db.save_reviews'in her INSERT'i kuyruğu besler.
+import time
+from typing import Iterable, List, Optional, Tuple
+
+QUEUE_TABLE = "pending_absa"
+QUEUE_TRIGGER = "trg_reviews_pending_absa"
+LEASE_S = 300.0
+MAX_ATTEMPTS = 5            # sonra kuyruktan düşer; `retry-failed` absa_metrics'ten bulur
+RETRY_BACKOFF_S = 30.0
+
+# Trigger içinden ondalıklı unix zamanı (unixepoch('subsec') 3.42+ ister)
+_NOW_SQL = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def init_queue(conn, backfill: bool = True) -> int:
+    """
+    Kuyruk tablosunu ve trigger'ı oluşturur. Tablo ilk kez oluşturuluyorsa
+    (backfill=True) hâlihazırda etiketsiz olan yorumlar bir kereliğine
+    kuyruğa alınır. Dönen: backfill edilen satır sayısı.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                          (QUEUE_TABLE,)).fetchone()
+    conn.execute(f"""CREATE TABLE IF NOT EXISTS {QUEUE_TABLE} (
+      review_id INTEGER PRIMARY KEY,
+      enqueued_ts REAL NOT NULL,
+      lease_owner TEXT,
+      lease_until REAL NOT NULL DEFAULT 0,
+      attempts INTEGER NOT NULL DEFAULT 0
+    )""")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{QUEUE_TABLE}_lease ON {QUEUE_TABLE}(lease_until)")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {QUEUE_TRIGGER}
+      AFTER INSERT ON reviews
+      WHEN NEW.review_text IS NOT NULL AND TRIM(NEW.review_text) <> ''
+      BEGIN
+        INSERT OR IGNORE INTO {QUEUE_TABLE}(review_id, enqueued_ts) VALUES (NEW.id, {_NOW_SQL});
+      END""")
+    n = 0
+    if backfill and not exists:
+        has_raw = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='absa_raw'").fetchone()
+        n = conn.execute(f"""
+            INSERT OR IGNORE INTO {QUEUE_TABLE}(review_id, enqueued_ts)
+            SELECT r.id, {_NOW_SQL} FROM reviews r
+            {"LEFT JOIN absa_raw a ON a.review_id = r.id WHERE a.review_id IS NULL AND" if has_raw else "WHERE"}
+                r.review_text IS NOT NULL AND TRIM(r.review_text) <> ''
+        """).rowcount
+    conn.commit()
+    return n
+
+
+def enqueue(conn, review_ids: Iterable[int]):
+    """Yorumları (tekrar) kuyruğa alır; varsa lease/deneme sıfırlanır. Commit çağırana aittir."""
+    now = time.time()
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {QUEUE_TABLE}(review_id, enqueued_ts) VALUES (?, ?)",
+        [(i, now) for i in review_ids])
+
+
+def lease_batch(conn, owner: str, n: int, lease_s: float = LEASE_S) -> List[Tuple[int, int]]:
+    """
+    Lease'i olmayan ya da süresi dolmuş en eski n kaydı owner adına işaretler.
+    Tek UPDATE olduğundan birden fazla worker aynı kaydı alamaz.
+    Dönen: [(review_id, attempts), ...] (review_id sırasıyla).
+    """
+    now = time.time()
+    with conn:
+        rows = conn.execute(f"""
+            UPDATE {QUEUE_TABLE}
+            SET lease_owner = ?, lease_until = ?, attempts = attempts + 1
+            WHERE review_id IN (
+                SELECT review_id FROM {QUEUE_TABLE} WHERE lease_until <= ? ORDER BY review_id LIMIT ?)
+            RETURNING review_id, attempts
+        """, (owner, now + lease_s, now, n)).fetchall()
+    return sorted(rows)
+
+
+def ack(conn, review_ids: Iterable[int]):
+    """İşi biten kayıtları kuyruktan siler."""
+    with conn:
+        conn.executemany(f"DELETE FROM {QUEUE_TABLE} WHERE review_id = ?", [(i,) for i in review_ids])
+
+
+def release(conn, leased: Iterable[Tuple[int, int]], max_attempts: int = MAX_ATTEMPTS,
+            backoff_s: float = RETRY_BACKOFF_S) -> int:
+    """
+    Başarısız kayıtların lease'ini bırakır; attempts * backoff_s sonra tekrar
+    görünürler. max_attempts'e ulaşanlar silinir. Dönen: düşürülen kayıt sayısı.
+    """
+    now = time.time()
+    drop = [(i,) for i, a in leased if a >= max_attempts]
+    with conn:
+        conn.executemany(f"UPDATE {QUEUE_TABLE} SET lease_owner = NULL, lease_until = ? WHERE review_id = ?",
+                         [(now + a * backoff_s, i) for i, a in leased if a < max_attempts])
+        conn.executemany(f"DELETE FROM {QUEUE_TABLE} WHERE review_id = ?", drop)
+    return len(drop)
+
+
+def abandon(conn, owner: str):
+    """owner'ın tuttuğu tüm lease'leri hemen bırakır (daemon kapanırken)."""
+    with conn:
+        conn.execute(f"UPDATE {QUEUE_TABLE} SET lease_owner = NULL, lease_until = 0 WHERE lease_owner = ?",
+                     (owner,))
+
+
+def next_visible_ts(conn) -> Optional[float]:
+    """Kuyrukta lease'lenebilir olacak ilk kaydın zamanı (kuyruk boşsa None)."""
+    return conn.execute(f"SELECT MIN(lease_until) FROM {QUEUE_TABLE}").fetchone()[0]
+
+
+def queue_stats(conn) -> dict:
+    now = time.time()
+    total, leased, retrying, oldest = conn.execute(f"""
+        SELECT COUNT(*), SUM(lease_owner IS NOT NULL AND lease_until > ?),
+               SUM(lease_owner IS NULL AND lease_until > ?), MIN(enqueued_ts)
+        FROM {QUEUE_TABLE}""", (now, now)).fetchone()
+    return {"depth": total, "leased": leased or 0, "retry_wait": retrying or 0,
+            "oldest_age_s": round(now - oldest, 1) if oldest else None}
+
+
+class AdaptivePoller:
+    """
+    Kuyruk boşken bekleme süresini min_s'den max_s'ye katlayarak büyütür; iş
+    gelince min_s'e döner. Beklerken PRAGMA data_version ile başka bir
+    bağlantının commit'i (örn. scraper'ın save_reviews'i) görülürse hemen uyanır.
+    """
+
+    def __init__(self, conn, min_s: float = 0.2, max_s: float = 5.0, tick_s: float = 0.05):
+        self.conn = conn
+        self.min_s, self.max_s, self.tick_s = min_s, max_s, tick_s
+        self.delay = min_s
+        self._version = self._data_version()
+
+    def _data_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def hit(self):
+        self.delay = self.min_s
+
+    def wait(self, until_ts: Optional[float] = None) -> bool:
+        """
+        En fazla self.delay (ya da until_ts'e kadar) bekler. DB değiştiyse
+        True döner. Her boş turda delay ikiye katlanır.
+        """
+        deadline = time.time() + self.delay
+        if until_ts is not None:
+            deadline = max(time.time(), min(deadline, until_ts))
+        self.delay = min(self.max_s, self.delay * 2)
+        while True:
+            v = self._data_version()
+            if v != self._version:
+                self._version = v
+                return True
+            left = deadline - time.time()
+            if left <= 0:
+                return False
+            time.sleep(min(self.tick_s, left))
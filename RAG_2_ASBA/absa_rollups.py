@@ -0,0 +1,341 @@
+# absa_rollups.py
+# absa_aspects üzerinde önceden toplanmış (materialized) özet tabloları.
+#
+#   absa_rollup        : product_id × category × sentiment → adet + confidence toplamı
+#   absa_rollup_state  : en son işlenen absa_aspects.id (watermark) + özet sürümü
+#   products.leaf_category : categories'ten türetilen, indeksli generated kolon
+#
+# Tablo artımlı güncellenir: refresh_rollups() sadece watermark'tan sonraki
+# absa_aspects satırlarını okur. label_rows() her yazdığı batch'in sonunda,
+# tek başına upsert_results() ise kendi yazımının sonunda aynı transaction
+# içinde bunu çağırır; özet commit edilen aspect tablosuyla tutarlıdır.
+# Şema (tablolar, leaf_category kolonu) sadece init_rollups/rebuild_rollups'ta
+# değişir; sorgu fonksiyonları salt okunur bağlantıyla da çalışır.
+# absa_spans'in hallucinated işaretlediği (ya da requeue ettiği) aspect'ler
+# özete girmez; daha önce eklenmişlerse retract_aspects() ile geri çıkarılır.
+# Kategori Türkçe kurallarıyla küçük harfe çevrilir (İ → i, I → ı).
+# Leaf kategori sorguları products.leaf_category indeksi üzerinden tek
+# GROUP BY ile cevaplanır; ürün listesi Python'a çekilmez. Kolon henüz
+# eklenmemişse aynı ifade indekssiz olarak sorguda hesaplanır.
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+ROLLUP_CHUNK = 50000
+RETRACT_CHUNK = 500
+# 2: Türkçe kategori katlama + hallucinated aspect'ler hariç; eski sürümdeki
+# özet ilk refresh'te baştan kurulur
+ROLLUP_VERSION = 2
+# absa_spans.SPAN_HALLUCINATED / SPAN_REQUEUED (absa_spans bu modülü import ediyor)
+EXCLUDED_SPAN_STATUS = ("hallucinated", "hallucinated_requeued")
+
+_TR_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+
+# subsets.parse_categories(...)[-1] ile aynı kural: sondaki boş parçalar atlanır,
+# son virgülden sonraki kısım kırpılır
+LEAF_CATEGORY_SQL = ("NULLIF(trim(replace(rtrim(categories, ', '), "
+                     "rtrim(rtrim(categories, ', '), replace(rtrim(categories, ', '), ',', '')), '')), '')")
+
+
+def init_rollups(conn):
+    """Özet tablolarını ve watermark satırını oluşturur (yoksa)."""
+    conn.execute("""CREATE TABLE IF NOT EXISTS absa_rollup (
+      product_id INTEGER NOT NULL,
+      category TEXT NOT NULL,
+      sentiment TEXT NOT NULL,
+      n INTEGER NOT NULL DEFAULT 0,
+      conf_sum REAL NOT NULL DEFAULT 0,
+      conf_n INTEGER NOT NULL DEFAULT 0,
+      PRIMARY KEY (product_id, category, sentiment)
+    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_absa_rollup_cat ON absa_rollup(category, sentiment)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS absa_rollup_state (
+      name TEXT PRIMARY KEY,
+      last_aspect_id INTEGER NOT NULL DEFAULT 0,
+      last_created_at TEXT,
+      version INTEGER NOT NULL DEFAULT 1
+    )""")
+    if "version" not in {r[1] for r in conn.execute("PRAGMA table_info(absa_rollup_state)")}:
+        conn.execute("ALTER TABLE absa_rollup_state ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    conn.execute("INSERT OR IGNORE INTO absa_rollup_state(name, last_aspect_id, version) "
+                 "VALUES('absa_rollup', 0, ?)", (ROLLUP_VERSION,))
+    init_leaf_column(conn)
+
+
+def init_leaf_column(conn) -> bool:
+    """
+    products.categories varsa leaf_category generated kolonunu ve indeksini
+    ekler (VIRTUAL: saklanmaz, categories değişince kendiliğinden güncel).
+    Dönen: kolon kullanılabilir mi.
+    """
+    cols = {r[1] for r in conn.execute("PRAGMA table_xinfo(products)")}
+    if "leaf_category" in cols:
+        return True
+    if "categories" not in cols:
+        return False
+    conn.execute(f"ALTER TABLE products ADD COLUMN leaf_category TEXT "
+                 f"GENERATED ALWAYS AS ({LEAF_CATEGORY_SQL}) VIRTUAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_leaf ON products(leaf_category)")
+    return True
+
+
+def _leaf_expr(conn) -> Optional[str]:
+    """products'ta leaf kategori ifadesi: indeksli kolon, yoksa categories'ten hesap, o da yoksa None."""
+    cols = {r[1] for r in conn.execute("PRAGMA table_xinfo(products)")}
+    if "leaf_category" in cols:
+        return "leaf_category"
+    return LEAF_CATEGORY_SQL if "categories" in cols else None
+
+
+def _has_state(conn) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='absa_rollup_state'").fetchone() \
+        is not None
+
+
+def _state(conn) -> Tuple[int, int]:
+    row = conn.execute("SELECT last_aspect_id, version FROM absa_rollup_state WHERE name='absa_rollup'").fetchone()
+    return (row[0], row[1]) if row else (0, ROLLUP_VERSION)
+
+
+def _reset(conn):
+    conn.execute("DELETE FROM absa_rollup")
+    conn.execute("UPDATE absa_rollup_state SET last_aspect_id=0, last_created_at=NULL, version=? "
+                 "WHERE name='absa_rollup'", (ROLLUP_VERSION,))
+
+
+def norm_category(category) -> str:
+    """Özet anahtarı: kırpılmış, Türkçe kurallarıyla küçük harf."""
+    return (category or "").strip().translate(_TR_UPPER).lower()
+
+
+def _counted_sql(conn) -> str:
+    """Aspect satırı özete girer mi (SQL ifadesi); span_status kolonu yoksa hepsi girer."""
+    if "span_status" not in {r[1] for r in conn.execute("PRAGMA table_info(absa_aspects)")}:
+        return "1"
+    return "COALESCE(a.span_status, '') NOT IN (%s)" % ",".join(f"'{s}'" for s in EXCLUDED_SPAN_STATUS)
+
+
+def _aggregate(rows) -> Dict[Tuple[int, str, str], List[float]]:
+    """[(product_id, category, sentiment, confidence)] → (ürün, kategori, duygu) → [n, conf_sum, conf_n]."""
+    agg: Dict[Tuple[int, str, str], List[float]] = defaultdict(lambda: [0, 0.0, 0])
+    for product_id, category, sentiment, confidence in rows:
+        a = agg[(product_id, norm_category(category), sentiment or "")]
+        a[0] += 1
+        if confidence is not None:
+            a[1] += float(confidence)
+            a[2] += 1
+    return agg
+
+
+def refresh_rollups(conn, commit: bool = False) -> int:
+    """
+    Watermark'tan sonra eklenen aspect satırlarını özete ekler.
+    absa_aspects.id AUTOINCREMENT olduğu için created_at'ten daha güvenli
+    bir watermark; created_at yine de bilgi amaçlı saklanır.
+    Tablolar ensure_tables/init_rollups ile kurulur; sadece hiç yoksa burada
+    bir kez oluşturulur. Dönen değer: işlenen aspect satırı sayısı.
+    """
+    if not _has_state(conn):
+        init_rollups(conn)
+    last_id, version = _state(conn)
+    if version != ROLLUP_VERSION:
+        _reset(conn)
+        last_id = 0
+    counted = _counted_sql(conn)
+    total = 0
+    while True:
+        # watermark tüm satırlarla ilerler; özete sadece sayılan satırlar girer
+        rows = conn.execute(f"""
+            SELECT a.id, r.product_id, a.category, a.sentiment, a.confidence, a.created_at, {counted}
+            FROM absa_aspects a
+            JOIN reviews r ON r.id = a.review_id
+            WHERE a.id > ?
+            ORDER BY a.id
+            LIMIT ?
+        """, (last_id, ROLLUP_CHUNK)).fetchall()
+        if not rows:
+            break
+
+        # Python tarafında grupla, her (ürün, kategori, duygu) için tek UPSERT
+        agg = _aggregate(r[1:5] for r in rows if r[6])
+
+        conn.executemany("""
+            INSERT INTO absa_rollup(product_id, category, sentiment, n, conf_sum, conf_n)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(product_id, category, sentiment) DO UPDATE SET
+              n = n + excluded.n,
+              conf_sum = conf_sum + excluded.conf_sum,
+              conf_n = conf_n + excluded.conf_n
+        """, [(k[0], k[1], k[2], v[0], v[1], v[2]) for k, v in agg.items()])
+
+        last_id = rows[-1][0]
+        conn.execute(
+            "UPDATE absa_rollup_state SET last_aspect_id=?, last_created_at=? WHERE name='absa_rollup'",
+            (last_id, rows[-1][5])
+        )
+        total += len(rows)
+        if len(rows) < ROLLUP_CHUNK:
+            break
+
+    if commit:
+        conn.commit()
+    return total
+
+
+def rebuild_rollups(conn) -> int:
+    """Özeti sıfırdan kurar (şema/normalizasyon değiştiğinde)."""
+    init_rollups(conn)
+    with conn:
+        _reset(conn)
+        return refresh_rollups(conn)
+
+
+def retract_aspects(conn, aspect_ids) -> int:
+    """
+    Özete daha önce eklenmiş aspect satırlarını geri çıkarır (span'ı hallucinated
+    çıkınca ya da yorum yeniden etiketlenmek üzere silinmeden önce).
+    Sadece watermark'a kadar olan ve hâlâ sayılan satırlar düşülür; çağıran
+    satırın durumunu bundan sonra değiştirmeli. Commit çağırana aittir.
+    Dönen: düşülen satır sayısı.
+    """
+    if not _has_state(conn):
+        return 0    # özet hiç kurulmamış: düşülecek bir şey yok
+    last_id, version = _state(conn)
+    if version != ROLLUP_VERSION:
+        return 0    # sonraki refresh zaten baştan kuracak
+    ids = sorted({i for i in aspect_ids if i <= last_id})
+    counted = _counted_sql(conn)
+    rows = []
+    for lo in range(0, len(ids), RETRACT_CHUNK):
+        chunk = ids[lo:lo + RETRACT_CHUNK]
+        rows += conn.execute(f"""
+            SELECT r.product_id, a.category, a.sentiment, a.confidence
+            FROM absa_aspects a
+            JOIN reviews r ON r.id = a.review_id
+            WHERE a.id IN ({",".join("?" * len(chunk))}) AND {counted}
+        """, chunk).fetchall()
+    agg = _aggregate(rows)
+    conn.executemany("""
+        UPDATE absa_rollup
+        SET n = n - ?, conf_sum = conf_sum - ?, conf_n = conf_n - ?
+        WHERE product_id = ? AND category = ? AND sentiment = ?
+    """, [(v[0], v[1], v[2], k[0], k[1], k[2]) for k, v in agg.items()])
+    conn.executemany("DELETE FROM absa_rollup WHERE product_id = ? AND category = ? AND sentiment = ? AND n <= 0",
+                     list(agg))
+    return len(rows)
+
+
+# ---------- sorgu API ----------
+def _share_rows(rows):
+    """[(category, sentiment, n, conf_sum, conf_n)] → {category: {...}}."""
+    out: Dict[str, dict] = {}
+    for category, sentiment, n, conf_sum, conf_n in rows:
+        c = out.setdefault(category, {"total": 0, "counts": {}, "share": {}, "avg_confidence": {}})
+        c["counts"][sentiment] = c["counts"].get(sentiment, 0) + n
+        c["total"] += n
+        c.setdefault("_conf", {}).setdefault(sentiment, [0.0, 0])
+        c["_conf"][sentiment][0] += conf_sum
+        c["_conf"][sentiment][1] += conf_n
+    for c in out.values():
+        for s, cnt in c["counts"].items():
+            c["share"][s] = cnt / c["total"] if c["total"] else 0.0
+        for s, (cs, cn) in c.pop("_conf").items():
+            c["avg_confidence"][s] = cs / cn if cn else None
+    return out
+
+
+def sentiment_share(conn, product_id: Optional[int] = None,
+                    leaf_category: Optional[str] = None,
+                    aspect_category: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Aspect kategorisi başına duygu dağılımı.
+      - product_id verilirse tek ürün
+      - leaf_category verilirse o leaf kategorideki tüm ürünler
+      - hiçbiri verilmezse tüm korpus
+    Sadece absa_rollup (ve leaf için products.leaf_category indeksi) okunur,
+    absa_aspects taranmaz.
+    """
+    where, params = [], []
+    if product_id is not None:
+        where.append("product_id = ?")
+        params.append(product_id)
+    if leaf_category is not None:
+        leaf = _leaf_expr(conn)
+        if leaf is None:
+            return {}
+        where.append(f"product_id IN (SELECT id FROM products WHERE {leaf} = ?)")
+        params.append(leaf_category)
+    if aspect_category is not None:
+        where.append("category = ?")
+        params.append(norm_category(aspect_category))
+
+    sql = "SELECT category, sentiment, SUM(n), SUM(conf_sum), SUM(conf_n) FROM absa_rollup"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " GROUP BY category, sentiment"
+    return _share_rows(conn.execute(sql, params).fetchall())
+
+
+def leaf_sentiment_share(conn, aspect_category: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+    """
+    Leaf kategori → {aspect kategorisi → duygu dağılımı}; tüm leaf'ler tek
+    GROUP BY ile (absa_rollup ⋈ products.leaf_category).
+    """
+    leaf = _leaf_expr(conn)
+    if leaf is None:
+        return {}
+    sql = f"""
+        SELECT p.leaf, r.category, r.sentiment, SUM(r.n), SUM(r.conf_sum), SUM(r.conf_n)
+        FROM absa_rollup r
+        JOIN (SELECT id, {leaf} AS leaf FROM products) p ON p.id = r.product_id
+        WHERE p.leaf IS NOT NULL
+    """
+    params = []
+    if aspect_category is not None:
+        sql += " AND r.category = ?"
+        params.append(norm_category(aspect_category))
+    sql += " GROUP BY p.leaf, r.category, r.sentiment"
+    by_leaf: Dict[str, list] = defaultdict(list)
+    for leaf, *rest in conn.execute(sql, params):
+        by_leaf[leaf].append(rest)
+    return {leaf: _share_rows(rows) for leaf, rows in by_leaf.items()}
+
+
+def product_ids_for_leaf(conn, leaf_category: str) -> List[int]:
+    """Özette kaydı olan ürünlerden leaf kategorisi eşleşenler (indeksli)."""
+    leaf = _leaf_expr(conn)
+    if leaf is None:
+        return []
+    return [r[0] for r in conn.execute(f"""
+        SELECT id FROM products
+        WHERE {leaf} = ? AND id IN (SELECT product_id FROM absa_rollup)
+    """, (leaf_category,))]
+
+
+def top_categories(conn, sentiment: str = "negative", limit: int = 20,
+                   min_total: int = 1) -> List[Tuple[str, int, int, float]]:
+    """
+    Belirli bir duygunun en yüksek paya sahip olduğu aspect kategorileri.
+    Dönen satır: (category, sentiment_n, total_n, share)
+    """
+    rows = conn.execute("""
+        SELECT category,
+               SUM(CASE WHEN sentiment = ? THEN n ELSE 0 END) AS s_n,
+               SUM(n) AS total_n
+        FROM absa_rollup
+        GROUP BY category
+        HAVING total_n >= ?
+        ORDER BY CAST(s_n AS REAL) / total_n DESC, total_n DESC
+        LIMIT ?
+    """, (sentiment, min_total, limit)).fetchall()
+    return [(c, s_n, t, s_n / t if t else 0.0) for c, s_n, t in rows]
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    db = sys.argv[1] if len(sys.argv) > 1 else "reviews_V2.db"
+    from absa_labelling import open_db
+    with open_db(db) as conn:
+        n = refresh_rollups(conn, commit=True)
+        print(f"{n} yeni aspect satırı özete eklendi.")
+        print(json.dumps(top_categories(conn), ensure_ascii=False, indent=2))
@@ -0,0 +1,28 @@
+# absa_schema.py
+# LLM çıktı şeması. Backend'ler ve labeller ortak kullanır.
+# Prompt metinleri absa_prompts.py'de (pydantic gerektirmez).
+from typing import List, Optional
+from pydantic import BaseModel, field_validator
+
+from absa_prompts import SYSTEM_MSG, USER_TEMPLATE  # geriye dönük import yolu
+
+# ---------- Pydantic output schema ----------
+class AspectItem(BaseModel):
+    aspect: str
+    category: str
+    sentiment: str  # positive|negative|neutral|mixed
+    opinion_terms: str
+    start_idx: Optional[int] = None
+    end_idx: Optional[int] = None
+    confidence: Optional[float] = None
+
+    @field_validator("sentiment")
+    @classmethod
+    def check_sentiment(cls, v):
+        allowed = {"positive", "negative", "neutral", "mixed"}
+        if v not in allowed:
+            raise ValueError(f"sentiment must be one of {allowed}")
+        return v
+
+class ABSAResponse(BaseModel):
+    aspects: List[AspectItem]
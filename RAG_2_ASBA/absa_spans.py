@@ -0,0 +1,232 @@
+# absa_spans.py
+# LLM'in döndürdüğü start_idx/end_idx ve opinion_terms değerlerini
+# review_text'e karşı doğrular, mümkünse onarır.
+#
+# Sıra: (1) verilen span aynen tutuyor mu → (2) exact substring (span'a en yakın
+# geçiş) → (3) Türkçe büyük/küçük harf katlamalı arama → (4) fuzzy hizalama.
+# Hiçbiri tutmazsa opinion_terms "hallucinated" olarak işaretlenir.
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+from absa_queue import QUEUE_TABLE, enqueue
+from absa_rollups import retract_aspects
+
+try:  # opsiyonel, varsa çok daha hızlı
+    from rapidfuzz import fuzz as _rf_fuzz
+except ImportError:
+    _rf_fuzz = None
+
+VERIFY_BATCH = 2000
+IN_CHUNK = 500              # IN (...) başına bind değişkeni (eski SQLite limiti 999)
+FUZZY_MIN_SCORE = 0.80
+
+# span_status değerleri
+SPAN_OK = "ok"
+SPAN_EXACT = "repaired_exact"
+SPAN_FOLD = "repaired_fold"
+SPAN_FUZZY = "repaired_fuzzy"
+SPAN_HALLUCINATED = "hallucinated"
+SPAN_EMPTY = "empty"
+SPAN_REQUEUED = "hallucinated_requeued"   # eski sürümler; artık requeue'da satırlar silinir
+
+_TR_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+
+
+def tr_fold(s: str) -> str:
+    """Türkçe kurallarıyla küçük harfe çevirir; uzunluğu korur (offset'ler geçerli kalsın)."""
+    t = s.translate(_TR_UPPER)
+    low = t.lower()
+    if len(low) == len(t):
+        return low
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in t)
+
+
+def _nearest(haystack: str, needle: str, hint: Optional[int]) -> int:
+    """needle'ın haystack içindeki, hint'e en yakın geçişinin başlangıcı (yoksa -1)."""
+    pos = haystack.find(needle)
+    if pos < 0 or hint is None:
+        return pos
+    best = pos
+    while pos >= 0:
+        if abs(pos - hint) < abs(best - hint):
+            best = pos
+        if pos > hint:
+            break
+        pos = haystack.find(needle, pos + 1)
+    return best
+
+
+def _fuzzy_align(term_f: str, text_f: str) -> Tuple[int, int, float]:
+    """term'e en çok benzeyen text penceresi: (start, end, score 0..1)."""
+    if _rf_fuzz is not None:
+        al = _rf_fuzz.partial_ratio_alignment(term_f, text_f)
+        if al is None:
+            return -1, -1, 0.0
+        return al.dest_start, al.dest_end, al.score / 100.0
+
+    sm = SequenceMatcher(None, term_f, text_f, autojunk=False)
+    blk = max(sm.get_matching_blocks(), key=lambda b: b.size)
+    if blk.size == 0:
+        return -1, -1, 0.0
+    start = max(0, blk.b - blk.a)
+    end = min(len(text_f), start + len(term_f))
+    score = SequenceMatcher(None, term_f, text_f[start:end], autojunk=False).ratio()
+    return start, end, score
+
+
+def _snap_to_words(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Fuzzy pencereyi kelime sınırlarına genişletir."""
+    while start > 0 and text[start - 1].isalnum():
+        start -= 1
+    while end < len(text) and text[end].isalnum():
+        end += 1
+    return start, end
+
+
+def locate_span(text: str, term: str, start_idx: Optional[int] = None,
+                end_idx: Optional[int] = None, text_folded: Optional[str] = None):
+    """
+    Tek bir opinion_terms için (status, start, end, score) döndürür.
+    text_folded verilirse tekrar hesaplanmaz (aynı yorumdaki aspect'ler için).
+    """
+    term = (term or "").strip()
+    if not term:
+        return SPAN_EMPTY, None, None, 0.0
+
+    if (start_idx is not None and end_idx is not None and 0 <= start_idx < end_idx <= len(text)
+            and text[start_idx:end_idx] == term):
+        return SPAN_OK, start_idx, end_idx, 1.0
+
+    pos = _nearest(text, term, start_idx)
+    if pos >= 0:
+        return SPAN_EXACT, pos, pos + len(term), 1.0
+
+    text_f = text_folded if text_folded is not None else tr_fold(text)
+    term_f = tr_fold(term)
+    pos = _nearest(text_f, term_f, start_idx)
+    if pos >= 0:
+        return SPAN_FOLD, pos, pos + len(term), 1.0
+
+    s, e, score = _fuzzy_align(term_f, text_f)
+    if s >= 0 and score >= FUZZY_MIN_SCORE:
+        s, e = _snap_to_words(text, s, e)
+        return SPAN_FUZZY, s, e, score
+    return SPAN_HALLUCINATED, None, None, score
+
+
+# ---------- DB ----------
+def init_span_columns(conn):
+    """absa_aspects'e doğrulama kolonlarını ekler (yoksa)."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(absa_aspects)")}
+    for col, dtype in (("span_status", "TEXT"), ("span_score", "REAL"),
+                       ("llm_start_idx", "INTEGER"), ("llm_end_idx", "INTEGER")):
+        if col not in existing:
+            conn.execute(f"ALTER TABLE absa_aspects ADD COLUMN {col} {dtype}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_absa_aspects_span ON absa_aspects(span_status)")
+
+
+def verify_batch(rows) -> List[tuple]:
+    """
+    rows: [(aspect_id, review_id, review_text, opinion_terms, start_idx, end_idx), ...]
+    review_id'ye göre sıralı gelirse aynı yorumun katlanmış hali yeniden kullanılır.
+    Dönen: UPDATE parametreleri (status, score, start, end, aspect_id).
+    """
+    out = []
+    last_review, last_folded = None, None
+    for aspect_id, review_id, text, term, s, e in rows:
+        text = text or ""
+        if review_id != last_review:
+            last_review, last_folded = review_id, None
+        if last_folded is None and term:
+            last_folded = tr_fold(text)
+        status, ns, ne, score = locate_span(text, term, s, e, last_folded)
+        out.append((status, score, ns, ne, aspect_id))
+    return out
+
+
+def verify_pending(conn, limit: Optional[int] = None) -> dict:
+    """
+    span_status'u boş olan aspect satırlarını partiler halinde doğrular.
+    LLM'in orijinal offset'leri llm_start_idx/llm_end_idx'te saklanır.
+    hallucinated çıkanlar absa_rollup özetinden aynı transaction'da düşülür.
+    """
+    init_span_columns(conn)
+    stats = {}
+    done = 0
+    while limit is None or done < limit:
+        n = VERIFY_BATCH if limit is None else min(VERIFY_BATCH, limit - done)
+        rows = conn.execute("""
+            SELECT a.id, a.review_id, r.review_text, a.opinion_terms, a.start_idx, a.end_idx
+            FROM absa_aspects a
+            JOIN reviews r ON r.id = a.review_id
+            WHERE a.span_status IS NULL
+            ORDER BY a.review_id
+            LIMIT ?
+        """, (n,)).fetchall()
+        if not rows:
+            break
+        updates = verify_batch(rows)
+        with conn:
+            retract_aspects(conn, [u[4] for u in updates if u[0] == SPAN_HALLUCINATED])
+            conn.executemany("""
+                UPDATE absa_aspects
+                SET llm_start_idx = start_idx, llm_end_idx = end_idx,
+                    span_status = ?, span_score = ?, start_idx = ?, end_idx = ?
+                WHERE id = ?
+            """, updates)
+        for u in updates:
+            stats[u[0]] = stats.get(u[0], 0) + 1
+        done += len(rows)
+    return stats
+
+
+def delete_aspects(conn, review_ids) -> int:
+    """Yorumların aspect satırlarını absa_rollup'tan düşüp siler. Commit çağırana aittir."""
+    ids = []
+    review_ids = list(review_ids)
+    for lo in range(0, len(review_ids), IN_CHUNK):
+        chunk = review_ids[lo:lo + IN_CHUNK]
+        ids += [r[0] for r in conn.execute(
+            f"SELECT id FROM absa_aspects WHERE review_id IN ({','.join('?' * len(chunk))})", chunk)]
+    if ids:
+        retract_aspects(conn, ids)
+        conn.executemany("DELETE FROM absa_aspects WHERE id = ?", [(i,) for i in ids])
+    return len(ids)
+
+
+def requeue_hallucinated(conn, min_fraction: float = 0.5) -> int:
+    """
+    Aspect'lerinin en az min_fraction kadarı hallucinated olan yorumların
+    absa_raw kaydını siler; labeller bir sonraki çalışmada onları tekrar işler
+    (pending_absa kuyruğu varsa daemon için oraya da eklenir).
+    Eski aspect satırları özetten düşülüp silinir: yeni etiketle yan yana
+    kalmazlar ve yorum yeniden etiketlenene kadar tekrar seçilmez.
+    """
+    init_span_columns(conn)
+    ids = [r[0] for r in conn.execute("""
+        SELECT review_id
+        FROM absa_aspects
+        GROUP BY review_id
+        HAVING AVG(span_status = ?) >= ?
+    """, (SPAN_HALLUCINATED, min_fraction))]
+    if ids:
+        with conn:
+            delete_aspects(conn, ids)
+            conn.executemany("DELETE FROM absa_raw WHERE review_id = ?", [(i,) for i in ids])
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                            (QUEUE_TABLE,)).fetchone():
+                enqueue(conn, ids)
+    return len(ids)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="absa_aspects span doğrulama/onarım")
+    ap.add_argument("db")
+    ap.add_argument("--requeue", action="store_true", help="hallucinated yorumları tekrar kuyruğa al")
+    args = ap.parse_args()
+    from absa_labelling import open_db   # reviews zstd ile sıkıştırılmış olabilir
+    with open_db(args.db) as conn:
+        print(verify_pending(conn))
+        if args.requeue:
+            print(f"{requeue_hallucinated(conn)} yorum tekrar etiketlenecek.")
@@ -0,0 +1,285 @@
+# absa_train_export.py
+# absa_aspects + reviews → fine-tuning için token seviyesinde BIO/duygu etiketli
+# ve span'lı JSONL. Çok süreçli, shard'lı ve kaldığı yerden devam edebilir.
+#
+#   python absa_train_export.py --db reviews_V2.db --out absa_train --workers 8
+#
+# Çıktı:
+#   <out>/train/part-00000.jsonl, <out>/dev/part-00000.jsonl, <out>/test/...
+#   <out>/manifest.json   (parametreler, chunk sınırları, biten chunk'lar ve imzaları)
+#
+# Satır başına bir yorum:
+#   {"review_id", "product_id", "rating", "text", "tokens": [...], "offsets": [[s, e], ...],
+#    "tags": ["O", "B-POS", "I-POS", ...], "spans": [{"start", "end", "text", "aspect",
+#    "category", "sentiment"}, ...]}
+#
+# Split ürün bazlıdır (aynı ürünün yorumları hep aynı split'te → sızıntı yok) ve
+# product_id + seed hash'inden hesaplanır; DB büyüse de eski atamalar değişmez.
+# Span'ler opinion_terms'in start_idx/end_idx'idir; absa_spans doğrulaması
+# hallucinated dediyse dışarıda kalır.
+#
+# Devam ederken biten chunk'lar içerik imzasıyla (chunk_signature: absa_raw /
+# absa_aspects üzerinde id aralığı başına ucuz SQL aggregate'leri) kontrol
+# edilir: sonradan etiketlenen (retry-failed, requeue, kalite filtresi
+# değişikliği), yeniden etiketlenen ya da span'i doğrulanan yorumları olan
+# chunk'lar yeniden yazılır. Chunk aralıkları bitişiktir ([önceki hi + 1, hi]),
+# böylece aralara düşen geç etiketler de bir chunk'a aittir.
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from bisect import bisect_right
+from multiprocessing import Pool
+
+from absa_labelling import open_db
+
+DB_PATH = os.getenv("ABSA_DB_PATH", "C:\\Projects\\NLP\\ASBA\\Scrapper\\reviews_V2.db")
+CHUNK_REVIEWS = 20000
+SPLITS = (("train", 0.8), ("dev", 0.1), ("test", 0.1))
+SENTIMENT_TAGS = {"positive": "POS", "negative": "NEG", "neutral": "NEU", "mixed": "MIX"}
+# absa_spans doğrulamasından geçemeyen span'ler
+BAD_SPAN_STATUS = ("hallucinated", "hallucinated_requeued", "empty")
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+# ---------- saf fonksiyonlar ----------
+def split_for_product(product_id, seed="absa-v1"):
+    """Ürün id'sinden deterministik split."""
+    h = hashlib.sha1(f"{seed}:{product_id}".encode("utf-8")).digest()
+    x = int.from_bytes(h[:8], "big") / 2.0 ** 64
+    acc = 0.0
+    for name, frac in SPLITS:
+        acc += frac
+        if x < acc:
+            return name
+    return SPLITS[-1][0]
+
+
+def tokenize(text):
+    """Kelime + noktalama token'ları ve karakter offset'leri."""
+    toks, offs = [], []
+    for m in _TOKEN_RE.finditer(text):
+        toks.append(m.group(0))
+        offs.append((m.start(), m.end()))
+    return toks, offs
+
+
+def bio_tags(offsets, spans):
+    """
+    spans: [(start, end, sentiment), ...] → token başına B-/I-<DUYGU> ya da O.
+    Çakışan span'lerde önce başlayan (eşitse uzun olan) kazanır.
+    """
+    tags = ["O"] * len(offsets)
+    ends = [te for _, te in offsets]
+    for s, e, sent in sorted(spans, key=lambda x: (x[0], -(x[1] - x[0]))):
+        label = SENTIMENT_TAGS.get((sent or "").lower(), "NEU")
+        idx = []
+        i = bisect_right(ends, s)          # s'den sonra biten ilk token
+        while i < len(offsets) and offsets[i][0] < e:
+            idx.append(i)
+            i += 1
+        if not idx or any(tags[i] != "O" for i in idx):
+            continue
+        tags[idx[0]] = "B-" + label
+        for i in idx[1:]:
+            tags[i] = "I-" + label
+    return tags
+
+
+def build_record(review_id, product_id, rating, text, aspects):
+    """aspects: [(aspect, category, sentiment, opinion_terms, start, end), ...]"""
+    toks, offs = tokenize(text)
+    spans, tag_spans = [], []
+    for aspect, category, sentiment, terms, s, e in aspects:
+        if s is None or e is None or not (0 <= s < e <= len(text)):
+            continue
+        spans.append({"start": s, "end": e, "text": text[s:e], "aspect": aspect,
+                      "category": category, "sentiment": sentiment})
+        tag_spans.append((s, e, sentiment))
+    return {"review_id": review_id, "product_id": product_id, "rating": rating, "text": text,
+            "tokens": toks, "offsets": offs, "tags": bio_tags(offs, tag_spans), "spans": spans}
+
+
+# ---------- worker ----------
+_conn = None
+_sql = None
+
+
+def _init_worker(db_path):
+    global _conn, _sql
+    _conn = open_db(db_path, readonly=True)   # reviews zstd ile sıkıştırılmış olabilir
+    has_rating = "rating" in {r[1] for r in _conn.execute("PRAGMA table_info(reviews)")}
+    has_status = "span_status" in {r[1] for r in _conn.execute("PRAGMA table_info(absa_aspects)")}
+    status_filter = ""
+    if has_status:
+        status_filter = "AND COALESCE(a.span_status, '') NOT IN (%s)" % ",".join(f"'{s}'" for s in BAD_SPAN_STATUS)
+    _sql = f"""
+        SELECT r.id, r.product_id, {"r.rating" if has_rating else "NULL"}, r.review_text,
+               a.aspect, a.category, a.sentiment, a.opinion_terms, a.start_idx, a.end_idx
+        FROM reviews r
+        JOIN absa_raw x ON x.review_id = r.id
+        LEFT JOIN absa_aspects a ON a.review_id = r.id {status_filter}
+        WHERE r.id BETWEEN ? AND ?
+        ORDER BY r.id, a.id
+    """
+
+
+def _export_chunk(job):
+    """Bir chunk'ı split başına ayrı dosyaya yazar. Dönen: (chunk_no, {split: n})."""
+    chunk_no, lo, hi, out_dir, seed = job
+    files, counts = {}, {}
+    tmp_paths = {}
+
+    def emit(rec):
+        split = split_for_product(rec["product_id"], seed)
+        f = files.get(split)
+        if f is None:
+            path = os.path.join(out_dir, split, f"part-{chunk_no:05d}.jsonl")
+            tmp_paths[split] = path
+            f = files[split] = open(path + ".tmp", "w", encoding="utf-8")
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        counts[split] = counts.get(split, 0) + 1
+
+    cur_id, head, aspects = None, None, []
+    for row in _conn.execute(_sql, (lo, hi)):
+        if row[0] != cur_id:
+            if head is not None:
+                emit(build_record(*head, aspects))
+            cur_id, head, aspects = row[0], row[:4], []
+        if row[4] is not None or row[7] is not None:
+            aspects.append(row[4:])
+    if head is not None:
+        emit(build_record(*head, aspects))
+
+    # yarım kalan chunk görünmesin: önce .tmp, bitince rename
+    for split, f in files.items():
+        f.close()
+        os.replace(tmp_paths[split] + ".tmp", tmp_paths[split])
+    # yeniden yazımda artık boş kalan split'in eski dosyası silinir
+    for split, _ in SPLITS:
+        path = os.path.join(out_dir, split, f"part-{chunk_no:05d}.jsonl")
+        if split not in files and os.path.exists(path):
+            os.remove(path)
+    return chunk_no, counts
+
+
+# ---------- manifest / planlama ----------
+def _load_manifest(path):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def _save_manifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def plan_chunks(conn, chunk_reviews, after_id=0):
+    """
+    after_id'den sonraki etiketli yorumları chunk_reviews'lik aralıklara böler.
+    Aralıklar bitişiktir: [after_id + 1, hi1], [hi1 + 1, hi2], ...
+    """
+    chunks, n, lo = [], 0, after_id + 1
+    last = None
+    for (rid,) in conn.execute("SELECT review_id FROM absa_raw WHERE review_id > ? ORDER BY review_id", (after_id,)):
+        n += 1
+        last = rid
+        if n == chunk_reviews:
+            chunks.append([lo, rid])
+            n, lo = 0, rid + 1
+    if n:
+        chunks.append([lo, last])
+    return chunks
+
+
+def chunk_signature(conn, lo, hi):
+    """
+    [lo, hi] aralığındaki etiket içeriğinin özeti. Etiket eklenince/silinince,
+    yeniden etiketlenince (absa_raw.created_at, yeni aspect id'leri) ya da span
+    doğrulaması offset/durum değiştirince değişir.
+    """
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(absa_aspects)")}
+    status = "COUNT(span_status), SUM(span_status IN (%s))" % ",".join(f"'{s}'" for s in BAD_SPAN_STATUS) \
+        if "span_status" in cols else "0, 0"
+    raw = conn.execute("SELECT COUNT(*), TOTAL(review_id), MAX(created_at) FROM absa_raw "
+                       "WHERE review_id BETWEEN ? AND ?", (lo, hi)).fetchone()
+    asp = conn.execute(f"SELECT COUNT(*), TOTAL(id), MAX(id), TOTAL(start_idx), TOTAL(end_idx), {status} "
+                       f"FROM absa_aspects WHERE review_id BETWEEN ? AND ?", (lo, hi)).fetchone()
+    return list(raw) + [v or 0 for v in asp]
+
+
+def export(db_path, out_dir, workers=None, chunk_reviews=CHUNK_REVIEWS, seed="absa-v1", restart=False):
+    """
+    Eksik chunk'ları işler. Manifest'te biten ve imzası değişmeyen chunk'lar
+    atlanır; imzası değişenler yeniden yazılır. Son chunk'tan sonra eklenen
+    etiketli yorumlar yeni chunk'lar olarak eklenir.
+    """
+    for split, _ in SPLITS:
+        os.makedirs(os.path.join(out_dir, split), exist_ok=True)
+    mpath = os.path.join(out_dir, "manifest.json")
+    manifest = None if restart else _load_manifest(mpath)
+    if manifest and (manifest["seed"] != seed or manifest["chunk_reviews"] != chunk_reviews):
+        raise SystemExit("manifest farklı seed/chunk_reviews ile oluşturulmuş; --restart kullanın")
+    if manifest is None:
+        for split, _ in SPLITS:
+            for name in os.listdir(os.path.join(out_dir, split)):
+                if name.startswith("part-"):
+                    os.remove(os.path.join(out_dir, split, name))
+        manifest = {"seed": seed, "chunk_reviews": chunk_reviews, "chunks": [], "done": {}}
+    sigs = manifest.setdefault("sigs", {})
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    # son chunk yarımsa yeniden planlanır: sadece dolu chunk'lar sabittir
+    chunks = manifest["chunks"]
+    if chunks and str(len(chunks) - 1) not in manifest["done"]:
+        chunks.pop()
+    # eski manifest'lerde aralıklar bitişik değildi: aradaki id'ler de kapsansın
+    for i in range(1, len(chunks)):
+        chunks[i][0] = chunks[i - 1][1] + 1
+    after = chunks[-1][1] if chunks else 0
+    chunks.extend(plan_chunks(conn, chunk_reviews, after_id=after))
+    # imzası değişen (ya da imzasız eski) biten chunk'lar yeniden yazılır
+    current = {str(i): chunk_signature(conn, lo, hi) for i, (lo, hi) in enumerate(chunks)}
+    stale = [k for k in manifest["done"] if sigs.get(k) != current[k]]
+    for k in stale:
+        del manifest["done"][k]
+    conn.close()
+    _save_manifest(mpath, manifest)
+
+    todo = [(i, lo, hi, out_dir, seed) for i, (lo, hi) in enumerate(chunks) if str(i) not in manifest["done"]]
+    print(f"{len(chunks)} chunk, {len(todo)} işlenecek ({len(chunks) - len(todo)} hazır, "
+          f"{len(stale)} değişmiş).")
+    t0 = time.perf_counter()
+    with Pool(processes=workers, initializer=_init_worker, initargs=(db_path,)) as pool:
+        for chunk_no, counts in pool.imap_unordered(_export_chunk, todo):
+            manifest["done"][str(chunk_no)] = counts
+            sigs[str(chunk_no)] = current[str(chunk_no)]
+            _save_manifest(mpath, manifest)
+            n = sum(counts.values())
+            print(f"  chunk {chunk_no:5d}: {n} yorum  {counts}")
+    totals = {}
+    for counts in manifest["done"].values():
+        for split, n in counts.items():
+            totals[split] = totals.get(split, 0) + n
+    print(f"Bitti: {totals} ({time.perf_counter() - t0:.1f}s) → {out_dir}")
+    return totals
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ABSA eğitim verisi (BIO + span JSONL) dışa aktarımı")
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--out", default="absa_train")
+    ap.add_argument("--workers", type=int, default=None, help="varsayılan: CPU sayısı")
+    ap.add_argument("--chunk-reviews", type=int, default=CHUNK_REVIEWS, help="shard başına yorum")
+    ap.add_argument("--seed", default="absa-v1", help="split hash tuzu")
+    ap.add_argument("--restart", action="store_true", help="manifest'i yok say, baştan yaz")
+    args = ap.parse_args()
+    export(args.db, args.out, args.workers, args.chunk_reviews, args.seed, args.restart)
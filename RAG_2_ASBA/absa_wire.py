@@ -0,0 +1,207 @@
+# absa_wire.py
+# LLM çıktısı için kompakt "wire" şeması ve ABSAResponse'a hızlı çözücü.
+#
+#   tam     : {"aspects": [{"aspect": "...", "category": "...", "sentiment": "positive",
+#              "opinion_terms": "...", "start_idx": 12, "end_idx": 30, "confidence": 0.95}]}
+#   kompakt : {"x": [{"a": "...", "c": 3, "s": 0, "w": [2, 5], "p": 9}]}
+#
+# c/s absa_prompts.CATEGORIES/SENTIMENTS'teki sıra numarasıdır; w, prompt'ta
+# numaralanan kelimelerin [ilk, son+1) aralığıdır. opinion_terms ve
+# start_idx/end_idx çözülürken yorum metninden üretilir (model metni tekrar yazmaz).
+# Karakter offset'i yerine kelime numarası: modeller karakter saymakta kelime
+# saymaktan kötüdür; tam şemada start_idx/end_idx çoğu zaman kayar ve
+# absa_spans onarır. Kendi DB'nizdeki oran `absa_labelling.py status` çıktısının
+# span_status dağılımından (ok / repaired_* / hallucinated) okunabilir.
+#
+# decode_compact: kod/offset aralıkları elle kontrol edilir, kelime offset'leri
+# sadece gereken yere kadar taranır, sonuç tek ABSAResponse.model_validate ile kurulur.
+import re
+from itertools import islice
+
+from absa_prompts import CATEGORIES, SENTIMENTS
+from absa_schema import ABSAResponse
+
+_WORD_RE = re.compile(r"\S+")
+_TRIM = ".,;:!?…\"'()[]"
+_CAT_INDEX = {c: i for i, c in enumerate(CATEGORIES)}
+_SENT_INDEX = {s: i for i, s in enumerate(SENTIMENTS)}
+OTHER = _CAT_INDEX["diğer"]
+
+# serbest metin kategori → kod (kayıtlı/tam şema cevaplarını kodlarken); ilk eşleşen kazanır
+CATEGORY_KEYWORDS = (
+    ("şarj", "şarj"), ("pil", "şarj"), ("batarya", "şarj"),
+    ("fiyat", "fiyat"), ("ücret", "fiyat"),
+    ("kargo", "kargo"), ("teslimat", "kargo"),
+    ("paket", "paketleme"), ("ambalaj", "paketleme"),
+    ("kalite", "kalite"), ("malzeme", "kalite"), ("işçilik", "kalite"),
+    ("dayanık", "dayanıklılık"), ("ömür", "dayanıklılık"), ("sağlam", "dayanıklılık"),
+    ("performans", "performans"), ("hız", "performans"), ("fonksiyon", "performans"), ("sıcaklık", "performans"),
+    ("tasarım", "tasarım"), ("görünüm", "tasarım"), ("renk", "tasarım"), ("estetik", "tasarım"),
+    ("boyut", "boyut"), ("beden", "boyut"), ("kalıp", "boyut"), ("ağırlık", "boyut"),
+    ("uyum", "uyumluluk"),
+    ("kullanım", "kullanım"), ("kolay", "kullanım"), ("kurulum", "kullanım"),
+    ("ses", "ses"), ("ekran", "ekran"), ("görüntü", "ekran"),
+    ("satıcı", "satıcı"), ("mağaza", "satıcı"),
+    ("genel", "genel"), ("ürün", "genel"), ("tavsiye", "genel"), ("memnuniyet", "genel"),
+)
+
+# Gemini/OpenAI yapısal çıktısı için JSON şeması (pydantic sınıfı yerine dict:
+# LangChain dict döndürür, doğrulama decode_compact'ta)
+COMPACT_JSON_SCHEMA = {
+    "title": "CompactABSA",
+    "description": "Kompakt ABSA çıktısı",
+    "type": "object",
+    "properties": {"x": {"type": "array", "items": {
+        "type": "object",
+        "properties": {
+            "a": {"type": "string"},
+            "c": {"type": "integer"},
+            "s": {"type": "integer"},
+            "w": {"type": "array", "items": {"type": "integer"}},
+            "p": {"type": "integer"},
+        },
+        "required": ["a", "c", "s", "w"],
+    }}},
+    "required": ["x"],
+}
+
+
+class WireDecodeError(ValueError):
+    """Kompakt cevap şemaya ya da yorum metnine uymuyor."""
+
+
+def _fold(s):
+    return s.replace("I", "ı").replace("İ", "i").lower()
+
+
+def category_code(category):
+    """Serbest metin kategoriyi koda çevirir (bilinmeyen → diğer)."""
+    c = _fold((category or "").strip())
+    if c in _CAT_INDEX:
+        return _CAT_INDEX[c]
+    for kw, cat in CATEGORY_KEYWORDS:
+        if kw in c:
+            return _CAT_INDEX[cat]
+    return OTHER
+
+
+def number_words(text):
+    """Prompt'a giden numaralı metin: '0:Çok 1:güzel 2:ürün.'"""
+    return " ".join(f"{i}:{m.group(0)}" for i, m in enumerate(_WORD_RE.finditer(text.strip())))
+
+
+def _word_spans(text):
+    return [(m.start(), m.end()) for m in _WORD_RE.finditer(text)]
+
+
+def _trim(text, s, e):
+    while s < e and text[s] in _TRIM:
+        s += 1
+    while e > s and text[e - 1] in _TRIM:
+        e -= 1
+    return s, e
+
+
+def decode_compact(obj, review_text):
+    """Kompakt dict → ABSAResponse. Hatalı alan WireDecodeError fırlatır."""
+    text = review_text.strip()
+    if not isinstance(obj, dict) or not isinstance(obj.get("x"), list):
+        raise WireDecodeError("'x' listesi yok")
+    xs = obj["x"]
+    for k, it in enumerate(xs):
+        if not isinstance(it, dict):
+            raise WireDecodeError(f"x[{k}] nesne değil")
+        a, c, s, w, p = it.get("a"), it.get("c"), it.get("s"), it.get("w"), it.get("p")
+        if not isinstance(a, str) or not a.strip():
+            raise WireDecodeError(f"x[{k}].a boş")
+        if type(c) is not int or not 0 <= c < len(CATEGORIES):
+            raise WireDecodeError(f"x[{k}].c geçersiz: {c!r}")
+        if type(s) is not int or not 0 <= s < len(SENTIMENTS):
+            raise WireDecodeError(f"x[{k}].s geçersiz: {s!r}")
+        if not isinstance(w, list) or len(w) != 2 or type(w[0]) is not int or type(w[1]) is not int \
+                or not 0 <= w[0] < w[1]:
+            raise WireDecodeError(f"x[{k}].w geçersiz: {w!r}")
+        if p is not None and (type(p) is not int or not 0 <= p <= 10):
+            raise WireDecodeError(f"x[{k}].p geçersiz: {p!r}")
+    # kelime offset'leri sadece gereken en büyük numaraya kadar taranır
+    need = max((it["w"][1] for it in xs), default=0)
+    words = [m.span() for m in islice(_WORD_RE.finditer(text), need)]
+    if need > len(words):
+        raise WireDecodeError(f"w kelime sayısını aşıyor: {need} > {len(words)}")
+    items = []
+    for it in xs:
+        w, p = it["w"], it.get("p")
+        start, end = _trim(text, words[w[0]][0], words[w[1] - 1][1])
+        items.append({"aspect": it["a"].strip(), "category": CATEGORIES[it["c"]],
+                      "sentiment": SENTIMENTS[it["s"]], "opinion_terms": text[start:end],
+                      "start_idx": start, "end_idx": end, "confidence": None if p is None else p / 10})
+    # tek model_validate çağrısı (pydantic-core); AspectItem başına model_construct'tan hızlı
+    return ABSAResponse.model_validate({"aspects": items})
+
+
+def _locate(text, item):
+    """Tam şema aspect'inin metindeki karakter aralığı (önce start_idx, sonra opinion_terms)."""
+    s, e = item.start_idx, item.end_idx
+    terms = (item.opinion_terms or "").strip()
+    if s is not None and e is not None and 0 <= s < e <= len(text) and (not terms or text[s:e] == terms):
+        return s, e
+    if terms:
+        i = text.find(terms)
+        if i < 0:
+            i = _fold(text).find(_fold(terms))
+        if i >= 0:
+            return i, i + len(terms)
+    return None
+
+
+def encode_compact(resp, review_text):
+    """
+    Tam şema ABSAResponse → kompakt dict (stub ve kayıtlı cevaplarla A/B için).
+    Metinde bulunamayan opinion_terms'li aspect'ler atlanır.
+    """
+    text = review_text.strip()
+    words = _word_spans(text)
+    out = []
+    for it in resp.aspects:
+        span = _locate(text, it)
+        if span is None or not words:
+            continue
+        wi = [i for i, (ws, we) in enumerate(words) if ws < span[1] and we > span[0]]
+        if not wi:
+            continue
+        d = {"a": it.aspect, "c": category_code(it.category), "s": _SENT_INDEX.get(it.sentiment, 2),
+             "w": [wi[0], wi[-1] + 1]}
+        if it.confidence is not None:
+            d["p"] = int(round(float(it.confidence) * 10))
+        out.append(d)
+    return {"x": out}
+
+
+def agreement(ref, other):
+    """
+    İki cevabın uyumu; aspect'ler (küçük harf) adıyla eşlenir.
+    Dönen: {"ref", "other", "matched", "sentiment", "category", "span"} sayıları
+    (category: kod bazında, span: kırpılmış opinion_terms eşitliği).
+    """
+    def key(it):
+        return _fold(it.aspect.strip())
+
+    def terms(it):
+        t = (it.opinion_terms or "").strip()
+        s, e = _trim(t, 0, len(t))
+        return _fold(t[s:e])
+
+    o = {}
+    for it in other.aspects:
+        o.setdefault(key(it), it)
+    out = {"ref": len(ref.aspects), "other": len(other.aspects), "matched": 0,
+           "sentiment": 0, "category": 0, "span": 0}
+    for it in ref.aspects:
+        m = o.get(key(it))
+        if m is None:
+            continue
+        out["matched"] += 1
+        out["sentiment"] += it.sentiment == m.sentiment
+        out["category"] += category_code(it.category) == category_code(m.category)
+        out["span"] += terms(it) == terms(m)
+    return out
@@ -0,0 +1,352 @@
+# llm_backends.py
+# Labeller'ın konuştuğu LLM arka uçları.
+#
+#   gemini  : ChatGoogleGenerativeAI (GOOGLE_API_KEY ortamdan okunur)
+#   openai  : OpenAI uyumlu yerel sunucu (vLLM, llama.cpp server, Ollama ...)
+#   stub    : ağ gerektirmeyen deterministik sahte model (gecikme + hata enjeksiyonu)
+#
+# wire="full" (varsayılan) modelden ABSAResponse JSON'u ister; wire="compact"
+# (ABSA_WIRE=compact) kısa anahtarlı, kod'lu ve kelime offset'li şemayı
+# (absa_wire.py) ister ve cevabı yine ABSAResponse'a çözer.
+#
+# Her backend max_concurrency ve batch_size bildirir; runner bunlara göre
+# paralel/toplu çağrı yapar. Aynı anda açık istek sayısı max_concurrency'yi
+# geçmez: runner batch_workers() kadar batch'i paralel gönderir, LangChain
+# backend'leri her batch'in içini max_concurrency // batch_workers() ile sınırlar. *_raw metodları cevabın yanında token kullanımını
+# da döndürür (absa_metrics için). LangChain importları ilk kullanımda yapılır.
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Tuple, Union
+
+from absa_prompts import COMPACT_USER_TEMPLATE
+from absa_schema import ABSAResponse, AspectItem, SYSTEM_MSG, USER_TEMPLATE
+from absa_wire import COMPACT_JSON_SCHEMA, WireDecodeError, decode_compact, encode_compact, number_words
+
+WIRES = ("full", "compact")
+
+# usage: {"prompt_tokens": int|None, "output_tokens": int|None, "output_chars": int|None}
+RawResult = Tuple[ABSAResponse, dict]
+BatchResult = List[Union[ABSAResponse, Exception]]
+RawBatchResult = List[Union[RawResult, Exception]]
+
+
+class OutputParseError(ValueError):
+    """Model cevap verdi ama yapısal çıktı şemaya uymadı."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Token sayısı bilinmeyen backend'ler için kaba tahmin (~4 karakter/token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class LLMBackend:
+    """Ortak arayüz. Alt sınıflar en az invoke_raw() yazar."""
+    name = "base"
+    model_name = "base"
+    max_concurrency = 1
+    batch_size = 1
+    wire = "full"
+
+    def prompt_input(self, review_text: str) -> str:
+        """USER template'ine giden yorum metni (compact: numaralı kelimeler)."""
+        text = review_text.strip()
+        return number_words(text) if self.wire == "compact" else text
+
+    def user_prompt(self, review_text: str) -> str:
+        """Doldurulmuş user mesajı (labeller prompt_hash'i bununla hesaplar)."""
+        template = COMPACT_USER_TEMPLATE if self.wire == "compact" else USER_TEMPLATE
+        return template.format(review_text=self.prompt_input(review_text))
+
+    def invoke_raw(self, review_text: str) -> RawResult:
+        raise NotImplementedError
+
+    def batch_workers(self) -> int:
+        """Runner'ın paralel göndereceği batch sayısı; batch_raw içi sıralı olduğundan max_concurrency."""
+        return max(1, self.max_concurrency)
+
+    def batch_raw(self, texts: List[str]) -> RawBatchResult:
+        """Varsayılan: sırayla invoke_raw. Hatalar exception olarak listeye konur."""
+        out: RawBatchResult = []
+        for t in texts:
+            try:
+                out.append(self.invoke_raw(t))
+            except Exception as e:
+                out.append(e)
+        return out
+
+    def invoke(self, review_text: str) -> ABSAResponse:
+        return self.invoke_raw(review_text)[0]
+
+    def batch(self, texts: List[str]) -> BatchResult:
+        return [r if isinstance(r, Exception) else r[0] for r in self.batch_raw(texts)]
+
+
+class _LangChainBackend(LLMBackend):
+    """prompt | llm.with_structured_output zincirini tembel kuran ortak sınıf."""
+    temperature = 0.2
+
+    def __init__(self):
+        self._chain = None
+        self._lock = threading.Lock()
+
+    def _build_llm(self):
+        raise NotImplementedError
+
+    @property
+    def chain(self):
+        if self._chain is None:
+            with self._lock:
+                if self._chain is None:
+                    from langchain_core.prompts import ChatPromptTemplate
+                    compact = self.wire == "compact"
+                    prompt = ChatPromptTemplate.from_messages([
+                        ("system", SYSTEM_MSG),
+                        ("user", COMPACT_USER_TEMPLATE if compact else USER_TEMPLATE),
+                    ])
+                    # include_raw: token sayıları AIMessage.usage_metadata'dan okunur
+                    # compact: dict şema → LangChain dict döndürür, pydantic'i decode_compact atlar
+                    self._chain = prompt | self._build_llm().with_structured_output(
+                        COMPACT_JSON_SCHEMA if compact else ABSAResponse, include_raw=True)
+        return self._chain
+
+    def _unpack(self, res, review_text: str) -> RawResult:
+        if res.get("parsing_error") is not None or res.get("parsed") is None:
+            raise OutputParseError(str(res.get("parsing_error") or "boş yapısal çıktı"))
+        parsed = res["parsed"]
+        if self.wire == "compact":
+            try:
+                parsed = decode_compact(parsed, review_text)
+            except WireDecodeError as e:
+                raise OutputParseError(str(e))
+        raw = res.get("raw")
+        meta = getattr(raw, "usage_metadata", None) or {}
+        content = getattr(raw, "content", None)
+        tool_calls = getattr(raw, "tool_calls", None)
+        out_chars = len(content) if isinstance(content, str) and content else (
+            len(json.dumps(tool_calls, ensure_ascii=False, default=str)) if tool_calls else None)
+        usage = {
+            "prompt_tokens": meta.get("input_tokens"),
+            "output_tokens": meta.get("output_tokens"),
+            "output_chars": out_chars,
+        }
+        return parsed, usage
+
+    def batch_workers(self) -> int:
+        # batch'in içi de paralel: dış × iç çarpımı max_concurrency'yi aşmasın
+        return max(1, self.max_concurrency // max(1, self.batch_size))
+
+    def invoke_raw(self, review_text: str) -> RawResult:
+        return self._unpack(self.chain.invoke({"review_text": self.prompt_input(review_text)}), review_text)
+
+    def batch_raw(self, texts: List[str]) -> RawBatchResult:
+        results = self.chain.batch(
+            [{"review_text": self.prompt_input(t)} for t in texts],
+            config={"max_concurrency": max(1, self.max_concurrency // self.batch_workers())},
+            return_exceptions=True,
+        )
+        out: RawBatchResult = []
+        for text, res in zip(texts, results):
+            if isinstance(res, Exception):
+                out.append(res)
+                continue
+            try:
+                out.append(self._unpack(res, text))
+            except Exception as e:
+                out.append(e)
+        return out
+
+
+class GeminiBackend(_LangChainBackend):
+    name = "gemini"
+
+    def __init__(self, model_name: Optional[str] = None, max_concurrency: int = 4, batch_size: int = 8):
+        super().__init__()
+        self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+
+    def _build_llm(self):
+        if not os.environ.get("GOOGLE_API_KEY"):
+            raise RuntimeError("GOOGLE_API_KEY tanımlı değil (.env veya ortam değişkeni).")
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=self.model_name, temperature=self.temperature)
+
+
+class OpenAICompatBackend(_LangChainBackend):
+    """OpenAI Chat Completions API'si sunan herhangi bir sunucu."""
+    name = "openai"
+
+    def __init__(self, base_url: Optional[str] = None, model_name: Optional[str] = None,
+                 api_key: Optional[str] = None, max_concurrency: int = 16, batch_size: int = 32):
+        super().__init__()
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL", "http://127.0.0.1:8000/v1")
+        self.model_name = model_name or os.getenv("OPENAI_MODEL", "local-model")
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY", "EMPTY")
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+
+    def _build_llm(self):
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(base_url=self.base_url, model=self.model_name,
+                          api_key=self.api_key, temperature=self.temperature)
+
+
+# ---------- stub ----------
+class StubBackendError(RuntimeError):
+    pass
+
+
+# (anahtar kelime, kategori) – stub bu kelimeleri yorumda arar
+STUB_LEXICON = [
+    ("kargo", "kargo"), ("paket", "kargo"), ("teslimat", "kargo"),
+    ("fiyat", "fiyat"), ("ucuz", "fiyat"), ("pahalı", "fiyat"),
+    ("kalite", "kalite"), ("malzeme", "kalite"),
+    ("şarj", "performans"), ("pil", "performans"), ("hız", "performans"),
+    ("ekran", "donanım/ekran"), ("ses", "donanım/ses"),
+    ("beden", "boyut"), ("boyut", "boyut"), ("renk", "görünüm"),
+    ("satıcı", "satıcı"), ("ürün", "genel"),
+]
+STUB_POSITIVE = ("güzel", "iyi", "harika", "memnun", "süper", "mükemmel", "hızlı", "tavsiye")
+STUB_NEGATIVE = ("kötü", "bozuk", "berbat", "geç", "iade", "kırık", "yavaş", "pişman")
+
+_CLAUSE_RE = re.compile(r"[^.!?,;\n]+")
+
+
+class StubBackend(LLMBackend):
+    """
+    Ağsız, deterministik sahte model. Aynı yorum için hep aynı cevabı üretir.
+      latency        : çağrı başına bekleme (sn)
+      batch_latency  : batch() çağrısı başına tek bekleme (model-side batching simülasyonu)
+      error_rate     : 0..1, bu olasılıkla StubBackendError fırlatır. Karar (seed, yorum,
+                       o yorumun kaçıncı çağrısı) hash'inden gelir; thread sırasından
+                       bağımsız tekrarlanabilir, tekrar denemeler farklı sonuç alabilir
+      token_latency  : çıktı token'ı başına ek bekleme (sn); gerçek modellerde süreyi
+                       çıktı uzunluğu belirler, wire A/B'si bununla ölçülür
+      wire           : "compact" ise cevap kompakt JSON'a kodlanıp decode_compact ile çözülür
+    """
+    name = "stub"
+    model_name = "stub"
+
+    def __init__(self, latency: float = 0.0, batch_latency: Optional[float] = None,
+                 error_rate: float = 0.0, seed: int = 0,
+                 max_concurrency: int = 8, batch_size: int = 16,
+                 token_latency: float = 0.0, wire: str = "full"):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.wire = wire
+        self.batch_latency = latency if batch_latency is None else batch_latency
+        self.error_rate = error_rate
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.seed = seed
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _maybe_fail(self, review_text: str):
+        if self.error_rate <= 0:
+            return
+        with self._lock:
+            n = self._calls.get(review_text, 0)
+            self._calls[review_text] = n + 1
+        h = hashlib.md5(f"{self.seed}\0{n}\0{review_text}".encode("utf-8")).hexdigest()
+        if int(h[:8], 16) / 0x100000000 < self.error_rate:
+            raise StubBackendError("stub: enjekte edilmiş hata")
+
+    def respond(self, review_text: str) -> ABSAResponse:
+        """Gecikme/hata olmadan deterministik cevap."""
+        text = review_text.strip()
+        low = text.lower()
+        aspects, seen = [], set()
+        for m in _CLAUSE_RE.finditer(text):
+            clause = m.group(0).strip()
+            if not clause:
+                continue
+            c_low = clause.lower()
+            for kw, cat in STUB_LEXICON:
+                if kw in c_low and cat not in seen:
+                    seen.add(cat)
+                    pos = sum(w in c_low for w in STUB_POSITIVE)
+                    neg = sum(w in c_low for w in STUB_NEGATIVE)
+                    if pos and neg:
+                        sent = "mixed"
+                    elif pos:
+                        sent = "positive"
+                    elif neg:
+                        sent = "negative"
+                    else:
+                        sent = "neutral"
+                    start = text.find(clause, m.start())
+                    # yorum bazlı sabit confidence
+                    h = int(hashlib.md5((kw + low).encode("utf-8")).hexdigest()[:4], 16)
+                    aspects.append(AspectItem(
+                        aspect=kw, category=cat, sentiment=sent, opinion_terms=clause,
+                        start_idx=start, end_idx=start + len(clause),
+                        confidence=round(0.5 + (h % 50) / 100, 2),
+                    ))
+                    break
+        return ABSAResponse(aspects=aspects)
+
+    def _respond_raw(self, review_text: str) -> RawResult:
+        parsed = self.respond(review_text)
+        if self.wire == "compact":
+            out_json = json.dumps(encode_compact(parsed, review_text), ensure_ascii=False, separators=(",", ":"))
+            parsed = decode_compact(json.loads(out_json), review_text)
+        else:
+            out_json = json.dumps(parsed.model_dump(), ensure_ascii=False)
+            parsed = ABSAResponse.model_validate_json(out_json)
+        prompt = SYSTEM_MSG + self.user_prompt(review_text)
+        return parsed, {
+            "prompt_tokens": estimate_tokens(prompt),
+            "output_tokens": estimate_tokens(out_json),
+            "output_chars": len(out_json),
+        }
+
+    def invoke_raw(self, review_text: str) -> RawResult:
+        self._maybe_fail(review_text)
+        res = self._respond_raw(review_text)
+        wait = self.latency + self.token_latency * res[1]["output_tokens"]
+        if wait:
+            time.sleep(wait)
+        return res
+
+    def batch_raw(self, texts: List[str]) -> RawBatchResult:
+        out: RawBatchResult = []
+        for t in texts:
+            try:
+                self._maybe_fail(t)
+                out.append(self._respond_raw(t))
+            except Exception as e:
+                out.append(e)
+        # batch paralel decode edilir: en uzun cevap kadar beklenir
+        longest = max((r[1]["output_tokens"] for r in out if not isinstance(r, Exception)), default=0)
+        wait = self.batch_latency + self.token_latency * longest
+        if wait:
+            time.sleep(wait)
+        return out
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "openai": OpenAICompatBackend,
+    "stub": StubBackend,
+}
+
+
+def get_backend(name: Optional[str] = None, wire: Optional[str] = None, **kwargs) -> LLMBackend:
+    """
+    İsimle backend üretir; isim verilmezse ABSA_BACKEND (varsayılan gemini),
+    wire verilmezse ABSA_WIRE (varsayılan full).
+    """
+    name = (name or os.getenv("ABSA_BACKEND", "gemini")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Bilinmeyen backend: {name} (seçenekler: {sorted(BACKENDS)})")
+    wire = (wire or os.getenv("ABSA_WIRE", "full")).lower()
+    if wire not in WIRES:
+        raise ValueError(f"Bilinmeyen wire şeması: {wire} (seçenekler: {WIRES})")
+    be = BACKENDS[name](**kwargs)
+    be.wire = wire
+    return be
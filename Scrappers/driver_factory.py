@@ -0,0 +1,256 @@
+# driver_factory.py
+# Uzun süren taramalar için tarayıcı yönetimi.
+#
+#   - gerçek headless mod (--headless=new)
+#   - CDP Network.setBlockedURLs ile görsel/medya/font ve reklam/tracker engelleme
+#   - N sayfada bir ya da tarayıcı RSS'i eşiği geçince driver'ı yeniden başlatma
+#   - "invalid session / chrome not reachable" gibi çökmelerde şeffaf yeniden başlatma
+#
+# ManagedDriver bilinmeyen attribute'ları gerçek WebDriver'a devreder; mevcut
+# fonksiyonlara (WebDriverWait dahil) driver yerine doğrudan verilebilir.
+# Yeniden başlatma sadece get() sınırında olur, elimizdeki element referansları
+# zaten o noktada geçersizleşmiş olur.
+#
+# DriverPool: aynı ürünün yorum sayfalarını paralel çekmek için N tarayıcı.
+# WebDriver thread-safe olmadığından her çağrı havuzdan bir driver'ı ödünç alır.
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:  # tarayıcı açmak için gerekli; ManagedDriver/DriverPool mantığı onsuz da import edilebilir
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+except ImportError:
+    webdriver = None
+
+    class WebDriverException(Exception):
+        """selenium yokken yer tutucu."""
+
+try:  # opsiyonel: tarayıcı RSS ölçümü için
+    import psutil
+except ImportError:
+    psutil = None
+
+# Sayfada okumadığımız ama MB'larca indirilen kaynaklar
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*doubleclick.net*", "*googlesyndication.com*", "*google-analytics.com*",
+    "*googletagmanager.com*", "*adservice*", "*facebook.net*", "*criteo.*",
+    "*hotjar.com*", "*clarity.ms*", "*tiktok.com*", "*yandex.ru/metrika*",
+]
+
+# Çökme sayılacak hata mesajı parçaları
+_CRASH_MARKERS = ("invalid session id", "chrome not reachable", "session deleted",
+                  "disconnected", "no such window", "target window already closed",
+                  "tab crashed", "unable to receive message from renderer")
+
+
+def build_options(browser="edge", headless=True, block_resources=True, window_size="1366,900"):
+    if webdriver is None:
+        raise RuntimeError("selenium kurulu değil: pip install selenium")
+    opts = webdriver.EdgeOptions() if browser == "edge" else webdriver.ChromeOptions()
+    if headless:
+        opts.add_argument("--headless=new")
+    opts.add_argument(f"--window-size={window_size}")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--disable-extensions")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--no-first-run")
+    opts.add_argument("--mute-audio")
+    if block_resources:
+        # CDP engellemesine ek olarak Blink seviyesinde görselleri kapat
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+        opts.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+    # DOM hazır olunca get() dönsün; yorum kartlarını zaten explicit wait ile bekliyoruz
+    opts.page_load_strategy = "eager"
+    return opts
+
+
+def create_driver(browser="edge", headless=True, block_resources=True, extra_blocked=None):
+    """Ayarlanmış tek bir WebDriver döndürür."""
+    opts = build_options(browser, headless, block_resources)
+    driver = webdriver.Edge(options=opts) if browser == "edge" else webdriver.Chrome(options=opts)
+    if block_resources:
+        patterns = BLOCKED_URL_PATTERNS + list(extra_blocked or [])
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except WebDriverException as e:
+            print(f"[DRIVER] CDP engelleme uygulanamadı: {e}")
+    return driver
+
+
+def browser_rss_mb(driver):
+    """Driver servisinin altındaki tüm tarayıcı süreçlerinin toplam RSS'i (MB). psutil yoksa None."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs if p.is_running()) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _is_crash(exc):
+    msg = str(exc).lower()
+    return any(m in msg for m in _CRASH_MARKERS)
+
+
+class ManagedDriver:
+    """
+    driver = ManagedDriver(headless=True, max_pages=300, max_rss_mb=1500)
+    driver.get(url)          # gerekirse önce yeniden başlatır, çökmede bir kez tekrar dener
+    driver.find_elements(...)  # gerçek driver'a devredilir
+    """
+
+    def __init__(self, browser="edge", headless=True, block_resources=True,
+                 max_pages=300, max_rss_mb=1500, rss_check_every=10, extra_blocked=None):
+        self._browser = browser
+        self._headless = headless
+        self._block = block_resources
+        self._extra_blocked = extra_blocked
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.rss_check_every = rss_check_every
+        self.pages_since_start = 0
+        self.restarts = 0
+        self.page_stats = []   # (url, load_ms, rss_mb|None)
+        self._last_rss = None  # son ölçülen RSS; eşiği aştıysa bir sonraki get() yeniden başlatır
+        self._driver = None
+        self._start()
+
+    # ---------- yaşam döngüsü ----------
+    def _start(self):
+        self._driver = create_driver(self._browser, self._headless, self._block, self._extra_blocked)
+        self.pages_since_start = 0
+        self._last_rss = None
+
+    def restart(self, reason=""):
+        print(f"[DRIVER] yeniden başlatılıyor ({reason}); sayfa={self.pages_since_start}")
+        try:
+            self._driver.quit()
+        except Exception:
+            pass
+        self.restarts += 1
+        self._start()
+
+    def quit(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
+
+    @property
+    def raw(self):
+        return self._driver
+
+    def __getattr__(self, name):
+        # sadece __init__'te tanımlanmayanlar buraya düşer
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._driver, name)
+
+    # ---------- gezinme ----------
+    def _maybe_recycle(self):
+        if self.max_pages and self.pages_since_start >= self.max_pages:
+            self.restart(f"{self.max_pages} sayfa")
+            return
+        # RSS get() içinde rss_check_every sayfada bir ölçülür; burada tekrar ölçülmez
+        rss = self._last_rss
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            self.restart(f"RSS {rss:.0f} MB > {self.max_rss_mb} MB")
+
+    def get(self, url):
+        self._maybe_recycle()
+        for attempt in (1, 2):
+            t0 = time.perf_counter()
+            try:
+                self._driver.get(url)
+                break
+            except WebDriverException as e:
+                if attempt == 2 or not _is_crash(e):
+                    raise
+                self.restart(f"çökme: {str(e).splitlines()[0][:80]}")
+        self.pages_since_start += 1
+        load_ms = (time.perf_counter() - t0) * 1000
+        rss = browser_rss_mb(self._driver) if (self.rss_check_every and
+                                               self.pages_since_start % self.rss_check_every == 0) else None
+        if rss is not None:
+            self._last_rss = rss
+        self.page_stats.append((url, load_ms, rss))
+        if len(self.page_stats) > 10000:
+            del self.page_stats[:5000]
+
+
+def driver_from_env(**kw):
+    """HB_BROWSER / HB_HEADLESS / HB_MAX_PAGES / HB_MAX_RSS_MB ortam değişkenlerinden."""
+    return ManagedDriver(
+        browser=os.getenv("HB_BROWSER", kw.pop("browser", "edge")),
+        headless=os.getenv("HB_HEADLESS", "1" if kw.pop("headless", True) else "0") != "0",
+        max_pages=int(os.getenv("HB_MAX_PAGES", kw.pop("max_pages", 300))),
+        max_rss_mb=float(os.getenv("HB_MAX_RSS_MB", kw.pop("max_rss_mb", 1500))),
+        **kw,
+    )
+
+
+class DriverPool:
+    """
+    pool = DriverPool(4)
+    results = pool.map(fn, [(arg1, arg2), ...])   # fn(driver, arg1, arg2); sıra korunur
+    Hata veren çağrının yerine exception nesnesi döner. Driver'lar ihtiyaç oldukça açılır.
+    """
+
+    def __init__(self, size, factory=None):
+        self.size = size
+        self._factory = factory or driver_from_env
+        self._free = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="hb-driver")
+
+    def _acquire(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._drivers) < self.size:
+                d = self._factory()
+                self._drivers.append(d)
+                return d
+        return self._free.get()
+
+    def run(self, fn, *args):
+        driver = self._acquire()
+        try:
+            return fn(driver, *args)
+        finally:
+            self._free.put(driver)
+
+    def map(self, fn, arg_tuples):
+        futures = [self._executor.submit(self.run, fn, *args) for args in arg_tuples]
+        out = []
+        for f in futures:
+            try:
+                out.append(f.result())
+            except Exception as e:
+                out.append(e)
+        return out
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for d in self._drivers:
+            try:
+                d.quit()
+            except Exception:
+                pass
+        self._drivers = []
@@ -1,87 +1,20 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from urllib.parse import urlsplit, urlunsplit
+import os
 import time
 import re
 
 
 ####Database
-import sqlite3, hashlib, time
-from contextlib import closing
-
-def init_db(db_path="reviews.db"):
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous=NORMAL;")
-    conn.execute("PRAGMA foreign_keys=ON;")
-    conn.execute("""
-    CREATE TABLE IF NOT EXISTS products (
-        id INTEGER PRIMARY KEY,
-        url TEXT UNIQUE,
-        title TEXT,
-        first_seen_ts INTEGER
-    );
-    """)
-    conn.execute("""
-    CREATE TABLE IF NOT EXISTS reviews (
-        id INTEGER PRIMARY KEY,
-        product_id INTEGER NOT NULL,
-        review_hash TEXT NOT NULL,
-        review_text TEXT NOT NULL,
-        rating INTEGER,                -- ★ yeni
-        page_no INTEGER,
-        collected_ts INTEGER,
-        FOREIGN KEY(product_id) REFERENCES products(id),
-        UNIQUE(product_id, review_hash)
-    );
-    """)
-    # Eski tabloda rating yoksa ekle (failsafe)
-    try:
-        conn.execute("ALTER TABLE reviews ADD COLUMN rating INTEGER;")
-    except sqlite3.OperationalError:
-        pass
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_product ON reviews(product_id);")
-    return conn
-
-
-def get_or_create_product_id(conn, product_url, title=None):
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM products WHERE url = ?", (product_url,))
-    row = cur.fetchone()
-    if row: 
-        return row[0]
-    cur.execute(
-        "INSERT OR IGNORE INTO products(url, title, first_seen_ts) VALUES(?,?,?)",
-        (product_url, title, int(time.time()))
-    )
-    conn.commit()
-    return get_or_create_product_id(conn, product_url, title)
+from reviews_db import init_db, get_or_create_product_id, hash_review, save_reviews, upsert_products
+from scrape_trace import StageTracer
+from driver_factory import driver_from_env, DriverPool
 
-def hash_review(text:str) -> str:
-    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
-
-def save_reviews(conn, product_id:int, items:list, page_no:int):
-    """
-    items: [{'text': str, 'rating': int|None}, ...]
-    """
-    rows = []
-    now = int(time.time())
-    for it in items:
-        t = (it.get('text') or '').strip()
-        if not t:
-            continue
-        r = it.get('rating')
-        rows.append((product_id, hash_review(t), t, r, page_no, now))
-    if rows:
-        with conn:
-            conn.executemany(
-                "INSERT OR IGNORE INTO reviews(product_id, review_hash, review_text, rating, page_no, collected_ts) "
-                "VALUES(?,?,?,?,?,?)",
-                rows
-            )
+# Aşama ölçümü: SCRAPE_TRACE / SCRAPE_PROFILE_PRODUCT ile açılır (bkz. scrape_trace.py)
+TRACER = StageTracer.from_env()
 
 from urllib.parse import urlsplit, urlunsplit, parse_qs, urlencode
 
@@ -174,17 +107,21 @@ def separate_by_review_stars(base_html_link):
 
 def scrape_comments_in_current_page(driver, wait):
     items = []
-    cards = wait_review_cards(driver, wait)
+    with TRACER.span("wait_review_cards"):
+        cards = wait_review_cards(driver, wait)
 
     # son karta kaydır, lazy render varsa tetiklensin
-    driver.execute_script("arguments[0].scrollIntoView({block:'end'});", cards[-1])
-    time.sleep(0.2)
-
-    for card in cards:
-        text = extract_text_from_card(driver, card)
-        rating = extract_rating_from_card(card)
-        if text:
-            items.append({"text": text, "rating": rating})
+    with TRACER.span("scroll"):
+        driver.execute_script("arguments[0].scrollIntoView({block:'end'});", cards[-1])
+    TRACER.sleep(0.2, "sleep_after_scroll")
+
+    with TRACER.span("card_extract"):
+        for card in cards:
+            text = extract_text_from_card(driver, card)
+            rating = extract_rating_from_card(card)
+            if text:
+                items.append({"text": text, "rating": rating})
+    TRACER.count("cards", len(cards))
     return items
 
 
@@ -269,31 +206,213 @@ def click_review_page(driver, wait, page_no):
     except TimeoutException:
         return False
 
-def scrape_all_reviews_of_product(driver, wait, product_url, limit_review_per_product_star, product_reviews_url, conn):
-    # Ürünü (varsa başlıkla) kaydet/al
-    product_id = get_or_create_product_id(conn, product_url, title=None)
+def build_review_page_url(reviews_url: str, page_no: int) -> str:
+    """'...-yorumlari?filtre=4' → '...-yorumlari?filtre=4&sayfa=N' (diğer parametreler korunur)."""
+    parts = urlsplit(reviews_url)
+    q = parse_qs(parts.query)
+    q["sayfa"] = [str(page_no)]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(q, doseq=True), parts.fragment))
+
+def fetch_review_page(driver, wait, reviews_url, page_no):
+    """Yorum sayfasını ?sayfa=N ile doğrudan açıp kartları döndürür. DB'ye yazmaz; worker'larda da çalışır."""
+    with TRACER.span("review_page_get"):
+        driver.get(build_review_page_url(reviews_url, page_no))
+    TRACER.count("review_navigations")
+    return scrape_comments_in_current_page(driver, wait)
 
-    driver.get(product_reviews_url)
-    time.sleep(0.5)
+def page_signature(items):
+    """Sayfanın ilk yorumunun hash'i; ?sayfa=N yok sayılıp 1. sayfa geldiyse aynı çıkar."""
+    return hash_review(items[0]["text"]) if items else None
 
-    total_pages = get_total_review_pages(driver)
+def _fetch_page_in_worker(driver, ctx, reviews_url, page_no):
+    TRACER.set_context(**ctx)
+    return fetch_review_page(driver, WebDriverWait(driver, 15), reviews_url, page_no)
+
+def scrape_current_review_view(driver, wait, product_id, conn, target=None, max_pages=None, tally=None, pool=None):
+    """
+    Halihazırda açık olan yorum görünümünü (filtreli ya da filtresiz) gezer.
+    1. sayfa açık driver'dan okunur; sonrakiler ?sayfa=N ile doğrudan açılır,
+    pool verildiyse birden fazla tarayıcıda paralel. Site parametreyi yok sayarsa
+    (N. sayfa 1. sayfayla aynı gelirse) tıklamalı sayfalamaya düşülür.
+    target yeni yorum kaydedilince ya da max_pages sayfa okununca durur; DB'de
+    zaten olan (örn. filtresiz 1. sayfadan gelen) yorumlar hedefe sayılmaz.
+    tally verilirse yeni yorumlarla {yıldız: adet} olarak güncellenir.
+    Dönen: yeni kaydedilen yorum sayısı. DB yazımı hep bu thread'de.
+    """
+    reviews_url = driver.current_url
+    with TRACER.span("pagination_read"):
+        total_pages = get_total_review_pages(driver)
+    if max_pages is not None:
+        total_pages = min(total_pages, max_pages)
     all_count = 0
 
-    for p in range(1, total_pages + 1):
-        if p > 1:
-            moved = click_review_page(driver, wait, p)
+    def store(p, page_items):
+        nonlocal all_count
+        TRACER.count("review_pages")
+        if not page_items:
+            return
+        with TRACER.span("save_reviews"):
+            new = save_reviews(conn, product_id, page_items, page_no=p)
+        all_count += len(new)
+        if tally is not None:
+            for it in new:
+                if it.get("rating"):
+                    tally[it["rating"]] = tally.get(it["rating"], 0) + 1
+
+    def done():
+        return target is not None and all_count >= target
+
+    first = scrape_comments_in_current_page(driver, wait)
+    store(1, first)
+    if done() or total_pages <= 1:
+        return all_count
+
+    # hedefe yetecek kadar sayfa (sayfa başı yorum 1. sayfadan tahmin edilir);
+    # tekrar eden yorumlar yüzünden hedef dolmazsa kalan sayfalar sırayla okunur
+    last_page = total_pages
+    if target is not None and first:
+        last_page = min(total_pages, 1 + -(-(target - all_count) // len(first)))
+    pages = list(range(2, last_page + 1))
+    rest = list(range(last_page + 1, total_pages + 1))
+    sig1 = page_signature(first)
+
+    if pool is not None and len(pages) > 1:
+        with TRACER.span("review_pages_parallel"):
+            fetched = pool.map(_fetch_page_in_worker,
+                               [(TRACER.context(), reviews_url, p) for p in pages])
+        ok = [not isinstance(r, Exception) and page_signature(r) != sig1 for r in fetched]
+        if all(ok):
+            for p, page_items in zip(pages, fetched):
+                store(p, page_items)
+            pages = []
+        elif any(not isinstance(r, Exception) and page_signature(r) == sig1 for r in fetched):
+            TRACER.count("url_pagination_ignored")
+        else:
+            # sadece bazı worker'lar hata verdi: başarılıları yaz, kalanı sırayla dene
+            for p, page_items, good in zip(pages, fetched, ok):
+                if good:
+                    store(p, page_items)
+            pages = [p for p, good in zip(pages, ok) if not good]
+
+    use_click = False
+    for p in pages + rest:
+        if done():
+            break
+        page_items = None
+        if not use_click:
+            page_items = fetch_review_page(driver, wait, reviews_url, p)
+            if page_signature(page_items) == sig1:
+                # parametre işe yaramadı; driver 1. sayfada, tıklamaya geç
+                TRACER.count("url_pagination_ignored")
+                use_click = True
+                page_items = None
+        if use_click:
+            with TRACER.span("review_click"):
+                moved = click_review_page(driver, wait, p)
             if not moved:
                 break
-            time.sleep(0.3)
-
-        page_items = scrape_comments_in_current_page(driver, wait)
-        if page_items:
-            save_reviews(conn, product_id, page_items, page_no=p)
-            all_count += len(page_items)
-        if all_count > limit_review_per_product_star:
-            break
+            TRACER.sleep(0.3, "sleep_after_click")
+            page_items = scrape_comments_in_current_page(driver, wait)
+        store(p, page_items)
     return all_count
 
+def scrape_all_reviews_of_product(driver, wait, product_url, limit_review_per_product_star, product_reviews_url, conn,
+                                  product_id=None, tally=None, pool=None):
+    # Ürünü (varsa başlıkla) kaydet/al – çağıran id'yi biliyorsa tekrar sorgulanmaz
+    if product_id is None:
+        with TRACER.span("db_product"):
+            product_id = get_or_create_product_id(conn, product_url, title=None)
+
+    with TRACER.span("review_get"):
+        driver.get(product_reviews_url)
+    TRACER.count("review_navigations")
+    TRACER.sleep(0.5, "sleep_after_get")
+
+    return scrape_current_review_view(driver, wait, product_id, conn,
+                                      target=limit_review_per_product_star, tally=tally, pool=pool)
+
+# --- Yıldız filtresi planlayıcı ---
+
+# Yorum sayfasının üstündeki yıldız dağılımı çubukları: {yıldız: adet}
+STAR_COUNTS_JS = """
+const out = {};
+for (const bar of document.querySelectorAll("[class*='hermes-RateBar-module']")) {
+  const txt = (bar.textContent || "").replace(/\\s+/g, " ").trim();
+  let star = parseInt(bar.getAttribute("data-star") || "", 10);
+  if (!star) { const m = txt.match(/^([1-5])/); star = m ? parseInt(m[1], 10) : 0; }
+  const nums = txt.replace(/[.,](?=\\d{3})/g, "").match(/\\d+/g);
+  if (star >= 1 && star <= 5 && nums) out[star] = parseInt(nums[nums.length - 1], 10);
+}
+return out;
+"""
+
+def read_star_counts(driver):
+    """Açık yorum sayfasından yıldız başına yorum sayıları; okunamazsa None."""
+    try:
+        raw = driver.execute_script(STAR_COUNTS_JS) or {}
+    except Exception:
+        return None
+    counts = {int(k): int(v) for k, v in raw.items()}
+    return counts if len(counts) == 5 else None
+
+def plan_star_views(star_counts, limit, got=None):
+    """
+    Hangi ?filtre=N görünümlerinin açılacağını seçer.
+      star_counts : {yıldız: toplam yorum} (sayfadan), None = bilinmiyor
+      limit       : yıldız başına kota (limit_review_per_product_star), None = sınırsız
+      got         : filtresiz ilk sayfada yeni kaydedilen {yıldız: adet}
+    Dönen: [(yıldız, hedef_adet), ...]. Boş liste = filtresiz görünüm yeterli.
+    Kotası zaten dolan ya da hiç yorumu olmayan yıldızlar için sayfa açılmaz.
+    """
+    got = got or {}
+    if star_counts is None:
+        return [(star, limit) for star in range(1, 6)]
+    plan = []
+    for star in range(5, 0, -1):
+        quota = star_counts.get(star, 0) if limit is None else min(star_counts.get(star, 0), limit)
+        need = quota - got.get(star, 0)
+        if need > 0:
+            plan.append((star, need))
+    return plan
+
+def scrape_product_adaptive(driver, wait, product_url, limit_review_per_product_star, conn,
+                            product_id=None, known_total=None, pool=None):
+    """
+    Ürün başına önce filtresiz yorum sayfası açılır ve yıldız dağılımı okunur:
+      - toplam yorum kotanın altındaysa filtresiz görünümün tamamı çekilir (1 navigasyon)
+      - değilse filtresiz 1. sayfa kaydedilir, sadece kotası dolmayan yıldızlar
+        için ?filtre=N açılır
+    Dağılım okunamazsa eski davranışa (5 filtre) düşer.
+    """
+    limit = limit_review_per_product_star
+    if product_id is None:
+        with TRACER.span("db_product"):
+            product_id = get_or_create_product_id(conn, product_url, title=None)
+    reviews_url = build_reviews_url_from_product_url(product_url)
+
+    with TRACER.span("review_get"):
+        driver.get(reviews_url + "?sayfa=1")
+    TRACER.count("review_navigations")
+    TRACER.sleep(0.5, "sleep_after_get")
+
+    with TRACER.span("star_counts_read"):
+        counts = read_star_counts(driver)
+    total = sum(counts.values()) if counts else known_total
+
+    tally = {}
+    if total is not None and (limit is None or total <= limit):
+        TRACER.count("plan_unfiltered")
+        return scrape_current_review_view(driver, wait, product_id, conn, tally=tally, pool=pool)
+
+    n = scrape_current_review_view(driver, wait, product_id, conn, max_pages=1, tally=tally)
+    plan = plan_star_views(counts, limit, got=tally)
+    TRACER.count("plan_star_views", len(plan))
+    for star, need in plan:
+        n += scrape_all_reviews_of_product(driver, wait, product_url, need,
+                                           reviews_url + f"?sayfa=1&filtre={star}", conn,
+                                           product_id=product_id, pool=pool)
+    return n
+
 # --- Kategori tarafı ---
 
 def build_reviews_url_from_product_url(url: str) -> str:
@@ -315,10 +434,43 @@ def build_reviews_url_from_product_url(url: str) -> str:
 
     return urlunsplit((parts.scheme, parts.netloc, new_path, "", parts.fragment))
 
-def get_product_urls_from_category_page(driver, wait, limit_per_page=None):
+# Tüm kartları tek round-trip'te okur (anchor başına get_attribute yerine).
+# Dinamik modül class'ları için prefix/içerir seçicileri kullanılır.
+CARD_EXTRACT_JS = """
+const out = [];
+for (const art of document.querySelectorAll("article[class^='productCard-module']")) {
+  const a = art.querySelector("a[class*='productCardLink-module']");
+  if (!a) continue;
+  const t = art.querySelector("[class*='title-module_titleText'], h2, h3");
+  const r = art.querySelector("[class*='ratingValue']");
+  const c = art.querySelector("[class*='rate-module_count'], [class*='ratingCount']");
+  out.push({
+    href: a.href || "",
+    title: ((t && t.textContent) || a.getAttribute("title") || "").trim(),
+    rating: r ? r.textContent.trim() : null,
+    count: c ? c.textContent.trim() : null
+  });
+}
+return out;
+"""
+
+
+def parse_card_number(txt, is_float=False):
+    """'4,8' → 4.8, '(1.234)' → 1234, '' / None → None."""
+    if not txt:
+        return None
+    if is_float:
+        m = re.search(r"\d+(?:[.,]\d+)?", txt)
+        return float(m.group(0).replace(",", ".")) if m else None
+    digits = re.sub(r"\D", "", txt)
+    return int(digits) if digits else None
+
+
+def get_product_cards_from_category_page(driver, wait, limit_per_page=None):
     """
-    Kategori sayfasındaki ürün kartlarından ürün sayfası linklerini döndürür.
-    Dinamik modül class'ları için prefix içerir.
+    Kategori sayfasındaki ürün kartlarını döndürür:
+    [{'url', 'title', 'rating_avg', 'review_count'}, ...]
+    review_count kartta yoksa None (bilinmiyor), "(0)" ise 0.
     """
     # Ürün kartları yüklenene kadar bekle
     wait.until(
@@ -327,16 +479,10 @@ def get_product_urls_from_category_page(driver, wait, limit_per_page=None):
         )
     )
 
-    # Linkler tipik olarak kartın içindeki <a> üzerinde
-    anchors = driver.find_elements(
-        By.CSS_SELECTOR,
-        "article[class^='productCard-module'] a[class*='productCardLink-module']"
-    )
-
-    urls = []
+    cards = []
     seen = set()
-    for a in anchors:
-        href = a.get_attribute("href") or ""
+    for raw in driver.execute_script(CARD_EXTRACT_JS) or []:
+        href = raw.get("href") or ""
         # Reklam / event tracker / boş href'leri at
         if not href.startswith("http"):
             continue
@@ -347,21 +493,36 @@ def get_product_urls_from_category_page(driver, wait, limit_per_page=None):
         if href in seen:
             continue
         seen.add(href)
-        urls.append(href)
-        if limit_per_page and len(urls) >= limit_per_page:
+        cards.append({
+            "url": href,
+            "title": raw.get("title") or None,
+            "rating_avg": parse_card_number(raw.get("rating"), is_float=True),
+            "review_count": parse_card_number(raw.get("count")),
+        })
+        if limit_per_page and len(cards) >= limit_per_page:
             break
-    return urls
+    return cards
+
+
+def get_product_urls_from_category_page(driver, wait, limit_per_page=None):
+    """Geriye dönük uyumluluk: sadece ürün linkleri."""
+    return [c["url"] for c in get_product_cards_from_category_page(driver, wait, limit_per_page)]
 
 def scrape_category_via_query(driver, base_category_url: str,
                               start_page=1, max_pages=None,
-                              limit_products_per_page=None,limit_review_per_product_star=None,  sleep_between=0.4):
+                              limit_products_per_page=None,limit_review_per_product_star=None,  sleep_between=0.4,
+                              conn=None, min_reviews=1, pool=None):
     """
     URL'deki ?sayfa=N parametresiyle kategori sayfalarını gezer.
     max_pages=None ise ürün kalmayana kadar devam eder.
+    Kart metadatası (başlık, puan, yorum sayısı) sayfa başına toplu yazılır;
+    kartta yorum sayısı min_reviews'in altında olan ürünlerin yorum sayfası hiç açılmaz.
+    pool (driver_factory.DriverPool) verilirse büyük ürünlerin yorum sayfaları paralel çekilir.
     """
     wait = WebDriverWait(driver, 15)
     results = {}
     visited_products = set()
+    TRACER.set_context(category=base_category_url, product=None)
 
     page = start_page
     while True:
@@ -370,40 +531,59 @@ def scrape_category_via_query(driver, base_category_url: str,
 
         page_url = build_category_page_url(base_category_url, page)
         print(f"[Kategori] sayfa={page} → {page_url}")
-        driver.get(page_url)
+        TRACER.set_context(product=None)
+        with TRACER.span("category_get"):
+            driver.get(page_url)
 
         # Bu sayfada ürün kartı var mı?
-        if not category_page_has_products(driver):
+        with TRACER.span("category_wait"):
+            has_products = category_page_has_products(driver)
+        if not has_products:
             print("[Kategori] Ürün bulunamadı, durduruluyor.")
             break
 
-        product_urls = get_product_urls_from_category_page(driver, wait, limit_per_page=limit_products_per_page)
+        with TRACER.span("category_extract"):
+            cards = get_product_cards_from_category_page(driver, wait, limit_per_page=limit_products_per_page)
 
         # sayfada hiç ürün linki çıkmadıysa bitir
-        if not product_urls:
+        if not cards:
             print("[Kategori] Link bulunamadı, durduruluyor.")
             break
 
-        for pu in product_urls:
+        product_ids = {}
+        if conn is not None:
+            with TRACER.span("db_cards"):
+                product_ids = upsert_products(conn, cards)
+
+        # Çok yorumlu ürünler önce; yorum sayısı bilinmeyenler en sona
+        cards.sort(key=lambda c: -1 if c["review_count"] is None else -c["review_count"])
+
+        for card in cards:
+            pu = card["url"]
             if pu in visited_products:
                 continue
             visited_products.add(pu)
+            if card["review_count"] is not None and card["review_count"] < min_reviews:
+                TRACER.count("skipped_few_reviews")
+                continue
+            TRACER.set_context(product=pu)
+            TRACER.count("products")
 
-            reviews_url = build_reviews_url_from_product_url(pu)
-            reviews_urls_by_star = separate_by_review_stars(reviews_url)
-            
-            for star_class in reviews_urls_by_star:
+            with TRACER.profile(pu), TRACER.span("product_total"):
                 try:
-                    n = scrape_all_reviews_of_product(driver, wait,
-                                                    product_url=pu,
-                                                    limit_review_per_product_star = limit_review_per_product_star,
-                                                    product_reviews_url=star_class,
-                                                    conn=conn)   # ← SQLite bağlantın
+                    n = scrape_product_adaptive(driver, wait,
+                                                product_url=pu,
+                                                limit_review_per_product_star=limit_review_per_product_star,
+                                                conn=conn,   # ← SQLite bağlantın
+                                                product_id=product_ids.get(pu),
+                                                known_total=card["review_count"],
+                                                pool=pool)
                     results[pu] = n
                     print(f"[OK] {pu} → {n} yorum kaydedildi")
                 except Exception as e:
+                    TRACER.count("errors")
                     print(f"[HATA] {pu}: {e}")
-                time.sleep(sleep_between)
+                TRACER.sleep(sleep_between, "sleep_between")
         page += 1
     return results
 
@@ -466,35 +646,46 @@ def scrape_category_via_query(driver, base_category_url: str,
 #     return results
 
 
-driver = webdriver.Edge()
-conn = init_db("reviews_V2.db")  # önceki SQLite fonksiyonların
-
-#category_url = "https://www.hepsiburada.com/bilgisayar-sistemleri-ve-ekipmanlari-c-2147483646"
-
-category_urls= [#"https://www.hepsiburada.com/yapi-market-hirdavatlar-c-2147483620",
-                #"https://www.hepsiburada.com/giyim-ayakkabi-c-2147483636", #Moda
-                #"https://www.hepsiburada.com/spor-fitness-urunleri-c-2147483635", #Spor Ürünleri
-                #"https://www.hepsiburada.com/kozmetik-c-2147483603",#Kozmetik
-                #"https://www.hepsiburada.com/supermarket-c-2147483619", #SüperMarket
-                #"https://www.hepsiburada.com/kitaplar-c-2147483645", #Kitap
-                # "https://www.hepsiburada.com/mutfak-gerecleri-c-22500" #Mutfak
-                # "https://www.hepsiburada.com/elektrikli-ev-aletleri-c-17071", #Elektrikli ev aletleri
-                # "https://www.hepsiburada.com/mobilyalar-c-18021299", #Mobilya
-                # "https://www.hepsiburada.com/oto-aksesuarlari-c-2147483631", #Oto aksesuarları
-                "https://www.hepsiburada.com/anne-bebek-oyuncak-c-2147483639" #Anne Bebek
-                ]
-
-for category_url in category_urls:
+if __name__ == "__main__":
+    # headless + kaynak engelleme + N sayfada bir yeniden başlatma (bkz. driver_factory.py)
+    driver = driver_from_env()
+    # HB_WORKERS>1 ise yorum sayfaları için ek tarayıcılar (ihtiyaç oldukça açılır)
+    workers = int(os.getenv("HB_WORKERS", "1"))
+    pool = DriverPool(workers) if workers > 1 else None
+    conn = init_db(os.getenv("ABSA_DB_PATH", "reviews_V2.db"))  # önceki SQLite fonksiyonların
+
+    #category_url = "https://www.hepsiburada.com/bilgisayar-sistemleri-ve-ekipmanlari-c-2147483646"
+
+    category_urls= [#"https://www.hepsiburada.com/yapi-market-hirdavatlar-c-2147483620",
+                    #"https://www.hepsiburada.com/giyim-ayakkabi-c-2147483636", #Moda
+                    #"https://www.hepsiburada.com/spor-fitness-urunleri-c-2147483635", #Spor Ürünleri
+                    #"https://www.hepsiburada.com/kozmetik-c-2147483603",#Kozmetik
+                    #"https://www.hepsiburada.com/supermarket-c-2147483619", #SüperMarket
+                    #"https://www.hepsiburada.com/kitaplar-c-2147483645", #Kitap
+                    # "https://www.hepsiburada.com/mutfak-gerecleri-c-22500" #Mutfak
+                    # "https://www.hepsiburada.com/elektrikli-ev-aletleri-c-17071", #Elektrikli ev aletleri
+                    # "https://www.hepsiburada.com/mobilyalar-c-18021299", #Mobilya
+                    # "https://www.hepsiburada.com/oto-aksesuarlari-c-2147483631", #Oto aksesuarları
+                    "https://www.hepsiburada.com/anne-bebek-oyuncak-c-2147483639" #Anne Bebek
+                    ]
+
+    for category_url in category_urls:
     
-    summary = scrape_category_via_query(
-        driver,
-        base_category_url=category_url,
-        start_page=1,
-        max_pages=3,                # istersen None bırak, ürün bitene kadar gider
-        limit_products_per_page=20,  # her sayfadan ilk 5 ürün
-        limit_review_per_product_star = 100,
-        sleep_between=0.3
-    )
+        summary = scrape_category_via_query(
+            driver,
+            base_category_url=category_url,
+            start_page=1,
+            max_pages=3,                # istersen None bırak, ürün bitene kadar gider
+            limit_products_per_page=20,  # her sayfadan ilk 5 ürün
+            limit_review_per_product_star = 100,
+            sleep_between=0.3,
+            conn=conn,
+            pool=pool
+        )
 
-conn.close()
-driver.quit()
\ No newline at end of file
+    TRACER.print_report()
+    TRACER.close()
+    conn.close()
+    if pool is not None:
+        pool.close()
+    driver.quit()
\ No newline at end of file
@@ -0,0 +1,114 @@
+# reviews_db.py
+# Scraper'ın SQLite katmanı (products / reviews). Selenium gerektirmez;
+# benchmark'lar ve diğer scriptler doğrudan import edebilir.
+import sqlite3, hashlib, time
+
+def init_db(db_path="reviews.db"):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA foreign_keys=ON;")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY,
+        url TEXT UNIQUE,
+        title TEXT,
+        first_seen_ts INTEGER
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS reviews (
+        id INTEGER PRIMARY KEY,
+        product_id INTEGER NOT NULL,
+        review_hash TEXT NOT NULL,
+        review_text TEXT NOT NULL,
+        rating INTEGER,                -- ★ yeni
+        page_no INTEGER,
+        collected_ts INTEGER,
+        FOREIGN KEY(product_id) REFERENCES products(id),
+        UNIQUE(product_id, review_hash)
+    );
+    """)
+    # Eski tabloda rating yoksa ekle (failsafe)
+    try:
+        conn.execute("ALTER TABLE reviews ADD COLUMN rating INTEGER;")
+    except sqlite3.OperationalError:
+        pass
+    # Kategori kartından gelen ürün metadatası (failsafe)
+    for col, typ in (("rating_avg", "REAL"), ("review_count", "INTEGER"), ("last_listed_ts", "INTEGER")):
+        try:
+            conn.execute(f"ALTER TABLE products ADD COLUMN {col} {typ};")
+        except sqlite3.OperationalError:
+            pass
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_product ON reviews(product_id);")
+    return conn
+
+
+def get_or_create_product_id(conn, product_url, title=None):
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM products WHERE url = ?", (product_url,))
+    row = cur.fetchone()
+    if row: 
+        return row[0]
+    cur.execute(
+        "INSERT OR IGNORE INTO products(url, title, first_seen_ts) VALUES(?,?,?)",
+        (product_url, title, int(time.time()))
+    )
+    conn.commit()
+    return get_or_create_product_id(conn, product_url, title)
+
+def upsert_products(conn, cards:list) -> dict:
+    """
+    cards: [{'url': str, 'title': str|None, 'rating_avg': float|None, 'review_count': int|None}, ...]
+    Kategori sayfasındaki tüm kartları tek transaction'da yazar; mevcut ürünlerde
+    boş gelen alanlar eskisini ezmez. Dönen: {url: product_id}
+    """
+    now = int(time.time())
+    rows = [(c['url'], c.get('title'), c.get('rating_avg'), c.get('review_count'), now, now)
+            for c in cards if c.get('url')]
+    if not rows:
+        return {}
+    with conn:
+        conn.executemany(
+            "INSERT INTO products(url, title, rating_avg, review_count, first_seen_ts, last_listed_ts) "
+            "VALUES(?,?,?,?,?,?) "
+            "ON CONFLICT(url) DO UPDATE SET "
+            "  title = COALESCE(excluded.title, products.title), "
+            "  rating_avg = COALESCE(excluded.rating_avg, products.rating_avg), "
+            "  review_count = COALESCE(excluded.review_count, products.review_count), "
+            "  last_listed_ts = excluded.last_listed_ts",
+            rows
+        )
+    urls = [r[0] for r in rows]
+    qmarks = ",".join("?" * len(urls))
+    return dict(conn.execute(f"SELECT url, id FROM products WHERE url IN ({qmarks})", urls).fetchall())
+
+def hash_review(text:str) -> str:
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
+
+def save_reviews(conn, product_id:int, items:list, page_no:int):
+    """
+    items: [{'text': str, 'rating': int|None}, ...]
+    Dönen: gerçekten eklenen item'lar; ürün için zaten kayıtlı yorumları
+    INSERT OR IGNORE atlar (kota hesabı sadece yenileri saymalı).
+    """
+    rows, kept = [], []
+    now = int(time.time())
+    for it in items:
+        t = (it.get('text') or '').strip()
+        if not t:
+            continue
+        r = it.get('rating')
+        rows.append((product_id, hash_review(t), t, r, page_no, now))
+        kept.append(it)
+    new = []
+    if rows:
+        with conn:
+            for it, row in zip(kept, rows):
+                if conn.execute(
+                    "INSERT OR IGNORE INTO reviews(product_id, review_hash, review_text, rating, page_no, collected_ts) "
+                    "VALUES(?,?,?,?,?,?)",
+                    row
+                ).rowcount:
+                    new.append(it)
+    return new
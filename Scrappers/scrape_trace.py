@@ -0,0 +1,239 @@
+# scrape_trace.py
+# Scraper döngüsü için hafif aşama (stage) ölçümü.
+#
+#   with TRACER.span("review_get"):
+#       driver.get(url)
+#   TRACER.sleep(0.3)                      # sabit beklemeler de ayrı aşama olarak sayılır
+#   TRACER.count("cards", len(cards))
+#
+# Ortam değişkenleri:
+#   SCRAPE_TRACE=trace.jsonl | trace.db     → her span bir satır (JSONL ya da SQLite scrape_trace tablosu)
+#   SCRAPE_PROFILE_PRODUCT=<url parçası>    → eşleşen ilk ürün için cProfile, <trace>.prof'a yazılır
+#
+# Dosya verilmese de özet bellekte tutulur; report() kategori başına aşama
+# toplamlarını ve p50/p95/p99 sürelerini verir. Span'ler iç içe olabilir
+# (product_total içinde review_get ...); yüzdeler sadece en dıştaki span'lerin
+# toplamına göredir. Derinlik context() ile worker thread'lere de taşınır.
+# Sayaçlar da trace dosyasına yazılır (JSONL: "counter" satırları, SQLite:
+# scrape_counters tablosu), summarize_trace_file onları da toplar.
+import cProfile
+import json
+import os
+import pstats
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+def _pct(sorted_vals, q):
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, int(round((len(sorted_vals) - 1) * q / 100.0)))
+    return sorted_vals[k]
+
+
+class StageTracer:
+    def __init__(self, path=None, profile_match=None, flush_every=200):
+        self.path = path
+        self.profile_match = profile_match
+        self.flush_every = flush_every
+        self._buf = []
+        self._durations = defaultdict(list)   # (category, stage) -> [ms]
+        self._counters = defaultdict(int)     # (category, name) -> n
+        self._top = defaultdict(float)        # category -> en dış span'lerin toplamı (ms)
+        self._count_buf = defaultdict(int)    # dosyaya yazılmamış sayaç artışları
+        self._ctx = threading.local()
+        self._lock = threading.Lock()
+        self._profiled = False
+        self._db = None
+        if path and path.endswith(".db"):
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("""CREATE TABLE IF NOT EXISTS scrape_trace (
+                id INTEGER PRIMARY KEY,
+                ts REAL, stage TEXT, dur_ms REAL, category TEXT, product TEXT, extra TEXT, depth INTEGER
+            )""")
+            if "depth" not in {r[1] for r in self._db.execute("PRAGMA table_info(scrape_trace)")}:
+                self._db.execute("ALTER TABLE scrape_trace ADD COLUMN depth INTEGER")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS scrape_counters (
+                id INTEGER PRIMARY KEY,
+                ts REAL, category TEXT, name TEXT, n INTEGER
+            )""")
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls):
+        return cls(path=os.getenv("SCRAPE_TRACE") or None,
+                   profile_match=os.getenv("SCRAPE_PROFILE_PRODUCT") or None)
+
+    # ---------- bağlam ----------
+    def set_context(self, **kw):
+        """category=..., product=... gibi etiketler; sonraki span'lere eklenir."""
+        for k, v in kw.items():
+            setattr(self._ctx, k, v)
+
+    def context(self):
+        """Bu thread'in etiketleri; worker thread'lere set_context(**ctx) ile taşınır."""
+        category, product = self._labels()
+        return {"category": category, "product": product, "depth": getattr(self._ctx, "depth", 0)}
+
+    def _labels(self):
+        return getattr(self._ctx, "category", None), getattr(self._ctx, "product", None)
+
+    # ---------- ölçüm ----------
+    @contextmanager
+    def span(self, stage, **extra):
+        depth = getattr(self._ctx, "depth", 0)
+        self._ctx.depth = depth + 1
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._ctx.depth = depth
+            self._record(stage, (time.perf_counter() - t0) * 1000, extra, depth)
+
+    def sleep(self, seconds, stage="sleep"):
+        with self.span(stage, planned_s=seconds):
+            time.sleep(seconds)
+
+    def count(self, name, n=1):
+        category, _ = self._labels()
+        with self._lock:
+            self._counters[(category, name)] += n
+            if self.path:
+                self._count_buf[(category, name)] += n
+
+    def _record(self, stage, dur_ms, extra, depth=0):
+        category, product = self._labels()
+        with self._lock:
+            self._durations[(category, stage)].append(dur_ms)
+            if depth == 0:
+                self._top[category] += dur_ms
+            if self.path:
+                self._buf.append((time.time(), stage, round(dur_ms, 3), category, product,
+                                  json.dumps(extra, ensure_ascii=False) if extra else None, depth))
+                if len(self._buf) >= self.flush_every:
+                    self._flush_locked()
+
+    def _flush_locked(self):
+        rows, self._buf = self._buf, []
+        now = time.time()
+        counts = [(now, cat, name, n) for (cat, name), n in self._count_buf.items()]
+        self._count_buf.clear()
+        if not rows and not counts:
+            return
+        if self._db is not None:
+            self._db.executemany(
+                "INSERT INTO scrape_trace(ts, stage, dur_ms, category, product, extra, depth) VALUES (?,?,?,?,?,?,?)",
+                rows)
+            self._db.executemany("INSERT INTO scrape_counters(ts, category, name, n) VALUES (?,?,?,?)", counts)
+            self._db.commit()
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for ts, stage, dur, cat, prod, extra, depth in rows:
+                    rec = {"ts": ts, "stage": stage, "dur_ms": dur, "category": cat, "product": prod, "depth": depth}
+                    if extra:
+                        rec["extra"] = json.loads(extra)
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                for ts, cat, name, n in counts:
+                    f.write(json.dumps({"ts": ts, "counter": name, "n": n, "category": cat},
+                                       ensure_ascii=False) + "\n")
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    # ---------- cProfile ----------
+    @contextmanager
+    def profile(self, product_url):
+        """SCRAPE_PROFILE_PRODUCT ile eşleşen ilk ürünü cProfile altında çalıştırır."""
+        if self._profiled or not self.profile_match or self.profile_match not in product_url:
+            yield
+            return
+        self._profiled = True
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            out = (self.path or "scrape_trace") + ".prof"
+            prof.dump_stats(out)
+            print(f"[PROFILE] {product_url} → {out}")
+            pstats.Stats(prof).sort_stats("cumulative").print_stats(15)
+
+    # ---------- rapor ----------
+    def report(self):
+        """
+        {category: {stage: {n, total_s, p50_ms, p95_ms, p99_ms}, "_counters": {...}, "_top_s": float}}
+        _top_s: en dış span'lerin toplam süresi (iç içe span'ler bir kez sayılır).
+        """
+        out = {}
+        with self._lock:
+            items = [(k, sorted(v)) for k, v in self._durations.items()]
+            counters = dict(self._counters)
+            top = dict(self._top)
+        for (category, stage), vals in items:
+            out.setdefault(category or "-", {})[stage] = {
+                "n": len(vals),
+                "total_s": round(sum(vals) / 1000, 3),
+                "p50_ms": _pct(vals, 50), "p95_ms": _pct(vals, 95), "p99_ms": _pct(vals, 99),
+            }
+        for (category, name), n in counters.items():
+            out.setdefault(category or "-", {}).setdefault("_counters", {})[name] = n
+        for category, ms in top.items():
+            out.setdefault(category or "-", {})["_top_s"] = round(ms / 1000, 3)
+        return out
+
+    def print_report(self):
+        for category, stages in self.report().items():
+            print(f"\n[TRACE] kategori: {category}")
+            counters = stages.pop("_counters", {})
+            total = stages.pop("_top_s", 0.0) or sum(s["total_s"] for s in stages.values()) or 1.0
+            print(f"  (pay: en dış span'lerin toplamı {total:.2f}s)")
+            for stage, s in sorted(stages.items(), key=lambda kv: -kv[1]["total_s"]):
+                print(f"  {stage:22s} n={s['n']:6d}  toplam={s['total_s']:9.2f}s ({100 * s['total_s'] / total:5.1f}%)"
+                      f"  p50={s['p50_ms']:8.1f}ms  p95={s['p95_ms']:8.1f}ms  p99={s['p99_ms']:8.1f}ms")
+            if counters:
+                print("  sayaçlar:", counters)
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def summarize_trace_file(path):
+    """Kaydedilmiş bir JSONL/SQLite trace'ten aynı raporu üretir."""
+    tr = StageTracer()
+    if path.endswith(".db"):
+        with sqlite3.connect(path) as conn:
+            has_depth = "depth" in {r[1] for r in conn.execute("PRAGMA table_info(scrape_trace)")}
+            rows = conn.execute(f"SELECT stage, dur_ms, category, {'depth' if has_depth else 'NULL'} "
+                                f"FROM scrape_trace").fetchall()
+            has_counters = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='scrape_counters'").fetchone()
+            counts = conn.execute("SELECT category, name, n FROM scrape_counters").fetchall() if has_counters else []
+    else:
+        rows, counts = [], []
+        with open(path, encoding="utf-8") as f:
+            for r in map(json.loads, f):
+                if "counter" in r:
+                    counts.append((r.get("category"), r["counter"], r["n"]))
+                else:
+                    rows.append((r["stage"], r["dur_ms"], r.get("category"), r.get("depth")))
+    for stage, dur, category, depth in rows:
+        tr._durations[(category, stage)].append(dur)
+        # derinliği olmayan eski trace'lerde ürün başına dış span product_total'dır
+        if depth == 0 or (depth is None and stage == "product_total"):
+            tr._top[category] += dur
+    for category, name, n in counts:
+        tr._counters[(category, name)] += n
+    return tr
+
+
+if __name__ == "__main__":
+    import sys
+    summarize_trace_file(sys.argv[1]).print_report()
@@ -0,0 +1,18 @@
+# benchmarks
+# Ağsız, tekrarlanabilir performans ölçümleri.
+#
+#   python -m benchmarks.synth_corpus out.db --products 2000 --reviews 200000
+#   python -m benchmarks.run_benchmarks --reviews 50000 --out benchmarks/results
+#
+# Repo'daki scriptler paket değil, kendi klasörlerinden çalıştırılıyor; burada
+# o klasörleri sys.path'e ekleyip modülleri aynı isimlerle import ediyoruz.
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+for _d in ("Scrappers", "DataProcessing", "RAG_2_ASBA", ""):
+    _p = os.path.join(REPO_ROOT, _d)
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
@@ -0,0 +1,126 @@
+# fixture_server.py
+# Kaydedilmiş Hepsiburada-benzeri HTML fixture'larını yerelde sunar.
+#
+# Tarayıcıdan http://www.hepsiburada.com.localhost:<port>/ adresiyle açılır;
+# *.localhost Chrome/Edge'de 127.0.0.1'e çözülür ve href'ler scraper'ın
+# "hepsiburada.com" filtresinden geçer.
+#
+#   /<slug>-c-<id>?sayfa=N       → category_page.html (N > category_pages ise boş liste)
+#   /<slug>-yorumlari?sayfa=N    → review_page.html (yıldız sayıları path'ten deterministik;
+#                                  N > 1 ise yorum metinleri "[sN]" ile işaretlenir)
+#   /static/*                    → sahte css/font/görsel (resource blocking ölçümü için)
+#   diğer                        → ürün detay sayfası (breadcrumb içerir)
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import FIXTURES_DIR
+
+FIXTURE_HOST = "www.hepsiburada.com.localhost"
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def star_counts_for(path: str) -> dict:
+    """Ürün path'inden tekrarlanabilir yıldız dağılımı: {1: n1, ..., 5: n5}."""
+    h = hashlib.md5(path.encode("utf-8")).digest()
+    total = (h[0] * 7) % 400
+    weights = [1 + h[1] % 3, 1 + h[2] % 2, 1 + h[3] % 3, 3 + h[4] % 4, 10 + h[5] % 10]
+    s = sum(weights)
+    return {star: total * w // s for star, w in zip(range(1, 6), weights)}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    category_html = None
+    review_html = None
+    category_pages = 3
+    static_size = 256 * 1024
+
+    def log_message(self, fmt, *args):  # sessiz
+        pass
+
+    def _send(self, body: bytes, ctype: str):
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += len(body)
+            if self.path.startswith("/static/"):
+                self.stats["static_requests"] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        q = parse_qs(parts.query)
+        page = int(q.get("sayfa", ["1"])[0] or 1)
+        path = parts.path
+
+        if path.startswith("/static/"):
+            ctype = {"css": "text/css", "woff2": "font/woff2", "jpg": "image/jpeg"}.get(
+                path.rsplit(".", 1)[-1], "application/octet-stream")
+            return self._send(b"\0" * self.static_size, ctype)
+
+        if path.endswith("-yorumlari"):
+            html = self.review_html
+            for star, n in star_counts_for(path).items():
+                html = html.replace("{{c%d}}" % star, str(n))
+            if page > 1:
+                marker = '<div class="hermes-ReviewCard-module-KaU17BbDowCWcTZ9zzxw"><span>'
+                html = html.replace(marker, marker + "[s%d] " % page)
+            return self._send(html.encode("utf-8"), "text/html; charset=utf-8")
+
+        if "-c-" in path:
+            html = self.category_html
+            if page > self.category_pages:
+                start = html.index('<ul class="productListContent')
+                end = html.index("</ul>", start) + len("</ul>")
+                html = html[:start] + html[end:]
+            return self._send(html.encode("utf-8"), "text/html; charset=utf-8")
+
+        # ürün detay: breadcrumb category_page'den
+        return self._send(self.category_html.encode("utf-8"), "text/html; charset=utf-8")
+
+
+class FixtureServer:
+    """with FixtureServer() as srv: driver.get(srv.url('/x-c-1'))"""
+
+    def __init__(self, port: int = 0, category_pages: int = 3):
+        self.stats = {"requests": 0, "static_requests": 0, "bytes": 0}
+        handler = type("Handler", (FixtureHandler,), {
+            "category_html": _read("category_page.html"),
+            "review_html": _read("review_page.html"),
+            "category_pages": category_pages,
+            "stats": self.stats,
+            "stats_lock": threading.Lock(),
+        })
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def reset_stats(self):
+        for k in self.stats:
+            self.stats[k] = 0
+
+    def url(self, path: str = "/") -> str:
+        return f"http://{FIXTURE_HOST}:{self.port}{path}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    with FixtureServer(port=8765) as srv:
+        print("Fixture sunucusu:", srv.url("/fixture-kategori-c-1"))
+        threading.Event().wait()
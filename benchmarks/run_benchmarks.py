@@ -0,0 +1,603 @@
+# run_benchmarks.py
+# Uçtan uca, ağsız benchmark paketi. Sonuçlar JSON olarak yazılır; iki commit
+# arasındaki regresyon için --compare ile önceki sonuç dosyası verilebilir.
+#
+#   python -m benchmarks.run_benchmarks --reviews 50000 --out benchmarks/results
+#   python -m benchmarks.run_benchmarks --only save_reviews,absa_loop --compare benchmarks/results/eski.json
+#
+# Ölçülenler:
+#   scraper_extract : fixture yorum sayfasında scrape_comments_in_current_page (selenium + tarayıcı gerekir)
+#   save_reviews    : reviews_db.save_reviews, sayfa başına 10 yorumluk toplu yazım
+#   subsets         : subsets.build_diverse_balanced_sample (pandas gerekir)
+#   absa_loop       : absa_labelling.label_rows + StubBackend (pydantic/tenacity gerekir)
+#   driver_hygiene  : ManagedDriver ile kategori sayfası yükleme, kaynak engelleme açık/kapalı
+#                     (sayfa süresi, sunucuya giden istek/bayt, tarayıcı RSS'i; selenium gerekir)
+#   review_pagination : 5 sayfalık fixture üründe ?sayfa=N ile sıralı vs DriverPool ile paralel
+#   sharded_writes  : 8 thread eşzamanlı yazım; tek dosya (WAL) vs sharded_store (4 shard)
+#   zstd_storage    : zstd_store ile review_text/response_json sıkıştırma; dosya boyutu ve tam tarama
+#                     süresi düz vs sıkıştırılmış (zstandard gerekir; --db ile gerçek DB'de ölçülebilir)
+#   wire_schema     : tam vs kompakt çıktı şeması (absa_wire.py); StubBackend ile çıktı token'ı,
+#                     token başına gecikmeyle süre ve uyum; DB'de absa_raw varsa kayıtlı cevaplar
+#                     kompakta kodlanıp boyut, parse süresi ve uyum ölçülür
+#   subset_coverage : 5k subset, sampler random vs coverage (süre, farklı n-gram / 1k karakter,
+#                     havuzun seçime ortalama kosinüs mesafesi)
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+from benchmarks import REPO_ROOT
+from benchmarks.synth_corpus import generate_db, make_review_text
+
+BENCHMARKS = ("scraper_extract", "save_reviews", "subsets", "absa_loop", "driver_hygiene",
+              "review_pagination", "sharded_writes", "subset_coverage", "zstd_storage", "wire_schema")
+
+
+class Skip(Exception):
+    """Bağımlılık/ortam eksik; benchmark atlanır."""
+
+
+def timed(fn, repeat=3):
+    """fn()'i repeat kez çalıştırır; fn işlenen öğe sayısını döndürür."""
+    runs, items = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        items = fn()
+        runs.append(time.perf_counter() - t0)
+    best = min(runs)
+    return {
+        "seconds_best": round(best, 4),
+        "seconds_median": round(statistics.median(runs), 4),
+        "items": items,
+        "items_per_s": round(items / best, 1) if best > 0 and items else None,
+    }
+
+
+def git_sha():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+# ---------- benchmark'lar ----------
+def bench_scraper_extract(ctx):
+    try:
+        import hepsiburada_all as hb
+        from selenium import webdriver
+        from selenium.webdriver.support.ui import WebDriverWait
+    except ImportError as e:
+        raise Skip(f"selenium yok: {e}")
+    from benchmarks.fixture_server import FixtureServer
+
+    def make_driver():
+        for name in ("Chrome", "Edge"):
+            try:
+                opts = getattr(webdriver, f"{name}Options")()
+                opts.add_argument("--headless=new")
+                return getattr(webdriver, name)(options=opts)
+            except Exception:
+                continue
+        raise Skip("headless Chrome/Edge başlatılamadı")
+
+    n_pages = ctx["pages"]
+    with FixtureServer() as srv:
+        driver = make_driver()
+        try:
+            wait = WebDriverWait(driver, 10)
+            urls = [srv.url(f"/fixture-urun-{i}-yorumlari?sayfa=1") for i in range(n_pages)]
+
+            def run():
+                n = 0
+                for u in urls:
+                    driver.get(u)
+                    n += len(hb.scrape_comments_in_current_page(driver, wait))
+                return n
+            return timed(run, repeat=ctx["repeat"])
+        finally:
+            driver.quit()
+
+
+def bench_save_reviews(ctx):
+    import random
+    from reviews_db import init_db, get_or_create_product_id, save_reviews
+    rng = random.Random(1)
+    n_products, per_page, pages = 200, 10, 10
+    pages_items = [[{"text": make_review_text(rng, r), "rating": r}
+                    for r in rng.choices((1, 2, 3, 4, 5), k=per_page)] for _ in range(pages)]
+
+    def run():
+        path = os.path.join(ctx["tmp"], "save_reviews.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        conn = init_db(path)
+        n = 0
+        for p in range(n_products):
+            pid = get_or_create_product_id(conn, f"https://www.hepsiburada.com/bench-{p}")
+            for page_no, items in enumerate(pages_items, 1):
+                # ürün başına farklı metin → INSERT OR IGNORE gerçekten yazsın
+                save_reviews(conn, pid, [{"text": f"{it['text']} #{p}", "rating": it["rating"]} for it in items],
+                             page_no)
+                n += len(items)
+        conn.close()
+        return n
+    return timed(run, repeat=ctx["repeat"])
+
+
+def _load_subset_pool(ctx):
+    try:
+        import pandas as pd
+        import subsets
+    except ImportError as e:
+        raise Skip(f"pandas yok: {e}")
+    import sqlite3
+    conn = sqlite3.connect(ctx["db"])
+    df_p = pd.read_sql_query("SELECT id, url, title, first_seen_ts, review_count, categories FROM products", conn)
+    df_r = pd.read_sql_query("SELECT id, product_id, review_hash, review_text, rating, page_no, collected_ts FROM reviews",
+                             conn)
+    conn.close()
+    df_p["cat_list"] = df_p["categories"].apply(subsets.parse_categories)
+    df_p["leaf_category"] = df_p["cat_list"].apply(lambda x: subsets.get_or_none(x, -1))
+    return subsets, df_r.merge(df_p, left_on="product_id", right_on="id", suffixes=("_rev", "_prod"))
+
+
+def bench_subsets(ctx):
+    subsets, df_merged = _load_subset_pool(ctx)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            out = subsets.build_diverse_balanced_sample(df_merged, target_total=5000)
+        return len(out)
+    res = timed(run, repeat=ctx["repeat"])
+    res["pool_rows"] = len(df_merged)
+    return res
+
+
+def bench_absa_loop(ctx):
+    try:
+        import absa_labelling as L
+        from llm_backends import StubBackend
+        import pydantic  # noqa: F401
+        import tenacity  # noqa: F401
+    except ImportError as e:
+        raise Skip(f"labeller bağımlılıkları yok: {e}")
+    import shutil
+    import sqlite3
+    n = ctx["absa_rows"]
+    latency = ctx["stub_latency"]
+
+    def run():
+        path = os.path.join(ctx["tmp"], "absa.db")
+        shutil.copyfile(ctx["db"], path)
+        conn = sqlite3.connect(path)
+        L.ensure_tables(conn)
+        rows = conn.execute("SELECT id, review_text FROM reviews ORDER BY id LIMIT ?", (n,)).fetchall()
+        L.backend = StubBackend(latency=latency, seed=0)
+        old_sleep, L.SLEEP_BETWEEN_CALLS = L.SLEEP_BETWEEN_CALLS, 0
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = L.label_rows(conn, rows)
+        finally:
+            L.SLEEP_BETWEEN_CALLS = old_sleep
+            conn.close()
+        return summary["counts"].get("ok", 0)
+    res = timed(run, repeat=ctx["repeat"])
+    res["stub_latency_s"] = latency
+    return res
+
+
+def bench_driver_hygiene(ctx):
+    try:
+        from driver_factory import ManagedDriver, browser_rss_mb
+        from selenium.common.exceptions import WebDriverException
+    except ImportError as e:
+        raise Skip(f"selenium yok: {e}")
+    from benchmarks.fixture_server import FixtureServer
+
+    n_pages = ctx["pages"]
+    out = {}
+    with FixtureServer(category_pages=n_pages) as srv:
+        urls = [srv.url(f"/fixture-kategori-c-1?sayfa={i}") for i in range(1, n_pages + 1)]
+        for block in (False, True):
+            driver = None
+            for browser in ("chrome", "edge"):
+                try:
+                    driver = ManagedDriver(browser=browser, headless=True, block_resources=block,
+                                           max_pages=0, rss_check_every=1)
+                    break
+                except WebDriverException:
+                    continue
+            if driver is None:
+                raise Skip("headless Chrome/Edge başlatılamadı")
+            try:
+                srv.reset_stats()
+                for u in urls:
+                    driver.get(u)
+                loads = sorted(ms for _, ms, _ in driver.page_stats)
+                rss = browser_rss_mb(driver)
+            finally:
+                driver.quit()
+            out["blocked" if block else "unblocked"] = {
+                "pages": len(loads),
+                "load_ms_mean": round(statistics.mean(loads), 1),
+                "load_ms_p95": round(loads[min(len(loads) - 1, int(0.95 * len(loads)))], 1),
+                "requests_per_page": round(srv.stats["requests"] / len(loads), 1),
+                "static_requests": srv.stats["static_requests"],
+                "kb_per_page": round(srv.stats["bytes"] / 1024 / len(loads), 1),
+                "rss_mb_end": round(rss, 1) if rss is not None else None,
+            }
+    # --compare için: engelli yükleme toplamı
+    out["seconds_best"] = round(out["blocked"]["load_ms_mean"] * n_pages / 1000, 4)
+    return out
+
+
+def bench_review_pagination(ctx):
+    try:
+        import hepsiburada_all as hb
+        from driver_factory import ManagedDriver, DriverPool
+        from reviews_db import init_db, get_or_create_product_id
+        from selenium.common.exceptions import WebDriverException
+        from selenium.webdriver.support.ui import WebDriverWait
+    except ImportError as e:
+        raise Skip(f"selenium yok: {e}")
+    from benchmarks.fixture_server import FixtureServer
+
+    def factory():
+        for browser in ("chrome", "edge"):
+            try:
+                return ManagedDriver(browser=browser, headless=True, max_pages=0)
+            except WebDriverException:
+                continue
+        raise Skip("headless Chrome/Edge başlatılamadı")
+
+    n_products = max(1, ctx["pages"] // 5)
+    out = {}
+    with FixtureServer() as srv, contextlib.redirect_stdout(io.StringIO()):
+        driver = factory()
+        try:
+            for mode, workers in (("sequential", 0), ("pool4", 4)):
+                pool = DriverPool(workers, factory=factory) if workers else None
+                try:
+                    def run():
+                        conn = init_db(os.path.join(ctx["tmp"], f"pagination-{mode}.db"))
+                        n = 0
+                        for i in range(n_products):
+                            url = srv.url(f"/fixture-urun-{i}-yorumlari?sayfa=1")
+                            pid = get_or_create_product_id(conn, url)
+                            driver.get(url)
+                            n += hb.scrape_current_review_view(driver, WebDriverWait(driver, 10), pid, conn,
+                                                               pool=pool)
+                        conn.close()
+                        return n
+                    out[mode] = timed(run, repeat=ctx["repeat"])
+                finally:
+                    if pool is not None:
+                        pool.close()
+        finally:
+            driver.quit()
+    out["seconds_best"] = out["pool4"]["seconds_best"]
+    return out
+
+
+def bench_sharded_writes(ctx):
+    import random
+    import shutil
+    import sqlite3
+    import threading
+    from reviews_db import init_db, get_or_create_product_id, save_reviews
+    from sharded_store import ShardedStore
+    n_threads, n_products, pages, per_page = 8, 40, 5, 10
+    rng = random.Random(2)
+    texts = [make_review_text(rng, r) for r in (1, 2, 3, 4, 5) for _ in range(20)]
+
+    def work(tid):
+        for p in range(n_products):
+            url = f"https://www.hepsiburada.com/bench-{tid}-{p}"
+            yield url, [[{"text": f"{rng.choice(texts)} #{tid}-{p}-{pg}-{i}", "rating": 1 + i % 5}
+                         for i in range(per_page)] for pg in range(pages)]
+    jobs = {t: list(work(t)) for t in range(n_threads)}
+    total = n_threads * n_products * pages * per_page
+
+    def run_threads(target):
+        ths = [threading.Thread(target=target, args=(t,)) for t in range(n_threads)]
+        for th in ths:
+            th.start()
+        for th in ths:
+            th.join()
+
+    def single():
+        path = os.path.join(ctx["tmp"], "single.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        init_db(path).close()
+
+        def target(tid):
+            conn = sqlite3.connect(path, timeout=60)
+            for url, page_items in jobs[tid]:
+                pid = get_or_create_product_id(conn, url)
+                for pg, items in enumerate(page_items, 1):
+                    save_reviews(conn, pid, items, pg)
+            conn.close()
+        run_threads(target)
+        return total
+
+    def sharded():
+        shard_dir = os.path.join(ctx["tmp"], "shards")
+        shutil.rmtree(shard_dir, ignore_errors=True)
+        store = ShardedStore(shard_dir, n_shards=4)
+
+        def target(tid):
+            for url, page_items in jobs[tid]:
+                pid = store.get_or_create_product_id(url)
+                for pg, items in enumerate(page_items, 1):
+                    store.save_reviews(pid, items, pg)
+        run_threads(target)
+        store.flush()
+        store.close()
+        return total
+
+    out = {"single_file": timed(single, repeat=ctx["repeat"]),
+           "sharded_4": timed(sharded, repeat=ctx["repeat"])}
+    out["seconds_best"] = out["sharded_4"]["seconds_best"]
+    out["speedup"] = round(out["single_file"]["seconds_best"] / out["seconds_best"], 2)
+    return out
+
+
+def bench_subset_coverage(ctx):
+    subsets, df_merged = _load_subset_pool(ctx)
+    from text_vectors import _tokens, coverage_stats, hashed_tfidf
+    X = hashed_tfidf(df_merged["review_text"].fillna("").tolist())
+    pos = {rid: i for i, rid in enumerate(df_merged["id_rev"])}
+    out = {}
+    for sampler in ("random", "coverage"):
+        picked = {}
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                picked["df"] = subsets.build_diverse_balanced_sample(df_merged, target_total=5000, sampler=sampler)
+            return len(picked["df"])
+        res = timed(run, repeat=ctx["repeat"])
+        texts = picked["df"]["review_text"].fillna("")
+        grams = {g for t in texts for g in _tokens(t)}
+        chars = int(texts.str.len().sum())
+        res.update({"distinct_ngrams": len(grams), "input_chars": chars,
+                    "distinct_per_kchar": round(1000.0 * len(grams) / max(chars, 1), 3)})
+        res.update(coverage_stats(X, [pos[r] for r in picked["df"]["id_rev"]]))
+        out[sampler] = res
+    out["seconds_best"] = out["coverage"]["seconds_best"]
+    return out
+
+
+def bench_zstd_storage(ctx):
+    import shutil
+    import sqlite3
+    import zstd_store
+    if zstd_store.zstandard is None:
+        raise Skip("zstandard yok")
+    path = os.path.join(ctx["tmp"], "zstd.db")
+    shutil.copyfile(ctx["db"], path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("VACUUM")
+    tables = [t for t in zstd_store.COMPRESSED_COLUMNS
+              if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (t,)).fetchone()]
+    conn.close()
+
+    def scans(c):
+        # subsets/labeller'ın yaptığı gibi metin kolonunu baştan sona okur
+        out = {}
+        for t in tables:
+            col = zstd_store.COMPRESSED_COLUMNS[t]
+
+            def run():
+                return sum(1 for _ in c.execute(f"SELECT rowid, {col} FROM {t}"))
+            out[t] = timed(run, repeat=ctx["repeat"])
+        return out
+
+    res = {"plain_file_bytes": os.path.getsize(path)}
+    c = sqlite3.connect(path)
+    res["plain_scan"] = scans(c)
+    c.close()
+
+    conn = sqlite3.connect(path)
+    t0 = time.perf_counter()
+    res["compress"] = {t: zstd_store.compress_table(conn, t, zstd_store.COMPRESSED_COLUMNS[t]) for t in tables}
+    conn.execute("VACUUM")
+    res["compress_s"] = round(time.perf_counter() - t0, 3)
+    conn.close()
+    res["zstd_file_bytes"] = os.path.getsize(path)
+    res["size_ratio"] = round(res["plain_file_bytes"] / res["zstd_file_bytes"], 2)
+    for t, r in res["compress"].items():
+        r["ratio"] = round(r["raw_bytes"] / r["z_bytes"], 2) if r["z_bytes"] else None
+
+    c = zstd_store.open_db(path)
+    res["zstd_scan"] = scans(c)
+    c.close()
+    res["scan_slowdown"] = {t: round(res["zstd_scan"][t]["seconds_best"] / res["plain_scan"][t]["seconds_best"], 2)
+                            for t in tables if res["plain_scan"][t]["seconds_best"]}
+    res["seconds_best"] = sum(res["zstd_scan"][t]["seconds_best"] for t in tables)
+    return res
+
+
+WIRE_TOKEN_LATENCY = 0.0005   # sn / çıktı token'ı (stub'da decode süresi simülasyonu)
+
+
+def _agreement_rates(pairs):
+    from absa_wire import agreement
+    tot = {}
+    for ref, other in pairs:
+        for k, v in agreement(ref, other).items():
+            tot[k] = tot.get(k, 0) + v
+    m = tot.get("matched", 0)
+    return {"aspects_ref": tot.get("ref", 0), "aspects_other": tot.get("other", 0),
+            "recall": round(m / tot["ref"], 4) if tot.get("ref") else None,
+            **{k: round(tot[k] / m, 4) if m else None for k in ("sentiment", "category", "span")}}
+
+
+def bench_wire_schema(ctx):
+    try:
+        from llm_backends import WIRES, StubBackend, estimate_tokens
+        from absa_schema import ABSAResponse
+        from absa_wire import OTHER, decode_compact, encode_compact
+    except ImportError as e:
+        raise Skip(f"labeller bağımlılıkları yok: {e}")
+    import sqlite3
+    conn = sqlite3.connect(ctx["db"])
+    texts = [r[0] for r in conn.execute("SELECT review_text FROM reviews WHERE TRIM(review_text) <> '' "
+                                        "ORDER BY id LIMIT ?", (min(ctx["absa_rows"], 1000),))]
+    recorded = []
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='absa_raw'").fetchone():
+        recorded = conn.execute("SELECT r.review_text, a.response_json FROM absa_raw a "
+                                "JOIN reviews r ON r.id = a.review_id").fetchall()
+    conn.close()
+
+    # A) stub: aynı deterministik cevap iki şemayla
+    out = {"stub": {}, "token_latency_s": WIRE_TOKEN_LATENCY}
+    parsed = {}
+    for wire in WIRES:
+        be = StubBackend(seed=0, token_latency=WIRE_TOKEN_LATENCY, wire=wire)
+        usage = {}
+
+        def run():
+            res = []
+            for i in range(0, len(texts), be.batch_size):
+                res.extend(be.batch_raw(texts[i:i + be.batch_size]))
+            parsed[wire] = [r[0] for r in res]
+            usage["output_tokens"] = sum(r[1]["output_tokens"] for r in res)
+            usage["prompt_tokens"] = sum(r[1]["prompt_tokens"] for r in res)
+            return len(res)
+        r = timed(run, repeat=ctx["repeat"])
+        r.update(usage)
+        out["stub"][wire] = r
+    out["stub"]["output_token_ratio"] = round(
+        out["stub"]["compact"]["output_tokens"] / max(1, out["stub"]["full"]["output_tokens"]), 3)
+    out["stub"]["agreement"] = _agreement_rates(zip(parsed["full"], parsed["compact"]))
+
+    # B) kayıtlı (gerçek model) cevaplar: kompakta kodla, boyut/parse/uyum
+    if recorded:
+        fulls = [ABSAResponse.model_validate_json(js) for _, js in recorded]
+        compacts = [json.dumps(encode_compact(f, t), ensure_ascii=False, separators=(",", ":"))
+                    for f, (t, _) in zip(fulls, recorded)]
+
+        # LangChain yapısal çıktısı dict verir: json.loads + model_validate karşılaştırılır;
+        # parse_full_json: ham JSON'u pydantic-core'da tek adımda doğrulama (referans)
+        def parse_full():
+            for _, js in recorded:
+                ABSAResponse.model_validate(json.loads(js))
+            return len(recorded)
+
+        def parse_full_json():
+            for _, js in recorded:
+                ABSAResponse.model_validate_json(js)
+            return len(recorded)
+
+        def parse_compact():
+            for cj, (t, _) in zip(compacts, recorded):
+                decode_compact(json.loads(cj), t)
+            return len(recorded)
+        decoded = [decode_compact(json.loads(cj), t) for cj, (t, _) in zip(compacts, recorded)]
+        n_items = sum(len(json.loads(cj)["x"]) for cj in compacts)
+        n_other = sum(x["c"] == OTHER for cj in compacts for x in json.loads(cj)["x"])
+        out["recorded"] = {
+            "responses": len(recorded),
+            "full_chars": sum(len(js) for _, js in recorded),
+            "compact_chars": sum(len(cj) for cj in compacts),
+            "full_tokens_est": sum(estimate_tokens(js) for _, js in recorded),
+            "compact_tokens_est": sum(estimate_tokens(cj) for cj in compacts),
+            "parse_full": timed(parse_full, repeat=ctx["repeat"]),
+            "parse_full_json": timed(parse_full_json, repeat=ctx["repeat"]),
+            "parse_compact": timed(parse_compact, repeat=ctx["repeat"]),
+            "category_other_pct": round(100.0 * n_other / n_items, 1) if n_items else None,
+            "agreement": _agreement_rates(zip(fulls, decoded)),
+        }
+    out["seconds_best"] = out["stub"]["compact"]["seconds_best"]
+    return out
+
+
+# ---------- çalıştırıcı ----------
+def compare(current: dict, previous: dict):
+    print("\n===== karşılaştırma (best süre, yeni/eski) =====")
+    for name, cur in current["results"].items():
+        prev = previous.get("results", {}).get(name)
+        if not prev or "seconds_best" not in cur or "seconds_best" not in prev:
+            continue
+        ratio = cur["seconds_best"] / prev["seconds_best"] if prev["seconds_best"] else float("nan")
+        flag = "  <-- REGRESYON" if ratio > 1.10 else ""
+        print(f"{name:16s} {prev['seconds_best']:9.4f}s → {cur['seconds_best']:9.4f}s  x{ratio:.2f}{flag}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ASBA-NLP benchmark paketi")
+    ap.add_argument("--products", type=int, default=1000)
+    ap.add_argument("--reviews", type=int, default=50000)
+    ap.add_argument("--absa-rows", type=int, default=2000)
+    ap.add_argument("--stub-latency", type=float, default=0.0)
+    ap.add_argument("--pages", type=int, default=20, help="scraper_extract için sayfa sayısı")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--only", default=",".join(BENCHMARKS))
+    ap.add_argument("--db", default=None, help="hazır sentetik DB (verilmezse üretilir)")
+    ap.add_argument("--out", default=os.path.join(REPO_ROOT, "benchmarks", "results"))
+    ap.add_argument("--compare", default=None, help="önceki sonuç JSON'u")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = args.db
+        gen_s = None
+        if db is None:
+            db = os.path.join(tmp, "synthetic.db")
+            t0 = time.perf_counter()
+            generate_db(db, args.products, args.reviews)
+            gen_s = round(time.perf_counter() - t0, 3)
+
+        ctx = {"db": db, "tmp": tmp, "repeat": args.repeat, "pages": args.pages,
+               "absa_rows": args.absa_rows, "stub_latency": args.stub_latency}
+        result = {
+            "git_sha": git_sha(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+            "corpus_generation_s": gen_s,
+            "results": {},
+        }
+        for name in args.only.split(","):
+            name = name.strip()
+            fn = globals().get(f"bench_{name}")
+            if fn is None:
+                print(f"[?] bilinmeyen benchmark: {name}")
+                continue
+            print(f"[bench] {name} ...", flush=True)
+            try:
+                result["results"][name] = fn(ctx)
+            except Skip as s:
+                result["results"][name] = {"skipped": str(s)}
+            except Exception as e:
+                traceback.print_exc()
+                result["results"][name] = {"error": repr(e)}
+            print(f"        {result['results'][name]}")
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['git_sha']}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nSonuçlar: {out_path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(result, json.load(f))
+    return result
+
+
+if __name__ == "__main__":
+    main()
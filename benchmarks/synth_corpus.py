@@ -0,0 +1,132 @@
+# synth_corpus.py
+# Sentetik products/reviews veritabanı üretir (gerçek şemayla aynı).
+#   - yorumlar Türkçe-benzeri şablon cümlelerden, log-normal uzunlukta
+#   - rating dağılımı gerçek veriye benzer şekilde 5 yıldıza yığılmış
+#   - products.categories categorize.py'nin yazdığı gibi virgüllü breadcrumb
+# Aynı seed ile her zaman aynı DB çıkar.
+import argparse
+import hashlib
+import math
+import os
+import random
+import time
+
+from benchmarks import REPO_ROOT  # noqa: F401  (sys.path ayarı)
+from reviews_db import init_db
+
+# (ana kategori, ara kategori, leaf kategoriler)
+CATEGORY_TREE = [
+    ("Elektronik", "Telefon Aksesuarları", ["Şarj Cihazı", "Kılıf", "Kablo", "Powerbank"]),
+    ("Elektronik", "Bilgisayar", ["Mouse", "Klavye", "Monitör", "Laptop Çantası"]),
+    ("Moda", "Kadın Giyim", ["Elbise", "Tişört", "Mont"]),
+    ("Moda", "Ayakkabı", ["Spor Ayakkabı", "Bot", "Terlik"]),
+    ("Ev Yaşam", "Mutfak Gereçleri", ["Tencere", "Tava", "Bıçak Seti"]),
+    ("Anne Bebek", "Bebek Bakım", ["Bebek Bezi", "Islak Mendil", "Biberon"]),
+    ("Kozmetik", "Cilt Bakımı", ["Nemlendirici", "Güneş Kremi"]),
+    ("Kitap", "Edebiyat", ["Roman", "Öykü"]),
+]
+
+ASPECT_WORDS = ["kargo", "paketleme", "fiyat", "kalite", "malzeme", "şarj", "pil ömrü",
+                "ekran", "ses", "beden", "renk", "satıcı", "teslimat", "kumaş", "dikiş"]
+POS_PHRASES = ["çok güzel", "harika", "beklediğimden iyi", "gayet başarılı", "fiyatına göre süper",
+               "çok memnun kaldım", "hızlı geldi", "tavsiye ederim", "sağlam duruyor"]
+NEG_PHRASES = ["berbat", "hiç beğenmedim", "kırık geldi", "çok geç geldi", "iade ettim",
+               "beklediğim gibi değil", "kalitesiz", "bir haftada bozuldu", "pişman oldum"]
+NEUTRAL_PHRASES = ["idare eder", "normal", "fena değil", "fiyatına göre olur", "ortalama"]
+FILLERS = ["ürün", "gerçekten", "bence", "ama", "ve", "yine de", "açıkçası", "biraz", "gayet",
+           "hemen", "tam", "olarak", "bu", "için", "çok", "daha"]
+SHORT_REVIEWS = ["Teşekkürler", "Güzel", "Harika ürün", "Beğendim", "Süper", "İdare eder", "Kötü"]
+
+# 1..5 yıldız olasılıkları (gerçek korpusa yakın: pozitif yığılma + 1 yıldızda küçük tepe)
+RATING_WEIGHTS = [0.11, 0.04, 0.07, 0.16, 0.62]
+
+
+def _sentence(rng: random.Random, rating: int) -> str:
+    aspect = rng.choice(ASPECT_WORDS)
+    if rating >= 4:
+        phrase = rng.choice(POS_PHRASES)
+    elif rating <= 2:
+        phrase = rng.choice(NEG_PHRASES)
+    else:
+        phrase = rng.choice(NEUTRAL_PHRASES + POS_PHRASES[:2] + NEG_PHRASES[:2])
+    filler = " ".join(rng.choice(FILLERS) for _ in range(rng.randint(0, 4)))
+    s = f"{aspect} {filler} {phrase}".replace("  ", " ").strip()
+    return s[0].upper() + s[1:]
+
+
+def make_review_text(rng: random.Random, rating: int) -> str:
+    """Log-normal karakter uzunluğuna ulaşana kadar cümle ekler (medyan ~110 karakter)."""
+    if rng.random() < 0.08:
+        return rng.choice(SHORT_REVIEWS)
+    target = min(1500, int(math.exp(rng.gauss(4.7, 0.8))))
+    parts, n = [], 0
+    while n < target:
+        s = _sentence(rng, rating)
+        parts.append(s)
+        n += len(s) + 2
+    return ". ".join(parts) + rng.choice([".", "!", "", " 👍"])
+
+
+def make_categories(rng: random.Random) -> str:
+    main, mid, leaves = rng.choice(CATEGORY_TREE)
+    # categorize.py breadcrumb'ı ","-join ile yazar; ilk eleman çoğu zaman boş
+    return ",".join(["", main, mid, rng.choice(leaves)])
+
+
+def generate_db(db_path: str, n_products: int = 1000, n_reviews: int = 100000,
+                seed: int = 42, with_review_count: bool = True) -> str:
+    """db_path'e sentetik korpus yazar (varsa silinir)."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    rng = random.Random(seed)
+    conn = init_db(db_path)
+    conn.execute("ALTER TABLE products ADD COLUMN categories TEXT")
+    # review_count kolonu init_db'den gelir; with_review_count=False ise boş kalır
+
+    now = int(time.time())
+    products = []
+    for pid in range(1, n_products + 1):
+        products.append((pid, f"https://www.hepsiburada.com/urun-{pid}-p-HB{pid:08d}",
+                         f"Ürün {pid}", now - rng.randint(0, 90 * 86400), make_categories(rng)))
+    conn.executemany("INSERT INTO products(id, url, title, first_seen_ts, categories) VALUES (?,?,?,?,?)",
+                     products)
+
+    # ürün popülerliği Zipf benzeri: az sayıda ürün yorumların çoğunu alır
+    weights = [1.0 / (i ** 0.9) for i in range(1, n_products + 1)]
+    pids = rng.choices(range(1, n_products + 1), weights=weights, k=n_reviews)
+
+    rows, counts = [], {}
+    for pid in pids:
+        rating = rng.choices((1, 2, 3, 4, 5), weights=RATING_WEIGHTS)[0]
+        text = make_review_text(rng, rating)
+        k = counts.get(pid, 0)
+        counts[pid] = k + 1
+        # aynı ürün için aynı metin gelirse hash'i tekilleştir
+        h = hashlib.sha256(f"{text}\x00{k}".encode("utf-8")).hexdigest()
+        rows.append((pid, h, text, rating, 1 + k // 10, now - rng.randint(0, 30 * 86400)))
+        if len(rows) >= 50000:
+            conn.executemany("INSERT INTO reviews(product_id, review_hash, review_text, rating, page_no, collected_ts) "
+                             "VALUES (?,?,?,?,?,?)", rows)
+            rows = []
+    if rows:
+        conn.executemany("INSERT INTO reviews(product_id, review_hash, review_text, rating, page_no, collected_ts) "
+                         "VALUES (?,?,?,?,?,?)", rows)
+    if with_review_count:
+        conn.executemany("UPDATE products SET review_count=? WHERE id=?", [(c, p) for p, c in counts.items()])
+        conn.execute("UPDATE products SET review_count=0 WHERE review_count IS NULL")
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sentetik reviews DB üretici")
+    ap.add_argument("db")
+    ap.add_argument("--products", type=int, default=1000)
+    ap.add_argument("--reviews", type=int, default=100000)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    generate_db(args.db, args.products, args.reviews, args.seed)
+    print(f"{args.db}: {args.products} ürün, {args.reviews} yorum ({time.perf_counter() - t0:.1f}s)")
@@ -1,15 +1,19 @@
+import os
 import sqlite3
 from contextlib import closing
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import time
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scrappers"))
+from driver_factory import ManagedDriver
 
 # ================== AYARLAR ==================
-DB_PATH = r"C:\\Projects\\NLP\\ASBA\\Scrapper\\reviews_V2.db"
+DB_PATH = os.getenv("ABSA_DB_PATH", r"C:\\Projects\\NLP\\ASBA\\Scrapper\\reviews_V2.db")
 TABLE_NAME = "products"
 URL_COLUMN = "url"
 ID_COLUMN = "id"
@@ -59,8 +63,10 @@ def update_row(product_id, categories):
 
 # ================== SELENIUM ==================
 def create_driver(headless=True):
-    driver = webdriver.Edge()
-    return driver
+    # Kategori için sadece breadcrumb lazım: görsel/font/reklam engellenir,
+    # uzun listelerde driver belirli aralıklarla yeniden başlatılır.
+    return ManagedDriver(browser="edge", headless=headless, block_resources=True,
+                         max_pages=300, max_rss_mb=1500)
 
 
 def scrape_page(driver, url):
@@ -0,0 +1,12 @@
+# Testler repo'daki scriptleri kendi klasörlerindeki isimleriyle import eder;
+# sys.path ayarı benchmarks paketinde (Scrappers, DataProcessing, RAG_2_ASBA).
+import pytest
+
+import benchmarks  # noqa: F401
+from benchmarks.synth_corpus import generate_db
+
+
+@pytest.fixture
+def synth_db(tmp_path):
+    """2000 yorumluk sentetik korpus (sabit seed)."""
+    return generate_db(str(tmp_path / "reviews.db"), n_products=50, n_reviews=2000, seed=7)
@@ -0,0 +1,71 @@
+import time
+
+import absa_labelling
+from llm_backends import StubBackend, StubBackendError
+
+
+class _FailingStub(StubBackend):
+    """Belirli yorumlarda hep hata veren stub."""
+
+    def __init__(self, bad):
+        super().__init__()
+        self.bad = set(bad)
+
+    def batch_raw(self, texts):
+        return [StubBackendError("x") if t in self.bad else self._respond_raw(t) for t in texts]
+
+    def invoke_raw(self, review_text):
+        if review_text in self.bad:
+            raise StubBackendError("x")
+        return self._respond_raw(review_text)
+
+
+def test_call_batch_latency_once_per_batch_and_real_retry_count(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda s: None)   # tenacity bekleme süreleri
+    texts = ["kargo hızlı", "fiyat pahalı", "ses güzel"]
+    monkeypatch.setattr(absa_labelling, "backend", _FailingStub(bad={"fiyat pahalı"}))
+    out = absa_labelling.call_batch(texts)
+
+    assert out[0][2] is not None and out[0][4] == 3 and out[0][3] == 0
+    assert out[2][2] is None and out[2][4] == 3
+    err, _, latency_ms, retries, batch_n = out[1]
+    assert isinstance(err, StubBackendError)
+    assert latency_ms is not None and batch_n == 1
+    assert retries == 3 == err.attempts
+
+
+def test_daemon_skips_run_summary_and_batch_sleep(synth_db, monkeypatch, capsys):
+    from argparse import Namespace
+
+    slept = []
+    monkeypatch.setattr(time, "sleep", slept.append)
+    monkeypatch.setattr(absa_labelling, "backend", StubBackend())
+    conn = absa_labelling.open_db(synth_db)
+    conn.execute("DELETE FROM reviews WHERE id > 40")
+    conn.commit()
+    args = Namespace(batch=8, lease_s=60.0, once=True, min_poll=0.01, max_poll=0.01, include_skipped=True)
+    totals = absa_labelling.cmd_daemon(conn, args)
+
+    assert totals[0] == conn.execute("SELECT COUNT(*) FROM absa_raw").fetchone()[0] > 0
+    assert absa_labelling.SLEEP_BETWEEN_CALLS not in slept
+    out = capsys.readouterr().out
+    assert "ABSA run özeti" not in out and "[SPAN]" not in out
+    assert out.count("[daemon] +") == 5
+
+
+def test_status_on_partial_schemas(synth_db, capsys):
+    import json
+    from argparse import Namespace
+
+    conn = absa_labelling.open_db(synth_db)
+    conn.execute("CREATE TABLE review_quality (review_id INTEGER PRIMARY KEY, skip_reason TEXT)")
+    absa_labelling.cmd_status(conn, Namespace(db=synth_db))   # absa_raw yok
+    out = json.loads(capsys.readouterr().out)
+    assert "models" not in out and out["quality_skipped_pending"] is None
+
+    conn.execute("DROP TABLE review_quality")
+    absa_labelling.ensure_tables(conn)
+    conn.execute("INSERT INTO absa_raw (review_id, model_name, prompt_hash, response_json) VALUES (1, 'm', 'h', '{}')")
+    absa_labelling.cmd_status(conn, Namespace(db=synth_db))   # review_quality yok
+    out = json.loads(capsys.readouterr().out)
+    assert out["models"] == {"m": 1} and "quality_skipped_pending" not in out
@@ -0,0 +1,84 @@
+import sqlite3
+import time
+
+import pytest
+
+import absa_queue as q
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "q.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE reviews (id INTEGER PRIMARY KEY, review_text TEXT)")
+    conn.executemany("INSERT INTO reviews (review_text) VALUES (?)", [("eski yorum",), ("  ",)])
+    conn.commit()
+    assert q.init_queue(conn) == 1          # boş metin kuyruğa girmez
+    return path, conn
+
+
+def _queued(conn):
+    return [r[0] for r in conn.execute(f"SELECT review_id FROM {q.QUEUE_TABLE} ORDER BY review_id")]
+
+
+def test_insert_trigger_feeds_queue(db):
+    _, conn = db
+    conn.executemany("INSERT INTO reviews (review_text) VALUES (?)", [("yeni",), ("",), (None,), ("bir tane daha",)])
+    conn.commit()
+    assert _queued(conn) == [1, 3, 6]
+    assert q.init_queue(conn) == 0          # ikinci kurulum backfill yapmaz
+
+
+def test_lease_is_exclusive_across_connections_and_expires(db):
+    path, conn = db
+    conn.executemany("INSERT INTO reviews (review_text) VALUES (?)", [(f"y{i}",) for i in range(5)])
+    conn.commit()
+    other = sqlite3.connect(path)
+    a = q.lease_batch(conn, "a", 3, lease_s=0.2)
+    b = q.lease_batch(other, "b", 10, lease_s=60)
+    assert [i for i, _ in a] == [1, 3, 4] and [i for i, _ in b] == [5, 6, 7]
+    assert q.lease_batch(other, "b", 10) == []
+
+    time.sleep(0.25)
+    assert q.lease_batch(other, "b", 10) == [(1, 2), (3, 2), (4, 2)]   # süresi dolan lease el değiştirir
+
+
+def test_ack_release_abandon(db):
+    _, conn = db
+    conn.executemany("INSERT INTO reviews (review_text) VALUES (?)", [("x",), ("y",)])
+    conn.commit()
+    leased = q.lease_batch(conn, "w", 10)
+    assert [i for i, _ in leased] == [1, 3, 4]
+
+    q.ack(conn, [1])
+    assert _queued(conn) == [3, 4]
+    assert q.release(conn, [(3, 1), (4, q.MAX_ATTEMPTS)], backoff_s=60) == 1
+    assert _queued(conn) == [3]
+    owner, until = conn.execute(f"SELECT lease_owner, lease_until FROM {q.QUEUE_TABLE}").fetchone()
+    assert owner is None and until > time.time() + 30     # geri bırakılan kayıt gecikmeli görünür
+    assert q.lease_batch(conn, "w", 10) == []
+    assert q.queue_stats(conn)["retry_wait"] == 1
+
+    conn.execute(f"UPDATE {q.QUEUE_TABLE} SET lease_until = 0")
+    assert q.lease_batch(conn, "w", 10) == [(3, 2)]
+    q.abandon(conn, "w")
+    assert conn.execute(f"SELECT lease_owner, lease_until FROM {q.QUEUE_TABLE}").fetchone() == (None, 0)
+    assert q.next_visible_ts(conn) == 0
+
+
+def test_adaptive_poller_backoff_and_wake_on_commit(db):
+    path, conn = db
+    poller = q.AdaptivePoller(conn, min_s=0.01, max_s=0.04, tick_s=0.005)
+    assert poller.wait() is False and poller.delay == 0.02
+    assert poller.wait() is False and poller.delay == 0.04
+    assert poller.wait() is False and poller.delay == 0.04
+    poller.hit()
+    assert poller.delay == 0.01
+
+    other = sqlite3.connect(path)
+    other.execute("INSERT INTO reviews (review_text) VALUES ('başka süreçten')")
+    other.commit()
+    poller.max_s = poller.delay = 5.0
+    t0 = time.time()
+    assert poller.wait() is True
+    assert time.time() - t0 < 1.0
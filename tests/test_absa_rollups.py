@@ -0,0 +1,124 @@
+import random
+import sqlite3
+
+import absa_labelling
+import absa_rollups
+import absa_spans
+
+
+def _rollup(conn):
+    return sorted(conn.execute("SELECT product_id, category, sentiment, n FROM absa_rollup WHERE n > 0"))
+
+
+def _seed_aspects(conn, n_reviews=300, seed=3):
+    """Her yoruma 1-3 aspect; opinion_terms'in bir kısmı metinde yok (hallucinated)."""
+    rng = random.Random(seed)
+    rows = []
+    for rid, text in conn.execute("SELECT id, review_text FROM reviews ORDER BY id LIMIT ?", (n_reviews,)):
+        words = text.split()
+        for k in range(rng.randint(1, 3)):
+            term = rng.choice(words) if rng.random() < 0.8 else "uydurma ifade"
+            rows.append((rid, f"a{k}", rng.choice(["İade", "IŞIK", "kargo", "Fiyat"]),
+                         rng.choice(["positive", "negative"]), term, rng.random()))
+    conn.executemany("INSERT OR IGNORE INTO absa_aspects (review_id, aspect, category, sentiment, "
+                     "opinion_terms, confidence) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+
+def test_turkish_category_fold():
+    assert absa_rollups.norm_category(" İade ") == "iade"
+    assert absa_rollups.norm_category("IŞIK") == "ışık"
+
+
+def test_hallucinated_aspects_leave_the_rollup(synth_db):
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    _seed_aspects(conn)
+    absa_rollups.refresh_rollups(conn, commit=True)
+    stats = absa_spans.verify_pending(conn)
+    assert stats.get(absa_spans.SPAN_HALLUCINATED)
+
+    incremental = _rollup(conn)
+    counted = conn.execute("SELECT COUNT(*) FROM absa_aspects WHERE span_status <> ?",
+                           (absa_spans.SPAN_HALLUCINATED,)).fetchone()[0]
+    assert sum(r[3] for r in incremental) == counted
+    assert {r[1] for r in incremental} == {"iade", "ışık", "kargo", "fiyat"}
+
+    absa_rollups.rebuild_rollups(conn)
+    assert _rollup(conn) == incremental
+
+
+def test_old_rollup_version_is_rebuilt(synth_db):
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    _seed_aspects(conn)
+    absa_rollups.refresh_rollups(conn, commit=True)
+    expected = _rollup(conn)
+    conn.execute("UPDATE absa_rollup SET category = 'i̇ade' WHERE category = 'iade'")
+    conn.execute("UPDATE absa_rollup_state SET version = 1")
+    assert absa_rollups.refresh_rollups(conn) > 0
+    assert _rollup(conn) == expected
+
+
+def test_leaf_queries_use_products_leaf_category(synth_db):
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    _seed_aspects(conn, n_reviews=1000)
+    absa_rollups.refresh_rollups(conn, commit=True)
+
+    leaf = conn.execute("SELECT leaf_category FROM products p JOIN absa_rollup r ON r.product_id = p.id "
+                        "LIMIT 1").fetchone()[0]
+    pids = {pid for pid, cats in conn.execute("SELECT id, categories FROM products")
+            if cats.rstrip(",").split(",")[-1] == leaf}
+    expected = {}
+    for pid, cat, sent, n in _rollup(conn):
+        if pid in pids:
+            expected[(cat, sent)] = expected.get((cat, sent), 0) + n
+
+    share = absa_rollups.sentiment_share(conn, leaf_category=leaf)
+    assert {(c, s): n for c, d in share.items() for s, n in d["counts"].items()} == expected
+    by_leaf = absa_rollups.leaf_sentiment_share(conn)
+    assert by_leaf[leaf] == share
+    assert set(absa_rollups.product_ids_for_leaf(conn, leaf)) <= pids
+
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM products WHERE leaf_category = ?", (leaf,)))
+    assert "idx_products_leaf" in plan
+
+
+def test_leaf_queries_are_read_only(synth_db):
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    _seed_aspects(conn, n_reviews=500)
+    absa_rollups.refresh_rollups(conn, commit=True)
+    leaf = conn.execute("SELECT leaf_category FROM products p JOIN absa_rollup r ON r.product_id = p.id "
+                        "LIMIT 1").fetchone()[0]
+    expected = (absa_rollups.sentiment_share(conn, leaf_category=leaf), absa_rollups.leaf_sentiment_share(conn),
+                absa_rollups.product_ids_for_leaf(conn, leaf))
+    # kolonu olmayan eski DB: sorgular şemaya dokunmadan aynı sonucu verir
+    conn.execute("DROP INDEX idx_products_leaf")
+    conn.execute("ALTER TABLE products DROP COLUMN leaf_category")
+    conn.commit()
+    conn.close()
+
+    ro = sqlite3.connect(f"file:{synth_db}?mode=ro", uri=True)
+    got = (absa_rollups.sentiment_share(ro, leaf_category=leaf), absa_rollups.leaf_sentiment_share(ro),
+           absa_rollups.product_ids_for_leaf(ro, leaf))
+    assert got == expected
+    assert "leaf_category" not in {r[1] for r in ro.execute("PRAGMA table_xinfo(products)")}
+
+
+def test_label_rows_refreshes_rollup_once_per_batch(synth_db, monkeypatch):
+    from llm_backends import StubBackend
+
+    calls = []
+    monkeypatch.setattr(absa_labelling, "backend", StubBackend())
+    monkeypatch.setattr(absa_labelling, "refresh_rollups",
+                        lambda conn: calls.append(absa_rollups.refresh_rollups(conn)))
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    rows = conn.execute("SELECT id, review_text FROM reviews LIMIT ?", (absa_labelling.BATCH_SIZE * 2,)).fetchall()
+    absa_labelling.label_rows(conn, rows, quiet=True)
+    assert len(calls) == 2
+    counted = conn.execute("SELECT COUNT(*) FROM absa_aspects "
+                           "WHERE COALESCE(span_status, '') NOT LIKE 'hallucinated%'").fetchone()[0]
+    assert conn.execute("SELECT SUM(n) FROM absa_rollup").fetchone()[0] == counted
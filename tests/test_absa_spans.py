@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+import absa_labelling
+import absa_rollups
+import absa_spans
+from absa_spans import (SPAN_EMPTY, SPAN_EXACT, SPAN_FOLD, SPAN_FUZZY, SPAN_HALLUCINATED, SPAN_OK,
+                        locate_span)
+
+TEXT = "Kargo çok hızlı geldi, İADE süreci ise berbattı."
+
+
+def test_locate_span_exact_offsets():
+    s = TEXT.index("çok hızlı")
+    assert locate_span(TEXT, "çok hızlı", s, s + 9) == (SPAN_OK, s, s + 9, 1.0)
+
+
+def test_locate_span_rejects_out_of_range_offsets():
+    # negatif offset'ler Python dilimlemesinde metnin sonundan sayar; ok sayılmamalı
+    n = len(TEXT)
+    assert TEXT[n - 9:n - 1] == "berbattı"
+    status, s, e, _ = locate_span(TEXT, "berbattı", -9, -1)
+    assert status == SPAN_EXACT and (s, e) == (n - 9, n - 1)
+    assert locate_span(TEXT, "Kargo", 0, 5)[0] == SPAN_OK
+    assert locate_span(TEXT, "Kargo", 5, 0)[0] == SPAN_EXACT
+    assert locate_span(TEXT, "Kargo", 0, n + 10)[0] == SPAN_EXACT
+
+
+def test_locate_span_prefers_occurrence_near_hint():
+    text = "iyi paket, iyi kargo, iyi fiyat"
+    assert locate_span(text, "iyi", 20, 23)[1] == text.index("iyi fiyat")
+
+
+def test_locate_span_turkish_fold_keeps_offsets():
+    status, s, e, _ = locate_span(TEXT, "iade süreci")
+    assert status == SPAN_FOLD and TEXT[s:e] == "İADE süreci"
+
+
+def test_locate_span_fuzzy_and_hallucinated():
+    status, s, e, score = locate_span(TEXT, "kargo cok hizli geldi")
+    assert status == SPAN_FUZZY and score >= absa_spans.FUZZY_MIN_SCORE
+    assert TEXT[s:e].startswith("Kargo")
+    assert locate_span(TEXT, "ekran parlaklığı mükemmel")[0] == SPAN_HALLUCINATED
+    assert locate_span(TEXT, "  ")[0] == SPAN_EMPTY
+
+
+def test_requeue_deletes_old_aspects_and_rollup(synth_db):
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    (rid, text), (other, other_text) = conn.execute("SELECT id, review_text FROM reviews LIMIT 2").fetchall()
+    conn.execute("INSERT INTO absa_raw(review_id, response_json) VALUES (?, '{}'), (?, '{}')", (rid, other))
+    conn.executemany("INSERT INTO absa_aspects (review_id, aspect, category, sentiment, opinion_terms) "
+                     "VALUES (?, ?, 'kargo', 'positive', ?)",
+                     [(rid, "a", text.split()[0]), (rid, "b", "yok böyle bir şey"), (rid, "c", "bu da yok"),
+                      (other, "a", other_text.split()[0])])
+    absa_rollups.refresh_rollups(conn)
+    absa_spans.verify_pending(conn)
+    conn.commit()
+    assert conn.execute("SELECT SUM(n) FROM absa_rollup").fetchone()[0] == 2
+
+    assert absa_spans.requeue_hallucinated(conn) == 1
+    assert conn.execute("SELECT review_id FROM absa_aspects").fetchall() == [(other,)]
+    assert conn.execute("SELECT review_id FROM absa_raw").fetchall() == [(other,)]
+    assert conn.execute("SELECT SUM(n) FROM absa_rollup").fetchone()[0] == 1
+    assert absa_spans.requeue_hallucinated(conn) == 0
+
+
+def test_relabel_replaces_previous_aspects(synth_db):
+    pytest.importorskip("pydantic")
+    from absa_schema import ABSAResponse
+
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    rid = conn.execute("SELECT id FROM reviews LIMIT 1").fetchone()[0]
+    item = {"aspect": "kargo", "category": "kargo", "sentiment": "positive", "opinion_terms": "hızlı"}
+    first = ABSAResponse.model_validate({"aspects": [item, dict(item, aspect="fiyat", category="fiyat")]})
+    absa_labelling.upsert_results(conn, rid, "h", first, model_name="test")
+    absa_labelling.upsert_results(conn, rid, "h", ABSAResponse.model_validate({"aspects": [item]}),
+                                  model_name="test")
+    assert conn.execute("SELECT aspect FROM absa_aspects WHERE review_id = ?", (rid,)).fetchall() == [("kargo",)]
+    assert conn.execute("SELECT category, n FROM absa_rollup").fetchall() == [("kargo", 1)]
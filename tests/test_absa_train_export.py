@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+
+from absa_train_export import bio_tags, build_record, export, tokenize
+
+
+def test_bio_tags_basic_and_partial_token_overlap():
+    text = "Kargo çok hızlı, fiyat pahalı."
+    toks, offs = tokenize(text)
+    assert toks == ["Kargo", "çok", "hızlı", ",", "fiyat", "pahalı", "."]
+    s = text.index("çok")
+    tags = bio_tags(offs, [(s, s + 9, "positive"), (text.index("pahal"), text.index("pahal") + 3, "negative")])
+    assert tags == ["O", "B-POS", "I-POS", "O", "O", "B-NEG", "O"]
+
+
+def test_bio_tags_overlap_first_then_longest_wins():
+    text = "pil ömrü çok kısa"
+    _, offs = tokenize(text)
+    tags = bio_tags(offs, [(4, 17, "negative"), (0, 8, "neutral"), (0, 3, "positive")])
+    assert tags == ["B-NEU", "I-NEU", "O", "O"]
+
+
+def test_bio_tags_unknown_sentiment_and_empty_span():
+    _, offs = tokenize("iyi")
+    assert bio_tags(offs, [(0, 3, "???")]) == ["B-NEU"]
+    assert bio_tags(offs, [(3, 3, "positive")]) == ["O"]
+
+
+def test_build_record_skips_invalid_offsets():
+    text = "ses kalitesi harika"
+    rec = build_record(1, 2, 5, text, [("ses", "ses", "positive", "harika", 13, 19),
+                                       ("x", "diğer", "negative", "y", -3, 2),
+                                       ("x", "diğer", "negative", "y", None, 2),
+                                       ("x", "diğer", "negative", "y", 5, 99)])
+    assert [s["text"] for s in rec["spans"]] == ["harika"]
+    assert rec["tags"] == ["O", "O", "B-POS"]
+
+
+def _label(conn, review_id, aspects):
+    conn.execute("INSERT OR REPLACE INTO absa_raw (review_id, model_name, prompt_hash, response_json) "
+                 "VALUES (?, 'stub', 'h', '{}')", (review_id,))
+    conn.execute("DELETE FROM absa_aspects WHERE review_id = ?", (review_id,))
+    for aspect, s, e in aspects:
+        conn.execute("INSERT INTO absa_aspects (review_id, aspect, category, sentiment, opinion_terms, "
+                     "start_idx, end_idx) VALUES (?, ?, 'diğer', 'positive', 'x', ?, ?)", (review_id, aspect, s, e))
+    conn.commit()
+
+
+def _exported(out_dir):
+    recs = {}
+    for split in ("train", "dev", "test"):
+        d = os.path.join(out_dir, split)
+        for name in os.listdir(d):
+            with open(os.path.join(d, name), encoding="utf-8") as f:
+                for line in f:
+                    rec = json.loads(line)
+                    recs[rec["review_id"]] = rec
+    return recs
+
+
+def test_export_resume_picks_up_late_and_changed_labels(synth_db, tmp_path):
+    from absa_labelling import ensure_tables
+
+    conn = sqlite3.connect(synth_db)
+    ensure_tables(conn)
+    ids = [r[0] for r in conn.execute("SELECT id FROM reviews ORDER BY id LIMIT 40")]
+    for rid in ids[:40:2]:
+        _label(conn, rid, [("a", 0, 3)])
+    out = str(tmp_path / "out")
+    export(synth_db, out, workers=1, chunk_reviews=5)
+    first = _exported(out)
+    assert set(first) == set(ids[:40:2])
+
+    # biten chunk'ların içine geç etiket, bir yeniden etiketleme, bir requeue
+    _label(conn, ids[1], [("b", 0, 2)])
+    _label(conn, ids[2], [("c", 0, 2), ("d", 2, 4)])
+    conn.execute("DELETE FROM absa_aspects WHERE review_id = ?", (ids[4],))
+    conn.execute("DELETE FROM absa_raw WHERE review_id = ?", (ids[4],))
+    conn.commit()
+    conn.close()
+
+    export(synth_db, out, workers=1, chunk_reviews=5)
+    second = _exported(out)
+    assert ids[1] in second and ids[4] not in second
+    assert len(second[ids[2]]["spans"]) == 2
+    assert set(second) == (set(ids[:40:2]) | {ids[1]}) - {ids[4]}
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from absa_prompts import CATEGORIES, SENTIMENTS  # noqa: E402
+from absa_wire import WireDecodeError, decode_compact, encode_compact, number_words  # noqa: E402
+
+TEXT = "  Ürün çok güzel, kargo (biraz) yavaştı!  "
+
+
+def _item(**kw):
+    d = {"a": "kargo", "c": CATEGORIES.index("kargo"), "s": SENTIMENTS.index("negative"), "w": [3, 5], "p": 8}
+    d.update(kw)
+    return d
+
+
+def test_number_words():
+    assert number_words(TEXT) == "0:Ürün 1:çok 2:güzel, 3:kargo 4:(biraz) 5:yavaştı!"
+
+
+def test_decode_compact_rebuilds_spans_from_words():
+    resp = decode_compact({"x": [_item(), _item(a="ürün", c=0, s=0, w=[0, 3], p=None)]}, TEXT)
+    kargo, urun = resp.aspects
+    text = TEXT.strip()
+    assert (kargo.category, kargo.sentiment, kargo.confidence) == ("kargo", "negative", 0.8)
+    assert kargo.opinion_terms == "kargo (biraz"
+    assert text[kargo.start_idx:kargo.end_idx] == kargo.opinion_terms
+    assert urun.opinion_terms == "Ürün çok güzel" and urun.confidence is None
+
+
+@pytest.mark.parametrize("obj", [
+    None, {}, {"x": {}}, {"x": ["a"]},
+    {"x": [_item(a=" ")]},
+    {"x": [_item(c=len(CATEGORIES))]}, {"x": [_item(c=True)]},
+    {"x": [_item(s=-1)]},
+    {"x": [_item(w=[2, 2])]}, {"x": [_item(w=[3])]}, {"x": [_item(w=[-1, 2])]}, {"x": [_item(w=[0, 7])]},
+    {"x": [_item(p=11)]}, {"x": [_item(p=0.5)]},
+])
+def test_decode_compact_rejects_bad_payloads(obj):
+    with pytest.raises(WireDecodeError):
+        decode_compact(obj, TEXT)
+
+
+def test_encode_decode_roundtrip():
+    resp = decode_compact({"x": [_item(w=[5, 6])]}, TEXT)
+    again = decode_compact(encode_compact(resp, TEXT), TEXT)
+    assert again == resp
+    assert decode_compact({"x": []}, TEXT).aspects == []
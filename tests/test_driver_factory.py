@@ -0,0 +1,88 @@
+import pytest
+
+import driver_factory as df
+
+
+class FakeDriver:
+    """Sahte WebDriver: get() sırayla verilen hataları fırlatır, sonra başarılı olur."""
+
+    def __init__(self, n, errors=()):
+        self.n = n
+        self.errors = list(errors)
+        self.loaded = []
+        self.quit_called = False
+        self.title = f"driver-{n}"
+
+    def get(self, url):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.loaded.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    """create_driver'ı sahte driver'larla değiştirir; errors[i] i. driver'ın get hataları."""
+    made, errors = [], {}
+
+    def create(*args, **kw):
+        d = FakeDriver(len(made), errors.get(len(made), ()))
+        made.append(d)
+        return d
+    monkeypatch.setattr(df, "create_driver", create)
+    monkeypatch.setattr(df, "browser_rss_mb", lambda driver: None)
+    return made, errors
+
+
+def test_recycles_after_max_pages(fakes):
+    made, _ = fakes
+    d = df.ManagedDriver(max_pages=3, rss_check_every=0)
+    for i in range(7):
+        d.get(f"u{i}")
+    assert d.restarts == 2 and len(made) == 3
+    assert [m.loaded for m in made] == [["u0", "u1", "u2"], ["u3", "u4", "u5"], ["u6"]]
+    assert made[0].quit_called and made[1].quit_called and not made[2].quit_called
+    assert d.pages_since_start == 1 and len(d.page_stats) == 7
+
+
+def test_recycles_when_browser_rss_exceeds_threshold(fakes, monkeypatch):
+    made, _ = fakes
+    rss = {0: 120.0, 1: 80.0}
+    monkeypatch.setattr(df, "browser_rss_mb", lambda driver: rss[driver.n])
+    d = df.ManagedDriver(max_pages=0, max_rss_mb=100, rss_check_every=2)
+    for i in range(5):
+        d.get(f"u{i}")
+    # RSS 2 sayfada bir ölçülür: 2. sayfadan sonra eşik aşıldı, 3. get'ten önce yeniden başlatıldı
+    assert d.restarts == 1
+    assert [m.loaded for m in made] == [["u0", "u1"], ["u2", "u3", "u4"]]
+    assert [s[2] for s in d.page_stats] == [None, 120.0, None, 80.0, None]
+
+
+def test_crash_restarts_transparently_once(fakes):
+    made, errors = fakes
+    errors[0] = [df.WebDriverException("invalid session id")]
+    d = df.ManagedDriver(max_pages=0, rss_check_every=0)
+    d.get("u0")
+    assert d.restarts == 1 and made[0].quit_called and made[1].loaded == ["u0"]
+    assert d.title == "driver-1"        # attribute'lar yeni driver'a devredilir
+    assert d.raw is made[1]
+
+
+def test_non_crash_errors_and_repeated_crashes_propagate(fakes):
+    made, errors = fakes
+    errors[0] = [df.WebDriverException("timeout: page load")]
+    d = df.ManagedDriver(max_pages=0, rss_check_every=0)
+    with pytest.raises(df.WebDriverException, match="timeout"):
+        d.get("u0")
+    assert d.restarts == 0
+
+    errors[1] = [df.WebDriverException("chrome not reachable")]
+    errors[2] = [df.WebDriverException("tab crashed")]
+    made[0].errors = [df.WebDriverException("disconnected")]
+    with pytest.raises(df.WebDriverException, match="chrome not reachable"):
+        d.get("u1")
+    assert d.restarts == 1
+    with pytest.raises(AttributeError):
+        d._missing
@@ -0,0 +1,15 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from hepsiburada_all import plan_star_views  # noqa: E402
+
+
+def test_plan_star_views_unknown_counts_opens_all_filters():
+    assert plan_star_views(None, 20) == [(s, 20) for s in range(1, 6)]
+
+
+def test_plan_star_views_skips_filled_and_empty_stars():
+    counts = {5: 300, 4: 40, 3: 0, 2: 5, 1: 30}
+    assert plan_star_views(counts, 20, got={5: 20, 4: 3, 1: 25}) == [(4, 17), (2, 5)]
+    assert plan_star_views(counts, None) == [(5, 300), (4, 40), (2, 5), (1, 30)]
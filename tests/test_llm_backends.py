@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from absa_schema import ABSAResponse
+from llm_backends import OpenAICompatBackend, StubBackend, StubBackendError
+
+
+def _failed(be, texts, workers):
+    def call(t):
+        try:
+            be.invoke_raw(t)
+            return False
+        except StubBackendError:
+            return True
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return dict(zip(texts, ex.map(call, texts)))
+
+
+def test_stub_errors_do_not_depend_on_thread_order():
+    texts = [f"kargo hızlı geldi {i}" for i in range(300)]
+    serial = _failed(StubBackend(error_rate=0.3, seed=5), texts, 1)
+    parallel = _failed(StubBackend(error_rate=0.3, seed=5), list(reversed(texts)), 16)
+    assert serial == parallel
+    assert 40 < sum(serial.values()) < 150
+    assert serial != _failed(StubBackend(error_rate=0.3, seed=6), texts, 1)
+
+
+def test_stub_retry_of_same_review_can_succeed():
+    be = StubBackend(error_rate=0.5, seed=1)
+    text = next(t for t in (f"ürün güzel {i}" for i in range(100)) if _failed(be, [t], 1)[t])
+    assert not all(_failed(be, [text], 1)[text] for _ in range(20))
+
+
+class _FakeChain:
+    """chain.batch'i config'teki max_concurrency ile paralel çalıştırır, en yüksek açık istek sayısını tutar."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = self.peak = 0
+
+    def invoke(self, inp):
+        with self.lock:
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+        time.sleep(0.002)
+        with self.lock:
+            self.inflight -= 1
+        return {"parsed": ABSAResponse(aspects=[]), "raw": None}
+
+    def batch(self, inputs, config, return_exceptions):
+        with ThreadPoolExecutor(max_workers=config["max_concurrency"]) as ex:
+            return list(ex.map(self.invoke, inputs))
+
+
+@pytest.mark.parametrize("mc,bs", [(16, 32), (16, 4), (4, 8), (5, 2)])
+def test_langchain_backend_in_flight_requests_stay_within_max_concurrency(synth_db, monkeypatch, mc, bs):
+    import absa_labelling
+
+    be = OpenAICompatBackend(max_concurrency=mc, batch_size=bs)
+    be._chain = _FakeChain()
+    monkeypatch.setattr(absa_labelling, "backend", be)
+    conn = absa_labelling.open_db(synth_db)
+    absa_labelling.ensure_tables(conn)
+    rows = conn.execute("SELECT id, review_text FROM reviews LIMIT 200").fetchall()
+    absa_labelling.label_rows(conn, rows, quiet=True)
+    assert 1 < be._chain.peak <= mc
+    assert conn.execute("SELECT COUNT(*) FROM absa_raw").fetchone()[0] == len(rows)
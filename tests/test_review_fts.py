@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+import review_fts
+
+
+@pytest.fixture
+def conn():
+    c = sqlite3.connect(":memory:")
+    c.execute("CREATE TABLE reviews (id INTEGER PRIMARY KEY, product_id INTEGER, review_text TEXT)")
+    c.executemany("INSERT INTO reviews (product_id, review_text) VALUES (?, ?)", [
+        (1, "KARGO çok hızlı geldi"),
+        (1, "ılık su veriyor"),
+        (2, "ILIK bile değil, İADE ettim"),
+        (2, "kargoda ezilmiş, kargo kargo kargo berbat"),
+        (3, "Pil ömrü kısa"),
+    ])
+    review_fts.init_fts(c)
+    return c
+
+
+def test_fold_tr_keeps_length_and_merges_turkish_case():
+    for s in ("KARGO", "ılık", "ILIK", "İade", "Pil ömrü"):
+        assert len(review_fts.fold_tr(s)) == len(s)
+    assert review_fts.fold_tr("ILIK") == review_fts.fold_tr("ılık") == "ilik"
+    assert review_fts.fold_tr("İADE") == "iade"
+
+
+def test_case_and_dotless_i_folding(conn):
+    assert review_fts.matching_review_ids(conn, "kargo", prefix=False) == \
+        review_fts.matching_review_ids(conn, "KARGO", prefix=False) == [1, 4]
+    assert review_fts.matching_review_ids(conn, "ılık") == review_fts.matching_review_ids(conn, "ILIK") == [2, 3]
+    assert review_fts.matching_review_ids(conn, "iade") == [3]
+    assert review_fts.count_matches(conn, "pil omru") == 1
+
+
+def test_prefix_matching(conn):
+    assert review_fts.count_matches(conn, "kargo") == 2
+    assert review_fts.matching_review_ids(conn, "kargod") == [4]
+    assert review_fts.matching_review_ids(conn, "kargod", prefix=False) == []
+
+
+def test_triggers_follow_insert_update_delete(conn):
+    conn.execute("INSERT INTO reviews (product_id, review_text) VALUES (4, 'Işık harika')")
+    new_id = conn.execute("SELECT MAX(id) FROM reviews").fetchone()[0]
+    assert review_fts.matching_review_ids(conn, "ışık") == [new_id]
+
+    conn.execute("UPDATE reviews SET review_text = 'ekran parlak' WHERE id = 1")
+    assert 1 not in review_fts.matching_review_ids(conn, "kargo")
+    assert review_fts.matching_review_ids(conn, "ekran") == [1]
+
+    conn.execute("DELETE FROM reviews WHERE id = 4")
+    assert review_fts.count_matches(conn, "kargo") == 0
+    conn.execute(f"INSERT INTO {review_fts.FTS_TABLE}({review_fts.FTS_TABLE}) VALUES ('integrity-check')")
+
+
+def test_bm25_ordering_and_product_filter(conn):
+    hits = review_fts.search(conn, "kargo")
+    assert [h["review_id"] for h in hits] == [4, 1]
+    assert hits[0]["score"] <= hits[1]["score"]
+    assert [h["review_id"] for h in review_fts.search(conn, "kargo", product_id=1)] == [1]
+
+
+def test_spans_and_snippet_index_original_text(conn):
+    hits = review_fts.search(conn, ["ılık", "iade"], op="OR")
+    by_id = {h["review_id"]: h for h in hits}
+    text = by_id[3]["text"]
+    assert [text[s:e] for s, e in by_id[3]["spans"]] == ["ILIK", "İADE"]
+    assert "[ILIK]" in by_id[3]["snippet"] and "[İADE]" in by_id[3]["snippet"]
+
+    text = review_fts.search(conn, "pil ömrü")[0]["text"]
+    (s, e), = review_fts.search(conn, "pil ömrü")[0]["spans"]
+    assert text[s:e] == "Pil ömrü"
@@ -0,0 +1,28 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from review_quality import (SKIP_DUPLICATE, SKIP_EMPTY, SKIP_NO_LETTERS, SKIP_NON_TURKISH,  # noqa: E402
+                            SKIP_REPEATED, SKIP_SPAM, SKIP_TOO_SHORT, compute_features, skip_reasons)
+
+
+def _reasons(texts, dup_products=None):
+    f = compute_features(pd.Series(texts))
+    f["dup_products"] = dup_products or [1] * len(texts)
+    return list(skip_reasons(f))
+
+
+def test_skip_reasons_rules():
+    texts = ["", "   ", "👍👍👍 !!!", "Güzel", "süperrrrrrrrrrrr ürünnnnnnnnn!!!!!!!!",
+             "Очень хороший товар, рекомендую всем",
+             "This product is very good and the price was great",
+             "İndirim kodu için instagram hesabımı takip edin www.ornek.com",
+             "Ürün çok güzel geldi, kargo da hızlıydı. Tavsiye ederim."]
+    assert _reasons(texts) == [SKIP_EMPTY, SKIP_EMPTY, SKIP_NO_LETTERS, SKIP_TOO_SHORT, SKIP_REPEATED,
+                               SKIP_NON_TURKISH, SKIP_NON_TURKISH, SKIP_SPAM, None]
+
+
+def test_skip_reasons_duplicate_template_needs_length():
+    long_text = "Ürün elime sağlam ulaştı, paketleme özenliydi, satıcıya teşekkür ederim."
+    assert _reasons([long_text, "Çok güzel ürün"], dup_products=[6, 6]) == [SKIP_DUPLICATE, None]
+    assert _reasons([long_text], dup_products=[4]) == [None]
@@ -0,0 +1,12 @@
+from reviews_db import get_or_create_product_id, init_db, save_reviews
+
+
+def test_save_reviews_returns_only_new_items(tmp_path):
+    conn = init_db(str(tmp_path / "r.db"))
+    pid = get_or_create_product_id(conn, "https://www.hepsiburada.com/urun-p-1")
+    page = [{"text": "Çok güzel", "rating": 5}, {"text": "Kötü", "rating": 1}, {"text": "  ", "rating": 3}]
+    assert save_reviews(conn, pid, page, page_no=1) == page[:2]
+    # filtreli görünüm aynı yorumları tekrar gösterir: sadece yenisi sayılır
+    again = [{"text": " Çok güzel ", "rating": 5}, {"text": "Harika", "rating": 5}, {"text": "Harika", "rating": 5}]
+    assert save_reviews(conn, pid, again, page_no=1) == again[1:2]
+    assert conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 3
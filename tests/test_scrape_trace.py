@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from scrape_trace import StageTracer, summarize_trace_file
+
+
+def _run(tr):
+    tr.set_context(category="c")
+    with tr.span("product_total"):
+        with tr.span("review_get"):
+            tr.sleep(0.02)
+        ctx = tr.context()
+
+        def worker():
+            tr.set_context(**ctx)
+            with tr.span("review_page_get"):
+                pass
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+        tr.count("cards", 3)
+    with tr.span("category_get"):
+        pass
+    tr.count("cards", 2)
+
+
+@pytest.mark.parametrize("name", ["trace.jsonl", "trace.db"])
+def test_share_uses_top_level_spans_and_file_keeps_counters(tmp_path, name):
+    tr = StageTracer(path=str(tmp_path / name))
+    _run(tr)
+    rep = tr.report()["c"]
+    top = rep["product_total"]["total_s"] + rep["category_get"]["total_s"]
+    assert rep["_top_s"] == pytest.approx(top, abs=0.002)
+    # iç içe span'ler (review_get, sleep, worker) paya ikinci kez girmez
+    assert rep["_top_s"] < sum(v["total_s"] for k, v in rep.items() if not k.startswith("_")) - 0.03
+    tr.print_report()
+    tr.close()
+
+    again = summarize_trace_file(str(tmp_path / name)).report()["c"]
+    assert again["_counters"] == {"cards": 5}
+    assert again["_top_s"] == pytest.approx(top, abs=0.002)
+    assert set(again) - {"_counters", "_top_s"} == {"product_total", "review_get", "sleep", "review_page_get",
+                                                      "category_get"}
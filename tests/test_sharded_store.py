@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+import sharded_store as ss
+
+TABLES = ("products", "reviews")
+
+
+def _rows(conn, table, cols):
+    return sorted(conn.execute(f"SELECT {', '.join(cols)} FROM {table}").fetchall())
+
+
+def _cols(conn, table):
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})") if r[1] != "shard"]
+
+
+def test_new_ids_are_seeded_per_shard_and_never_collide(tmp_path):
+    store = ss.ShardedStore(str(tmp_path / "shards"), n_shards=3)
+    pids = {}
+    for i in range(30):
+        url = f"https://example.com/urun-{i}"
+        pid = store.get_or_create_product_id(url)
+        k = ss.shard_of_url(url, 3)
+        assert ss.id_base(k) < pid < ss.id_base(k + 1) and ss.shard_of_id(pid) == k
+        assert store.get_or_create_product_id(url) == pid
+        pids[pid] = k
+        store.save_reviews(pid, [{"text": f"yorum {i} {j}", "rating": 5} for j in range(3)], 1)
+    store.flush()
+    store.close()
+
+    conn = ss.open_facade(str(tmp_path / "shards"))
+    reviews = conn.execute("SELECT id, product_id, shard FROM reviews").fetchall()
+    assert len(reviews) == 90 and len({r[0] for r in reviews}) == 90
+    assert all(ss.shard_of_id(rid) == k == pids[pid] for rid, pid, k in reviews)
+    assert ss.shard_of_id(12345) is None
+
+
+@pytest.fixture
+def split(synth_db, tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    counts = ss.split_database(synth_db, shard_dir, n_shards=3)
+    return synth_db, shard_dir, counts
+
+
+def test_split_round_trip_and_facade_match_single_file(split):
+    src_path, shard_dir, counts = split
+    src = sqlite3.connect(src_path)
+    facade = ss.open_facade(shard_dir)
+    for t in TABLES:
+        cols = [c for c in _cols(src, t) if c in _cols(facade, t)]
+        assert _rows(facade, t, cols) == _rows(src, t, cols)
+        assert sum(n for (k, table), n in counts.items() if table == t) == \
+            src.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+    # ürün ve yorumları aynı shard'da
+    assert facade.execute("""SELECT COUNT(*) FROM reviews r JOIN products p ON p.id = r.product_id
+                             WHERE p.shard <> r.shard""").fetchone()[0] == 0
+    assert {r[0] for r in facade.execute("SELECT shard FROM products")} == {0, 1, 2}
+
+
+def test_legacy_ids_are_looked_up_once(split):
+    _, shard_dir, _ = split
+    facade = ss.open_facade(shard_dir)
+    rid, pid, k = facade.execute("SELECT id, product_id, shard FROM reviews ORDER BY id LIMIT 1").fetchone()
+    facade.close()
+
+    store = ss.ShardedStore(shard_dir)
+    try:
+        assert store.n_shards == 3
+        assert store.shard_of_review(rid) == k and store.shard_of_product(pid) == k
+        assert store._legacy_shard[("reviews", rid)] == k
+        with pytest.raises(KeyError):
+            store.shard_of_review(10 ** 9)
+        # taşınmış ürüne yeni yorum doğru shard'a, o shard'ın id aralığından yazılır
+        assert store.save_reviews(pid, [{"text": "taşımadan sonra gelen yorum", "rating": 4}], 1).result()
+        store.flush()
+    finally:
+        store.close()
+    conn = sqlite3.connect(ss.shard_path(shard_dir, k))
+    new_id = conn.execute("SELECT MAX(id) FROM reviews WHERE product_id = ?", (pid,)).fetchone()[0]
+    assert ss.shard_of_id(new_id) == k
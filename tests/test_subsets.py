@@ -0,0 +1,39 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import sharded_store  # noqa: E402
+import subsets  # noqa: E402
+
+
+def _manifest(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute(f"SELECT table_name, mode FROM {subsets.SUBSET_MANIFEST_TABLE}"))
+
+
+def test_main_on_shard_dir_writes_to_shard_0(synth_db, tmp_path, monkeypatch, capsys):
+    shard_dir = str(tmp_path / "shards")
+    sharded_store.split_database(synth_db, shard_dir, n_shards=2)
+    monkeypatch.setattr(subsets, "DB_PATH", shard_dir)
+
+    subsets.main()
+    shard0 = sharded_store.list_shards(shard_dir)[0]
+    assert set(_manifest(shard0).values()) == {"rebuild"}
+    with sqlite3.connect(shard0) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM reviews_debug_merged").fetchone()[0] > 0
+
+    capsys.readouterr()
+    subsets.main()
+    assert "yeniden kullanılıyor" in capsys.readouterr().out
+
+
+def test_main_out_path(synth_db, tmp_path, monkeypatch):
+    out = str(tmp_path / "subsets.db")
+    monkeypatch.setattr(subsets, "DB_PATH", synth_db)
+    subsets.main(out_path=out)
+    assert set(_manifest(out)) == {"subset_5k_diverse_products_balanced_ratings", "reviews_debug_merged"}
+    with sqlite3.connect(synth_db) as conn:
+        assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name=?",
+                                (subsets.SUBSET_MANIFEST_TABLE,)).fetchone()
@@ -0,0 +1,29 @@
+import tracemalloc
+
+import numpy as np
+
+from text_vectors import _min_dist_to, hashed_tfidf, kcenter_select
+
+
+def _unit(n, d, seed):
+    X = np.random.default_rng(seed).standard_normal((n, d)).astype(np.float32)
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+
+def test_min_dist_to_matches_dense_and_bounds_block_memory():
+    X, S = _unit(20000, 16, 0), _unit(2000, 16, 1)
+    small = X[:500]
+    assert np.allclose(_min_dist_to(small, S, block_elems=7), 1.0 - (small @ S.T).max(axis=1), atol=1e-6)
+
+    tracemalloc.start()
+    _min_dist_to(X, S, block_elems=1 << 16)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 4 * 1024 * 1024        # tek blokta 20000 × 2000 float32 = 160 MB olurdu
+
+
+def test_kcenter_continues_from_selected_and_skips_excluded():
+    X = hashed_tfidf([f"kargo hızlı {i}" for i in range(50)] + ["ekran parlak", "pil kötü", ""], dim=64)
+    first = kcenter_select(X, 3)
+    more = kcenter_select(X, 3, selected=first, exclude=np.arange(len(X)) == 51)
+    assert not set(first) & set(more) and 51 not in more and len(more) == 3
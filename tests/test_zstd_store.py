@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+import review_fts  # noqa: E402
+import zstd_store  # noqa: E402
+
+
+def _compress(conn):
+    return zstd_store.compress_table(conn, "reviews", "review_text")
+
+
+def test_compress_keeps_fts_index(synth_db):
+    conn = sqlite3.connect(synth_db)
+    review_fts.init_fts(conn)
+    before = review_fts.count_matches(conn, "kargo")
+    assert before > 0
+
+    assert _compress(conn)["rows"] > 0
+    assert conn.execute("SELECT COUNT(*) FROM reviews WHERE review_text <> ''").fetchone()[0] == 0
+    assert review_fts.count_matches(conn, "kargo") == before
+    conn.execute(f"INSERT INTO {review_fts.FTS_TABLE}({review_fts.FTS_TABLE}) VALUES ('integrity-check')")
+    conn.close()
+
+    ro = zstd_store.open_db(synth_db, readonly=True)
+    assert review_fts.count_matches(ro, "kargo") == before
+    hits = review_fts.search(ro, "kargo", limit=5)
+    assert hits and all("kargo" in review_fts.fold_tr(h["text"]) for h in hits)
+    assert all(h["spans"] for h in hits)
+    ro.close()
+
+
+def test_rebuild_and_decompress_after_compress(synth_db):
+    conn = sqlite3.connect(synth_db)
+    review_fts.init_fts(conn)
+    before = review_fts.count_matches(conn, "kargo")
+    _compress(conn)
+
+    review_fts.rebuild_fts(conn)
+    assert review_fts.count_matches(conn, "kargo") == before
+
+    zstd_store.decompress_table(conn, "reviews", "review_text")
+    assert review_fts.count_matches(conn, "kargo") == before
+    conn.execute(f"INSERT INTO {review_fts.FTS_TABLE}({review_fts.FTS_TABLE}) VALUES ('integrity-check')")
+    triggers = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='trigger'")}
+    assert {"reviews_fts_ai", "reviews_fts_ad", "reviews_fts_au"} <= triggers
+    conn.close()
+
+
+def test_backfill_on_compressed_db(synth_db):
+    conn = sqlite3.connect(synth_db)
+    expected = conn.execute("SELECT COUNT(*) FROM reviews WHERE review_text LIKE '%kargo%' "
+                            "OR review_text LIKE '%Kargo%'").fetchone()[0]
+    _compress(conn)
+    review_fts.init_fts(conn)
+    assert review_fts.count_matches(conn, "kargo") == expected
+    conn.close()
+
+
+def test_span_verify_reads_decoded_text(synth_db):
+    import absa_labelling
+    import absa_spans
+
+    conn = sqlite3.connect(synth_db)
+    absa_labelling.ensure_tables(conn)
+    rows = conn.execute("SELECT id, review_text FROM reviews ORDER BY id LIMIT 50").fetchall()
+    aspects = []
+    for rid, text in rows:
+        term = text.split()[0]
+        aspects.append((rid, term, "diğer", "nötr", term, 0, len(term)))
+    conn.executemany("INSERT INTO absa_aspects (review_id, aspect, category, sentiment, opinion_terms, "
+                     "start_idx, end_idx) VALUES (?, ?, ?, ?, ?, ?, ?)", aspects)
+    conn.commit()
+    _compress(conn)
+    conn.close()
+
+    with absa_labelling.open_db(synth_db) as conn:
+        assert absa_spans.verify_pending(conn) == {absa_spans.SPAN_OK: len(aspects)}
+
+
+def _integrity(conn):
+    conn.execute(f"INSERT INTO {review_fts.FTS_TABLE}({review_fts.FTS_TABLE}) VALUES ('integrity-check')")
+
+
+def test_delete_and_update_compressed_rows_keep_fts_in_sync(synth_db):
+    conn = sqlite3.connect(synth_db)
+    review_fts.init_fts(conn)
+    conn.execute("UPDATE reviews SET review_text = 'zebraşık kargo geldi' WHERE id = 1")
+    conn.execute("UPDATE reviews SET review_text = 'mandalina rengi güzel' WHERE id = 2")
+    conn.commit()
+    _compress(conn)
+
+    # UDF'siz bağlantı sıkıştırılmış satırı silemez (indeksi sessizce bozmak yerine hata)
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM reviews WHERE id = 1")
+    conn.rollback()
+
+    zstd_store.register(conn)
+    conn.execute("DELETE FROM main.reviews WHERE id = 1")
+    conn.execute("UPDATE main.reviews SET review_text = 'papatya', review_text_z = NULL WHERE id = 2")
+    conn.commit()
+    assert review_fts.count_matches(conn, "zebraşık") == 0
+    assert review_fts.count_matches(conn, "mandalina") == 0
+    assert review_fts.matching_review_ids(conn, "papatya") == [2]
+    _integrity(conn)
+    conn.close()